@@ -4,9 +4,13 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import multiprocessing
 import sys
+import time
 import traceback
 
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
 from termcolor import cprint
@@ -20,9 +24,24 @@ sys.path.insert(0, str(Path(__file__).resolve().parent / "schema_loader"))
 
 from data.bundle_generate import BundleGenerator
 from data.bundle_generate import GeneratorType
+from data.bundle_generate import MetadataConfig
+from data.bundle_generate.concurrency import ConcurrencyLimits
+from data.bundle_generate.log import use_log_file
+from data.bundle_generate.object_store import ObjectStore
+from data.bundle_generate.paths import BUNDLE_CACHE_ROOT
+from data.bundle_generate.paths import BUNDLE_LOG_DIR
+from data.bundle_generate.paths import BUNDLE_OBJECT_STORE
 from data.bundle_generate.paths import BUNDLE_WS_ROOT
 
 
+@dataclass
+class WorkspaceResult:
+    name: str
+    success: bool
+    elapsed: float
+    bundle_path: Path | None = None
+
+
 def _success(*args, **kwargs) -> None:
     """Print success message."""
     cprint("Success: ", "green", attrs=["bold"], end="")
@@ -42,12 +61,40 @@ def _error(*args, **kwargs) -> None:
     sys.exit(1)
 
 
+def _failure(*args, **kwargs) -> None:
+    """Print error message without exiting."""
+    cprint("Error: ", "red", attrs=["bold"], end="")
+    cprint(*args, **kwargs)
+
+
 def _info(*args, **kwargs) -> None:
     """Print info message."""
     cprint("Info: ", "cyan", attrs=["bold"], end="")
     print(*args, **kwargs)
 
 
+_SIZE_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def _size(value: str) -> int:
+    """Parse a size such as `512M` or `20G` into bytes."""
+    text = value.strip().upper().removesuffix("B")
+    multiplier = _SIZE_UNITS.get(text[-1:])
+    if multiplier is None:
+        multiplier = 1
+    else:
+        text = text[:-1]
+
+    try:
+        return int(float(text) * multiplier)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size '{value}'") from None
+
+
+def _workspace_name(workspace_path: Path) -> str:
+    return workspace_path.name if workspace_path.name != "bundle-ws" else "default"
+
+
 def discover_workspaces() -> list[Path]:
     """Discover available workspaces in bundle-ws directory."""
     if not BUNDLE_WS_ROOT.exists():
@@ -91,28 +138,121 @@ def discover_workspaces() -> list[Path]:
     return workspaces
 
 
-async def process_workspace(workspace_path: Path, skip: set[GeneratorType] | None) -> bool:
+async def process_workspace(
+    workspace_path: Path,
+    skip: set[GeneratorType] | None,
+    rebuild: bool = False,
+    profile: bool = False,
+    resume: bool = False,
+    limits: ConcurrencyLimits | None = None,
+    client_cache: Path | None = None,
+) -> WorkspaceResult:
     """Process a single workspace."""
-    workspace_name = workspace_path.name if workspace_path.name != "bundle-ws" else "default"
+    workspace_name = _workspace_name(workspace_path)
+    start = time.perf_counter()
 
     cprint(f"\n{'=' * 60}", "blue", attrs=["bold"])
     cprint(f"Processing workspace: {workspace_name}", "blue", attrs=["bold"])
     cprint(f"{'=' * 60}", "blue", attrs=["bold"])
 
     try:
-        processor = BundleGenerator(workspace_path)
-        bundle_path = await processor.generate(skip=skip)
+        processor = BundleGenerator(workspace_path, limits=limits, client_cache=client_cache)
+        bundle_path = await processor.generate(
+            skip=skip, rebuild=rebuild, profile=profile, resume=resume
+        )
 
         if bundle_path:
             _success(f"Bundle for workspace '{workspace_name}' completed successfully!")
             _success(f"Bundle file: {bundle_path}")
-            return True
+            return WorkspaceResult(
+                workspace_name, True, time.perf_counter() - start, bundle_path=bundle_path
+            )
         else:
-            _error(f"Failed to process workspace '{workspace_name}'")
-            return False
+            _failure(f"Failed to process workspace '{workspace_name}'")
     except Exception as e:
-        _error(f"Error processing workspace '{workspace_name}': {e!r}\n{traceback.format_exc()}")
-        return False
+        _failure(f"Error processing workspace '{workspace_name}': {e!r}\n{traceback.format_exc()}")
+
+    return WorkspaceResult(workspace_name, False, time.perf_counter() - start)
+
+
+def _process_workspace_job(
+    workspace_path: Path,
+    skip: set[GeneratorType] | None,
+    rebuild: bool,
+    profile: bool,
+    resume: bool,
+    limits: ConcurrencyLimits | None,
+    client_cache: Path | None,
+) -> WorkspaceResult:
+    """Process a single workspace in a worker process, logging to its own file."""
+    workspace_name = _workspace_name(workspace_path)
+    use_log_file(BUNDLE_LOG_DIR / f"{workspace_name}.log", tag=workspace_name)
+    return asyncio.run(
+        process_workspace(
+            workspace_path,
+            skip,
+            rebuild=rebuild,
+            profile=profile,
+            resume=resume,
+            limits=limits,
+            client_cache=client_cache,
+        )
+    )
+
+
+async def process_workspaces_parallel(
+    workspaces: list[Path],
+    jobs: int,
+    skip: set[GeneratorType] | None,
+    rebuild: bool = False,
+    profile: bool = False,
+    resume: bool = False,
+    limits: ConcurrencyLimits | None = None,
+    client_cache: Path | None = None,
+) -> list[WorkspaceResult]:
+    """Process workspaces in up to `jobs` worker processes."""
+    servers: dict[str, str] = {}
+    for workspace in workspaces:
+        server = MetadataConfig(workspace).metadata.server
+        if server in servers:
+            _error(
+                f"Workspaces '{servers[server]}' and '{_workspace_name(workspace)}' "
+                f"share server ID '{server}' and cannot be built in parallel."
+            )
+        servers[server] = _workspace_name(workspace)
+
+    _info(f"Building {len(workspaces)} workspaces with {jobs} parallel jobs.")
+    _info(f"Per-workspace logs are written to '{BUNDLE_LOG_DIR}'.")
+
+    loop = asyncio.get_running_loop()
+    # Always spawn: forking a process that runs an event loop and worker threads is unsafe.
+    with ProcessPoolExecutor(
+        max_workers=jobs, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        tasks = [
+            loop.run_in_executor(
+                pool,
+                _process_workspace_job,
+                workspace,
+                skip,
+                rebuild,
+                profile,
+                resume,
+                limits,
+                client_cache,
+            )
+            for workspace in workspaces
+        ]
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = []
+    for workspace, outcome in zip(workspaces, outcomes, strict=True):
+        if isinstance(outcome, BaseException):
+            _failure(f"Worker for workspace '{_workspace_name(workspace)}' failed: {outcome!r}")
+            results.append(WorkspaceResult(_workspace_name(workspace), False, 0.0))
+        else:
+            results.append(outcome)
+    return results
 
 
 async def main():
@@ -142,6 +282,19 @@ async def main():
     group.add_argument(
         "--clean", action="store_true", help="Clean up existing bundles and cache before processing"
     )
+    group.add_argument(
+        "--verify-cache",
+        action="store_true",
+        help="Check every cached resource against its resfileindex checksum, "
+        "remove the ones that do not match and exit",
+    )
+    group.add_argument(
+        "--prune-objects",
+        type=_size,
+        metavar="SIZE",
+        help="Evict least recently used downloads from the shared object store "
+        "until it fits in SIZE (e.g. 20G) and exit",
+    )
 
     parser.add_argument(
         "--skip",
@@ -151,6 +304,84 @@ async def main():
         help="Skip specified generator types during processing",
     )
 
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Rebuild every collector, even if its inputs have not changed since the last build",
+    )
+
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Print the resources the build would download, and their total size, and exit",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted build, skipping the collectors it already completed",
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write a per-stage and per-collector timing and memory report "
+        "to bundle-cache/<server>/profile.json",
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=ConcurrencyLimits.initial,
+        help="Initial number of concurrent downloads per host",
+    )
+
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=ConcurrencyLimits.maximum,
+        help="Upper bound the number of concurrent downloads per host may grow to",
+    )
+
+    parser.add_argument(
+        "--segments",
+        type=int,
+        default=ConcurrencyLimits.segments,
+        help="Number of parallel ranged requests large resources are downloaded with "
+        "(1 disables segmented downloads)",
+    )
+
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        metavar="KIB",
+        default=ConcurrencyLimits.chunk_size // 1024,
+        help="Size in KiB of the chunks downloads are received and written in",
+    )
+
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=ConcurrencyLimits.io_threads,
+        help="Number of threads writing downloads to disk",
+    )
+
+    parser.add_argument(
+        "--client-cache",
+        type=Path,
+        metavar="DIR",
+        help="Shared cache folder of a local EVE client installation. Resources found in it "
+        "are copied from disk instead of downloaded",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of workspaces to build in parallel worker processes (with --all)",
+    )
+
     args = parser.parse_args()
 
     cprint("EVE MultiTools Data Bundle Generator", "magenta", attrs=["bold"])
@@ -163,6 +394,58 @@ async def main():
         _error("--skip is only valid with --workspace or --all.")
         return
 
+    if args.rebuild and not (args.workspace or args.all):
+        _error("--rebuild is only valid with --workspace or --all.")
+        return
+
+    if args.resume and not (args.workspace or args.all):
+        _error("--resume is only valid with --workspace or --all.")
+        return
+
+    if args.plan and not (args.workspace or args.all):
+        _error("--plan is only valid with --workspace or --all.")
+        return
+
+    if args.profile and not (args.workspace or args.all):
+        _error("--profile is only valid with --workspace or --all.")
+        return
+
+    if args.jobs != 1 and not args.all:
+        _error("--jobs is only valid with --all.")
+        return
+
+    if args.jobs < 1:
+        _error("--jobs must be at least 1.")
+        return
+
+    if args.concurrency < 1 or args.max_concurrency < args.concurrency:
+        _error("--concurrency must be at least 1 and at most --max-concurrency.")
+        return
+
+    if args.segments < 1:
+        _error("--segments must be at least 1.")
+        return
+
+    if args.chunk_size < 1:
+        _error("--chunk-size must be at least 1.")
+        return
+
+    if args.io_threads < 1:
+        _error("--io-threads must be at least 1.")
+        return
+
+    if args.client_cache is not None and not args.client_cache.is_dir():
+        _error(f"Client cache '{args.client_cache}' is not a directory.")
+        return
+
+    limits = ConcurrencyLimits(
+        initial=args.concurrency,
+        maximum=args.max_concurrency,
+        segments=args.segments,
+        chunk_size=args.chunk_size * 1024,
+        io_threads=args.io_threads,
+    )
+
     if args.list:
         _info("Available workspaces:")
         for workspace in workspaces:
@@ -221,25 +504,84 @@ async def main():
             processor.clean_bundle_cache()
         _success("Cache cleanup completed.")
         return
+    elif args.verify_cache:
+        _info("Verifying resource cache...")
+        for workspace in workspaces:
+            result = BundleGenerator(workspace).verify_cache()
+            _info(
+                f"  - {_workspace_name(workspace)}: checked {result.checked} files, "
+                f"hashed {result.hashed}, removed {result.removed}"
+            )
+        _success("Cache verification completed.")
+        return
+    elif args.prune_objects is not None:
+        _info(f"Pruning object store '{BUNDLE_OBJECT_STORE}'...")
+        result = ObjectStore(BUNDLE_OBJECT_STORE).prune(
+            args.prune_objects, BUNDLE_CACHE_ROOT.glob("*/index-cache")
+        )
+        _success(
+            f"Evicted {result.removed} objects, freed {result.freed / 1024**2:.1f} MiB, "
+            f"kept {result.pinned_bytes / 1024**2:.1f} MiB linked outside the store."
+        )
+        return
 
     # Process selected workspaces
     if not target_workspaces:
         _error("No workspaces selected for processing.")
         return
 
-    success_count = 0
+    skip = set(args.skip) if args.skip else None
     total_count = len(target_workspaces)
 
-    for workspace in target_workspaces:
-        success = await process_workspace(workspace, skip=set(args.skip) if args.skip else None)
-        if success:
-            success_count += 1
+    if args.plan:
+        for workspace in target_workspaces:
+            processor = BundleGenerator(workspace, client_cache=args.client_cache)
+            plan = processor.plan(skip=skip, rebuild=args.rebuild)
+            _info(f"{_workspace_name(workspace)}: {plan.summary()}")
+            for el in plan.downloads[:10]:
+                _info(f"  - {el.res_id} ({el.size / 1024**2:.1f} MiB)")
+            for res in plan.missing:
+                _warning(f"  - {res} is not in the resource index")
+        return
+
+    if args.jobs > 1 and total_count > 1:
+        results = await process_workspaces_parallel(
+            target_workspaces,
+            min(args.jobs, total_count),
+            skip=skip,
+            rebuild=args.rebuild,
+            profile=args.profile,
+            resume=args.resume,
+            limits=limits,
+            client_cache=args.client_cache,
+        )
+    else:
+        results = [
+            await process_workspace(
+                workspace,
+                skip=skip,
+                rebuild=args.rebuild,
+                profile=args.profile,
+                resume=args.resume,
+                limits=limits,
+                client_cache=args.client_cache,
+            )
+            for workspace in target_workspaces
+        ]
+
+    success_count = sum(1 for result in results if result.success)
 
     # Summary
     cprint(f"\n{'=' * 60}", "magenta", attrs=["bold"])
     cprint("Processing Summary", "magenta", attrs=["bold"])
     cprint(f"{'=' * 60}", "magenta", attrs=["bold"])
 
+    for result in results:
+        if result.success:
+            _success(f"{result.name}: {result.bundle_path} ({result.elapsed:.1f}s)")
+        else:
+            _failure(f"{result.name}: failed after {result.elapsed:.1f}s")
+
     if success_count == total_count:
         _success(f"All {total_count} workspace(s) processed successfully!")
     elif success_count > 0:
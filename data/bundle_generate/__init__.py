@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import configparser
-import csv
+import contextlib
 import datetime
+import functools
 import json
 import shutil
 import typing
@@ -16,12 +18,17 @@ from typing import Literal
 
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
     from pathlib import Path
 
+    from data.bundle_generate.cache_verify import VerifyResult
+    from data.bundle_generate.concurrency import ConcurrencyLimits
+    from data.bundle_generate.planner import DownloadPlan
     from data.bundle_generate.resources import FormatterFunc
 
 
 type GeneratorType = Literal["image", "localization", "static", "universe"]
+type Generator = ImageGenerator | LocalizationGenerator | StaticDataGenerator | UniverseGenerator
 
 
 @dataclass
@@ -179,13 +186,20 @@ class BundleGenerator:
 
     __fsd: Fsd
     __res_file_index: ResourceTree
+    __store: ObjectStore
+    __sessions: SessionManager
 
     __app_url_formatter: FormatterFunc
     __resource_url_formatter: FormatterFunc
 
     __bundle_root: Path
 
-    def __init__(self, workspace_root: Path):
+    def __init__(
+        self,
+        workspace_root: Path,
+        limits: ConcurrencyLimits | None = None,
+        client_cache: Path | None = None,
+    ):
         self.workspace_root = workspace_root
 
         self.__metadata = MetadataConfig(workspace_root)
@@ -207,7 +221,8 @@ class BundleGenerator:
         self.__bundle_cache = BUNDLE_CACHE_ROOT / self.server_id
         self.__bundle_cache.mkdir(parents=True, exist_ok=True)
 
-        self._load_resources()
+        self.__sessions = SessionManager(limits)
+        self._load_resources(client_cache)
 
         self.bundle_root = self.__bundle_cache / "bundle"
         self.bundle_root.mkdir(parents=True, exist_ok=True)
@@ -233,55 +248,191 @@ class BundleGenerator:
                 f"No existing bundle full cache directory '{self.__bundle_cache}' to remove."
             )
 
+    def verify_cache(
+        self, resources: Iterable[ResourceTree._FileNode] | None = None
+    ) -> VerifyResult:
+        """Check cached resources against their checksums, removing any that do not match.
+
+        Only `resources` are checked if given, otherwise every file in the cache.
+        """
+        verifier = CacheVerifier(
+            self.__bundle_cache / "index-cache" / "verified.json", self.__store
+        )
+        if resources is None:
+            resources = self.__res_file_index.cached_resources()
+        return verifier.verify(resources)
+
     def clean_bundle_cache(self):
         if self.bundle_root.exists():
             shutil.rmtree(self.bundle_root)
             LOGGER.info(f"Removed existing bundle cache directory '{self.bundle_root}'.")
         else:
             LOGGER.info(f"No existing bundle cache directory '{self.bundle_root}' to remove.")
-
-    async def generate(self, skip: set[GeneratorType] | None = None) -> Path:
+        self.__fsd.clear_cache()
+        self.__res_file_index.schema_cache.clear()
+
+    async def generate(
+        self,
+        skip: set[GeneratorType] | None = None,
+        rebuild: bool = False,
+        profile: bool = False,
+        resume: bool = False,
+    ) -> Path:
         if skip is None:
             skip = set()
 
+        profiler = BuildProfiler(self.bundle_root, trace_memory=profile)
+
         self._create_metadata_descriptor()
         self._create_esi_config()
         self._create_links_config()
 
-        dataset = (self.bundle_root, self.__fsd, self.__res_file_index, self.__metadata.metadata)
+        journal = BuildJournal(self.__bundle_cache / "build-journal.json", resume=resume)
+        runner = CollectorRunner(
+            self.bundle_root,
+            self._fingerprints(),
+            journal,
+            profiler,
+            rebuild=rebuild,
+            fsd=self.__fsd,
+        )
 
-        if "image" not in skip:
-            await ImageGenerator(*dataset).load()
-        else:
-            LOGGER.info("Skipping image generation as per configuration.")
+        generators = self._generators(skip, runner)
+        scheduler = StageScheduler()
+        for name, generator in generators.items():
+            # Keep each FSD document in memory only until its last collector is done.
+            for collector in generator.collectors:
+                self.__fsd.retain(collector.inputs)
+            scheduler.add(
+                Stage(
+                    name=name,
+                    run=functools.partial(self._run_stage, profiler, name, generator),
+                    inputs=generator.inputs,
+                    outputs=generator.outputs,
+                )
+            )
 
-        if "localization" not in skip:
-            await LocalizationGenerator(*dataset).load()
-        else:
-            LOGGER.info("Skipping localization generation as per configuration.")
+        planner = DownloadPlanner(self.__res_file_index, runner)
+        with profiler.span("plan-downloads", "stage"):
+            plan = await asyncio.to_thread(
+                planner.collect, (c for g in generators.values() for c in g.collectors)
+            )
 
-        if "static" not in skip:
-            await StaticDataGenerator(*dataset).load()
-        else:
-            LOGGER.info("Skipping static data generation as per configuration.")
+        # Only the resources of this build are verified, before the cached ones are relied on.
+        with profiler.span("verify-cache", "stage"):
+            await asyncio.to_thread(self.verify_cache, plan.resources)
+        await asyncio.to_thread(planner.schedule, plan)
 
-        if "universe" not in skip:
-            await UniverseGenerator(*dataset).load()
-        else:
-            LOGGER.info("Skipping universe data generation as per configuration.")
-
-        return self._package_bundle()
-
-    def _load_resources(self):
-        self.__fsd = Fsd(self.workspace_root / "fsd")
-        with open(self.workspace_root / "resfileindex.txt", "r", encoding="utf-8") as f:
-            rdr = csv.reader(f)
-            raw_res_file_index = list(rdr)
-            self.__res_file_index = ResourceTree(
-                url_formatter=self.__resource_url_formatter,
-                cache_dir=self.__bundle_cache / "index-cache" / "resources",
-                index=raw_res_file_index,
+        # Parse the FSD documents of later stages while the first ones download.
+        self.__fsd.preload(plan.fsd)
+
+        monitor = self.__sessions.monitor
+        for el in plan.downloads:
+            monitor.plan(plan.groups[el.res_id], el.size)
+
+        async with self.__sessions:
+            # Collectors requesting a planned resource share its transfer.
+            downloads = asyncio.create_task(
+                self.__res_file_index.download_all(plan.downloads, plan.groups)
             )
+            progress = asyncio.create_task(monitor.run())
+            try:
+                await scheduler.run()
+                failed = await downloads
+            finally:
+                for task in (downloads, progress):
+                    if not task.done():
+                        task.cancel()
+                        with contextlib.suppress(asyncio.CancelledError):
+                            await task
+            monitor.log_progress()
+        if failed:
+            LOGGER.warning(f"{failed} planned downloads failed.")
+
+        bundle_path = self._package_bundle()
+        journal.finish()
+
+        if profile:
+            profiler.write_report(
+                self.__bundle_cache / "profile.json",
+                workspace=self.workspace_root.name,
+                server=self.server_id,
+                downloads=self.__sessions.report(),
+                transfers=monitor.report(),
+                plan=plan.report(),
+            )
+
+        return bundle_path
+
+    def plan(self, skip: set[GeneratorType] | None = None, rebuild: bool = False) -> DownloadPlan:
+        """Plan the downloads of a build without building or downloading anything."""
+        runner = CollectorRunner(
+            self.bundle_root,
+            self._fingerprints(),
+            None,
+            BuildProfiler(self.bundle_root),
+            rebuild=rebuild,
+        )
+        generators = self._generators(skip or set(), runner)
+        planner = DownloadPlanner(self.__res_file_index, runner)
+        return planner.plan(c for g in generators.values() for c in g.collectors)
+
+    def _fingerprints(self) -> FingerprintStore:
+        return FingerprintStore(
+            self.__bundle_cache / "fingerprints.json",
+            fsd=self.__fsd,
+            index=self.__res_file_index,
+            resfileindex=self.workspace_root / "resfileindex.txt",
+            extra={"image-service": json.dumps(self.__metadata.metadata.image_service)},
+        )
+
+    def _generators(
+        self, skip: set[GeneratorType], runner: CollectorRunner
+    ) -> dict[GeneratorType, Generator]:
+        dataset = (
+            self.bundle_root,
+            self.__fsd,
+            self.__res_file_index,
+            self.__metadata.metadata,
+            runner,
+            self.__sessions,
+        )
+
+        generator_types: dict[GeneratorType, type[Generator]] = {
+            "image": ImageGenerator,
+            "localization": LocalizationGenerator,
+            "static": StaticDataGenerator,
+            "universe": UniverseGenerator,
+        }
+
+        generators = {}
+        for name, generator_type in generator_types.items():
+            if name in skip:
+                LOGGER.info(f"Skipping {name} generation as per configuration.")
+                continue
+            generators[name] = generator_type(*dataset)
+        return generators
+
+    @staticmethod
+    async def _run_stage(profiler: BuildProfiler, name: GeneratorType, generator: Generator):
+        with profiler.span(name, "stage"), transfer_group(name):
+            await generator.load()
+
+    def _load_resources(self, client_cache: Path | None):
+        self.__fsd = Fsd(self.workspace_root / "fsd", self.__bundle_cache / "fsd-cache")
+        self.__store = ObjectStore(BUNDLE_OBJECT_STORE)
+        self.__res_file_index = ResourceTree(
+            url_formatter=self.__resource_url_formatter,
+            cache_dir=self.__bundle_cache / "index-cache" / "resources",
+            index=ResourceIndex(
+                self.workspace_root / "resfileindex.txt",
+                self.__bundle_cache / "index-cache" / "resfileindex.bin",
+            ),
+            store=self.__store,
+            sessions=self.__sessions,
+            client_cache=client_cache,
+            schema_cache=SchemaResourceCache(self.__bundle_cache / "schema-cache"),
+        )
 
     def _create_metadata_descriptor(self):
         with open(self.bundle_root / "bundle.descriptor", "w+", encoding="utf-8") as f:
@@ -367,14 +518,28 @@ class BundleGenerator:
         return bundle_zip_path
 
 
+from data.bundle_generate.cache_verify import CacheVerifier  # noqa: E402
+from data.bundle_generate.fingerprint import FingerprintStore  # noqa: E402
 from data.bundle_generate.image import ImageGenerator  # noqa: E402
+from data.bundle_generate.journal import BuildJournal  # noqa: E402
 from data.bundle_generate.localization import LocalizationGenerator  # noqa: E402
 from data.bundle_generate.log import LOGGER  # noqa: E402
+from data.bundle_generate.object_store import ObjectStore  # noqa: E402
 from data.bundle_generate.paths import BUNDLE_CACHE_ROOT  # noqa: E402
 from data.bundle_generate.paths import BUNDLE_ESI_KEY_LIST  # noqa: E402
 from data.bundle_generate.paths import BUNDLE_LINKS_LIST  # noqa: E402
+from data.bundle_generate.paths import BUNDLE_OBJECT_STORE  # noqa: E402
 from data.bundle_generate.paths import BUNDLE_OUTPUT_ROOT  # noqa: E402
+from data.bundle_generate.pipeline import CollectorRunner  # noqa: E402
+from data.bundle_generate.planner import DownloadPlanner  # noqa: E402
+from data.bundle_generate.profiling import BuildProfiler  # noqa: E402
+from data.bundle_generate.progress import transfer_group  # noqa: E402
+from data.bundle_generate.resource_index import ResourceIndex  # noqa: E402
 from data.bundle_generate.resources import Fsd  # noqa: E402
 from data.bundle_generate.resources import ResourceTree  # noqa: E402
+from data.bundle_generate.scheduler import Stage  # noqa: E402
+from data.bundle_generate.scheduler import StageScheduler  # noqa: E402
+from data.bundle_generate.schema_resource import SchemaResourceCache  # noqa: E402
+from data.bundle_generate.sessions import SessionManager  # noqa: E402
 from data.bundle_generate.static import StaticDataGenerator  # noqa: E402
 from data.bundle_generate.universe import UniverseGenerator  # noqa: E402
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from data.bundle_generate.log import LOGGER
+from data.bundle_generate.object_store import file_md5
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+    from data.bundle_generate.object_store import ObjectStore
+    from data.bundle_generate.resources import ResourceTree
+
+
+# Bump this to discard every recorded verification.
+VERIFY_VERSION = 1
+
+
+@dataclass
+class VerifyResult:
+    checked: int = 0
+    hashed: int = 0
+    removed: int = 0
+
+
+class CacheVerifier:
+    """Check cached resources against their resfileindex checksums.
+
+    Both the workspace cache path of a resource and its object in the shared
+    store are checked, a file linked to both is hashed once. Files whose
+    content does not match are removed, so the next build downloads them again.
+
+    The md5 of every hashed file is recorded by (size, mtime) in a sidecar
+    file, later runs only rehash files that changed since. Files are hashed
+    in a thread pool, `hashlib` releases the GIL while hashing.
+    """
+
+    __path: Path
+    __store: ObjectStore
+    __jobs: int
+    __files: dict[str, tuple[int, int, str]]
+
+    def __init__(self, path: Path, store: ObjectStore, jobs: int | None = None) -> None:
+        self.__path = path
+        self.__store = store
+        self.__jobs = jobs or os.cpu_count() or 1
+
+        self.__files = {}
+        if self.__path.exists():
+            try:
+                with open(self.__path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == VERIFY_VERSION:
+                    self.__files = {k: tuple(v) for k, v in data["files"].items()}
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                LOGGER.warning(f"Ignoring unreadable verification file '{self.__path}': {e}")
+
+    def verify(self, resources: Iterable[ResourceTree._FileNode]) -> VerifyResult:
+        result = VerifyResult()
+
+        # Hard links share an inode, group them so each file is hashed once.
+        groups: dict[tuple[int, int], tuple[os.stat_result, list[tuple[str, str]]]] = {}
+        for el in resources:
+            if not el.checksum:
+                continue
+            for path in (el.file_path, self.__store.object_path(el.checksum)):
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                group = groups.setdefault((stat.st_dev, stat.st_ino), (stat, []))
+                if all(key != os.fspath(path) for key, _ in group[1]):
+                    group[1].append((os.fspath(path), el.checksum))
+                    result.checked += 1
+
+        digests: dict[tuple[int, int], str | None] = {}
+        pending = []
+        for inode, (stat, paths) in groups.items():
+            digest = next(
+                (d for path, _ in paths if (d := self._recorded(path, stat)) is not None), None
+            )
+            if digest is None:
+                pending.append(inode)
+            else:
+                digests[inode] = digest
+
+        if pending:
+            LOGGER.info(f"Hashing {len(pending)} cached resources with {self.__jobs} threads...")
+            with ThreadPoolExecutor(max_workers=self.__jobs) as pool:
+                hashed = pool.map(self._hash, (groups[inode][1][0][0] for inode in pending))
+                for inode, digest in zip(pending, hashed, strict=True):
+                    digests[inode] = digest
+            result.hashed = len(pending)
+
+        for inode, (stat, paths) in groups.items():
+            digest = digests[inode]
+            if digest is None:
+                continue
+            for path, checksum in paths:
+                if digest == checksum:
+                    self.__files[path] = (stat.st_size, stat.st_mtime_ns, digest)
+                    continue
+
+                LOGGER.warning(
+                    f"Removing cached file '{path}': expected checksum {checksum}, got {digest}."
+                )
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(path)
+                self.__files.pop(path, None)
+                result.removed += 1
+
+        # Forget files that were removed since they were last verified.
+        self.__files = {
+            path: record for path, record in self.__files.items() if os.path.exists(path)
+        }
+        self._save()
+
+        LOGGER.info(
+            f"Verified {result.checked} cached files: hashed {result.hashed}, "
+            f"removed {result.removed}."
+        )
+        return result
+
+    def _recorded(self, path: str, stat: os.stat_result) -> str | None:
+        record = self.__files.get(path)
+        if record is None or record[0] != stat.st_size or record[1] != stat.st_mtime_ns:
+            return None
+        return record[2]
+
+    @staticmethod
+    def _hash(path: str) -> str | None:
+        try:
+            return file_md5(path)
+        except OSError as e:
+            LOGGER.warning(f"Unable to verify cached file '{path}': {e}")
+            return None
+
+    def _save(self) -> None:
+        self.__path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.__path.with_name(f"{self.__path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": VERIFY_VERSION, "files": self.__files}, f)
+        os.replace(tmp_path, self.__path)
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import contextlib
+import datetime
+import email.utils
+import time
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import aiohttp
+
+from data.bundle_generate.log import LOGGER
+
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+
+# Statuses a server uses to ask clients to slow down.
+THROTTLE_STATUSES = frozenset({429, 503})
+
+# A response is healthy while its latency stays within this factor of the fastest one seen.
+_LATENCY_TOLERANCE = 3.0
+_LATENCY_SLACK = 0.05
+# Requests failing together are one congestion event, not several.
+_DECREASE_INTERVAL = 1.0
+_DEFAULT_RETRY_AFTER = 1.0
+_MAX_RETRY_AFTER = 300.0
+
+
+@dataclass(frozen=True)
+class ConcurrencyLimits:
+    """Concurrent requests per host: the limit starts at `initial` and never grows beyond `maximum`.
+
+    Large downloads are split into `segments` ranged requests, see `transfer.download`.
+    Downloads are received in chunks of `chunk_size` bytes, which are written
+    to disk by `io_threads` threads, see `transfer.ChunkWriter`.
+    """
+
+    initial: int = 4
+    maximum: int = 32
+    segments: int = 4
+    chunk_size: int = 256 * 1024
+    io_threads: int = 8
+
+
+def _retry_after(response: aiohttp.ClientResponse) -> float:
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return _DEFAULT_RETRY_AFTER
+
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return _DEFAULT_RETRY_AFTER
+        delay = (retry_at - datetime.datetime.now(datetime.UTC)).total_seconds()
+
+    return min(max(delay, 0.0), _MAX_RETRY_AFTER)
+
+
+class HostRequest:
+    """A request holding one of a host's slots, see `HostLimiter.request`."""
+
+    __slots__ = ("failed", "latency", "start", "status")
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.latency: float | None = None
+        self.status: int | None = None
+        self.failed = False
+
+
+class HostLimiter:
+    """Additive-increase, multiplicative-decrease limit of concurrent requests to one host.
+
+    The limit grows by one after a full window of healthy responses, and is
+    halved on throttling, server errors and connection errors. A throttled
+    response also pauses the host for its `Retry-After` delay. Slots are
+    granted in the order they were requested.
+    """
+
+    __host: str
+    __limits: ConcurrencyLimits
+
+    __limit: int
+    __in_flight: int
+    __successes: int
+    __min_latency: float | None
+    __resume_at: float
+    __last_decrease: float
+    __waiters: collections.deque[asyncio.Future[None]]
+
+    __peak: int
+    __requests: int
+    __throttled: int
+    __errors: int
+    __bytes: int
+    __busy_time: float
+    __busy_since: float
+
+    def __init__(self, host: str, limits: ConcurrencyLimits) -> None:
+        self.__host = host
+        self.__limits = limits
+
+        self.__limit = limits.initial
+        self.__in_flight = 0
+        self.__successes = 0
+        self.__min_latency = None
+        self.__resume_at = 0.0
+        self.__last_decrease = 0.0
+        self.__waiters = collections.deque()
+
+        self.__peak = 0
+        self.__requests = 0
+        self.__throttled = 0
+        self.__errors = 0
+        self.__bytes = 0
+        self.__busy_time = 0.0
+        self.__busy_since = 0.0
+
+    @property
+    def limit(self) -> int:
+        return self.__limit
+
+    @contextlib.asynccontextmanager
+    async def request(self) -> AsyncIterator[HostRequest]:
+        """Hold a slot for the enclosed request; call `observe` once its response arrives."""
+        await self._acquire()
+        request = HostRequest()
+        try:
+            yield request
+        except BaseException as e:
+            request.failed = True
+            if isinstance(e, aiohttp.ClientError | TimeoutError) and not isinstance(
+                e, aiohttp.ClientResponseError
+            ):
+                self.__errors += 1
+                self._decrease()
+            raise
+        finally:
+            self._finish(request)
+            self._release()
+
+    def observe(self, request: HostRequest, response: aiohttp.ClientResponse) -> None:
+        request.latency = time.perf_counter() - request.start
+        request.status = response.status
+        if response.status in THROTTLE_STATUSES:
+            self.__throttled += 1
+            delay = _retry_after(response)
+            self.__resume_at = max(self.__resume_at, time.monotonic() + delay)
+            LOGGER.warning(
+                f"Host '{self.__host}' responded {response.status}, pausing for {delay:.1f}s."
+            )
+            self._decrease()
+
+    def received(self, size: int) -> None:
+        """Account `size` bytes of response content received from the host."""
+        self.__bytes += size
+
+    def report(self) -> dict:
+        """Request counts and throughput of the host.
+
+        `busy_time` is the time with at least one request in flight, and
+        `throughput` the bytes received per second of it.
+        """
+        busy_time = self.__busy_time
+        if self.__in_flight:
+            busy_time += time.perf_counter() - self.__busy_since
+        return {
+            "host": self.__host,
+            "concurrency": self.__limit,
+            "peak_in_flight": self.__peak,
+            "requests": self.__requests,
+            "throttled": self.__throttled,
+            "errors": self.__errors,
+            "bytes": self.__bytes,
+            "busy_time": busy_time,
+            "throughput": self.__bytes / busy_time if busy_time else 0.0,
+        }
+
+    async def _acquire(self) -> None:
+        await self._pause()
+
+        # Queue behind earlier callers, a freed slot is handed to the longest waiting one.
+        if self.__in_flight < self.__limit and not self.__waiters:
+            self._take()
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.__waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                with contextlib.suppress(ValueError):
+                    self.__waiters.remove(waiter)
+            else:
+                # The slot was handed over already, pass it on.
+                self._release()
+            raise
+
+        try:
+            # The host may have been paused while waiting.
+            await self._pause()
+        except asyncio.CancelledError:
+            self._release()
+            raise
+
+    async def _pause(self) -> None:
+        while (delay := self.__resume_at - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    def _take(self) -> None:
+        if not self.__in_flight:
+            self.__busy_since = time.perf_counter()
+        self.__in_flight += 1
+        self.__requests += 1
+        self.__peak = max(self.__peak, self.__in_flight)
+
+    def _release(self) -> None:
+        self.__in_flight -= 1
+        if not self.__in_flight:
+            self.__busy_time += time.perf_counter() - self.__busy_since
+        self._wake()
+
+    def _wake(self) -> None:
+        while self.__in_flight < self.__limit and self.__waiters:
+            waiter = self.__waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._take()
+
+    def _finish(self, request: HostRequest) -> None:
+        if request.status is None or request.status in THROTTLE_STATUSES:
+            return
+        if request.status >= 500:
+            self.__errors += 1
+            self._decrease()
+            return
+        if request.failed or request.latency is None:
+            return
+
+        if self.__min_latency is None or request.latency < self.__min_latency:
+            self.__min_latency = request.latency
+        if request.latency > self.__min_latency * _LATENCY_TOLERANCE + _LATENCY_SLACK:
+            self.__successes = 0
+            return
+
+        self.__successes += 1
+        if self.__successes >= self.__limit and self.__limit < self.__limits.maximum:
+            self.__limit += 1
+            self.__successes = 0
+            self._wake()
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self.__last_decrease < _DECREASE_INTERVAL:
+            return
+
+        self.__last_decrease = now
+        self.__successes = 0
+        self.__limit = max(1, self.__limit // 2)
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import threading
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from data.bundle_generate.log import LOGGER
+from data.bundle_generate.object_store import file_md5
+from data.bundle_generate.paths import DATA_ROOT
+
+
+if TYPE_CHECKING:
+    from data.bundle_generate.pipeline import Collector
+    from data.bundle_generate.resources import Fsd
+    from data.bundle_generate.resources import ResourceTree
+
+
+# Bump this to invalidate every recorded fingerprint, e.g. when the bundle layout changes.
+FINGERPRINT_VERSION = 1
+
+RESFILEINDEX_INPUT = "resfileindex"
+
+# Sources shaping the outputs of every collector besides its own package, relative to
+# the data folder. Folders stand for the Python files below them.
+SHARED_SOURCES = (
+    "bundle_generate/consts.py",
+    "bundle_generate/outputs.py",
+    "bundle_generate/schema_resource.py",
+    "bundle_generate/types.py",
+    "schema.proto",
+    "schema_pb2.py",
+    "schema_loader",
+)
+
+
+class FingerprintStore:
+    """Persistent record of the inputs each collector was last built from.
+
+    A fingerprint covers the sources of the collector's package and the
+    `SHARED_SOURCES`, its FSD files, the resfileindex checksums of its
+    resources and any extra configuration keys.
+    File hashes are memoized by (size, mtime) so unchanged FSD files are not
+    rehashed on every run.
+    """
+
+    __path: Path
+    __fsd: Fsd
+    __index: ResourceTree
+    __resfileindex: Path
+    __extra: dict[str, str]
+
+    __collectors: dict[str, str]
+    __files: dict[str, tuple[int, int, str]]
+    __shared_digest: str | None
+    __lock: threading.Lock
+
+    def __init__(
+        self,
+        path: Path,
+        fsd: Fsd,
+        index: ResourceTree,
+        resfileindex: Path,
+        extra: dict[str, str] | None = None,
+    ) -> None:
+        self.__path = path
+        self.__fsd = fsd
+        self.__index = index
+        self.__resfileindex = resfileindex
+        self.__extra = extra or {}
+        self.__lock = threading.Lock()
+
+        self.__collectors = {}
+        self.__files = {}
+        self.__shared_digest = None
+        if self.__path.exists():
+            try:
+                with open(self.__path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == FINGERPRINT_VERSION:
+                    self.__collectors = data["collectors"]
+                    self.__files = {k: tuple(v) for k, v in data["files"].items()}
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                LOGGER.warning(f"Ignoring unreadable fingerprint file '{self.__path}': {e}")
+
+    def compute(self, collector: Collector) -> str:
+        """Compute the current fingerprint of a collector's inputs."""
+        digest = hashlib.sha256()
+        digest.update(f"{FINGERPRINT_VERSION}\0".encode())
+        digest.update(self._source_digest(collector).encode())
+
+        for key in sorted(collector.inputs):
+            digest.update(f"\0{key}\0{self._input_digest(key)}".encode())
+
+        return digest.hexdigest()
+
+    def matches(self, name: str, fingerprint: str) -> bool:
+        with self.__lock:
+            return self.__collectors.get(name) == fingerprint
+
+    def record(self, name: str, fingerprint: str) -> None:
+        with self.__lock:
+            self.__collectors[name] = fingerprint
+            self._save()
+
+    def forget(self, name: str) -> None:
+        with self.__lock:
+            if self.__collectors.pop(name, None) is not None:
+                self._save()
+
+    def _save(self) -> None:
+        tmp_path = self.__path.with_name(f"{self.__path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": FINGERPRINT_VERSION,
+                    "collectors": self.__collectors,
+                    "files": self.__files,
+                },
+                f,
+                indent=2,
+            )
+        os.replace(tmp_path, self.__path)
+
+    def _source_digest(self, collector: Collector) -> str:
+        module = sys.modules.get(collector.func.__module__)
+        source = getattr(module, "__file__", None)
+        if source is None:
+            return collector.func.__qualname__
+
+        # The collector's generator package also holds its models and the helpers it uses.
+        digest = hashlib.sha256()
+        for path in sorted(Path(source).parent.glob("*.py")):
+            digest.update(f"{path.name}={self._file_digest(path)}\0".encode())
+        digest.update(self._shared_source_digest().encode())
+        return digest.hexdigest()
+
+    def _shared_source_digest(self) -> str:
+        with self.__lock:
+            if self.__shared_digest is not None:
+                return self.__shared_digest
+
+        digest = hashlib.sha256()
+        for source in SHARED_SOURCES:
+            path = DATA_ROOT / source
+            files = sorted(path.rglob("*.py")) if path.is_dir() else [path]
+            if not files or not files[0].exists():
+                digest.update(f"{source}=missing\0".encode())
+                continue
+            for file in files:
+                name = file.relative_to(DATA_ROOT).as_posix()
+                digest.update(f"{name}={self._file_digest(file)}\0".encode())
+
+        with self.__lock:
+            self.__shared_digest = digest.hexdigest()
+            return self.__shared_digest
+
+    def _input_digest(self, key: str) -> str:
+        if key.startswith("fsd:"):
+            fsd_path = self.__fsd.get_fsd_path(key.removeprefix("fsd:"))
+            return self._file_digest(fsd_path) if fsd_path.exists() else "missing"
+
+        if key.startswith("res:"):
+            resources = self.__index.get_resources(key)
+            if not resources:
+                return "missing"
+            return ",".join(sorted(f"{r.res_id}={r.checksum}" for r in resources))
+
+        if key == RESFILEINDEX_INPUT:
+            return self._file_digest(self.__resfileindex)
+
+        return self.__extra.get(key, "")
+
+    def _file_digest(self, path: Path | str) -> str:
+        key = os.fspath(path)
+        stat = os.stat(key)
+
+        with self.__lock:
+            cached = self.__files.get(key)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+        checksum = file_md5(key)
+        with self.__lock:
+            self.__files[key] = (stat.st_size, stat.st_mtime_ns, checksum)
+        return checksum
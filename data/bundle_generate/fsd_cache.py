@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import marshal
+import mmap
+import os
+import shutil
+import struct
+import uuid
+
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import BinaryIO
+
+from data.bundle_generate.log import LOGGER
+from data.bundle_generate.object_store import file_md5
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from pathlib import Path
+
+
+# Bump this to invalidate every cached FSD document, e.g. when the file layout changes.
+FSD_CACHE_VERSION = 1
+
+_MAGIC = b"EMTFSD\0\0"
+# Magic, cache version, marshal version, source size, source mtime and source md5.
+_HEADER = struct.Struct("<8sIIqq16s")
+_MTIME_OFFSET = 24
+# Records are stored in length-prefixed batches, so a document can be streamed.
+_BATCH_SIZE = 1024
+_BATCH_LENGTH = struct.Struct("<Q")
+
+
+class FsdCache:
+    """Pre-parsed FSD documents, stored in `cache_dir` in `marshal` format.
+
+    Every cached document records the size, mtime and md5 of the JSON file it
+    was parsed from, and is only used while they match. A source file whose
+    mtime changed is hashed again, so touching it does not discard the cache.
+    Cached documents are memory-mapped when read, and their records are
+    stored in batches, so they can be streamed as well as loaded at once.
+    """
+
+    __cache_dir: Path
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.__cache_dir = cache_dir
+
+    def clear(self) -> None:
+        if self.__cache_dir.exists():
+            shutil.rmtree(self.__cache_dir)
+            LOGGER.info(f"Removed FSD cache directory '{self.__cache_dir}'.")
+
+    def load(self, name: str, source: Path) -> dict | None:
+        """The cached document `name` parsed from `source`, or None if there is none."""
+        records = self.records(name, source)
+        if records is None:
+            return None
+        return dict(records)
+
+    def records(self, name: str, source: Path) -> Iterator[tuple[str, Any]] | None:
+        """The records of the cached document, or None if there is none."""
+        if not self.is_current(name, source):
+            return None
+        return self._read(self._path(name))
+
+    def is_current(self, name: str, source: Path) -> bool:
+        """Whether the document `name` is cached, parsed from the current `source`."""
+        path = self._path(name)
+        try:
+            with open(path, "rb") as f:
+                header = _HEADER.unpack(f.read(_HEADER.size))
+            return self._check(path, header, source)
+        except (OSError, struct.error):
+            return False
+
+    def build(self, name: str, source: Path) -> None:
+        """Parse `source` and cache it as the document `name`.
+
+        Only the cache is written, the document is not returned, so this can
+        run in a worker process, see `Fsd.preload`.
+        """
+        with open(source, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            self.store(name, source, data.items())
+
+    def store(self, name: str, source: Path, records: Iterable[tuple[str, Any]]) -> None:
+        writer = self.writer(name, source)
+        try:
+            for key, record in records:
+                writer.add(key, record)
+            writer.commit()
+        finally:
+            writer.abort()
+
+    def writer(self, name: str, source: Path) -> FsdCacheWriter:
+        """A writer caching the document `name` parsed from `source`, record by record."""
+        return FsdCacheWriter(self._path(name), source)
+
+    def _path(self, name: str) -> Path:
+        return self.__cache_dir / f"{name}.bin"
+
+    @staticmethod
+    def _check(path: Path, header: tuple, source: Path) -> bool:
+        magic, version, marshal_version, size, mtime_ns, md5 = header
+        if magic != _MAGIC or version != FSD_CACHE_VERSION or marshal_version != marshal.version:
+            return False
+
+        stat = source.stat()
+        if stat.st_size != size:
+            return False
+        if stat.st_mtime_ns == mtime_ns:
+            return True
+
+        if bytes.fromhex(file_md5(source)) != md5:
+            return False
+        # The source was only touched, remember its new mtime so it is not hashed again.
+        with contextlib.suppress(OSError), open(path, "r+b") as f:
+            f.seek(_MTIME_OFFSET)
+            f.write(struct.pack("<q", stat.st_mtime_ns))
+        return True
+
+    @staticmethod
+    def _read(path: Path) -> Iterator[tuple[str, Any]]:
+        with (
+            open(path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+            memoryview(mm) as view,
+        ):
+            pos = _HEADER.size
+            while pos < len(view):
+                (length,) = _BATCH_LENGTH.unpack_from(view, pos)
+                pos += _BATCH_LENGTH.size
+                batch = marshal.loads(view[pos : pos + length])
+                pos += length
+                yield from batch
+
+
+class FsdCacheWriter:
+    """A document being cached, see `FsdCache.writer`.
+
+    The document is only cached once it is committed. Failing to write it is
+    logged and stops caching it, but never fails the caller.
+    """
+
+    __path: Path
+    __source: Path
+    __tmp_path: Path
+    __file: BinaryIO | None
+    __batch: list[tuple[str, Any]]
+
+    def __init__(self, path: Path, source: Path) -> None:
+        self.__path = path
+        self.__source = source
+        self.__tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        self.__file = None
+        self.__batch = []
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.__file = open(self.__tmp_path, "wb")  # noqa: SIM115
+            # The header is written on commit, so an incomplete file is never taken for a cache.
+            self.__file.write(b"\0" * _HEADER.size)
+        except OSError as e:
+            self._fail(e)
+
+    def add(self, key: str, record: Any) -> None:
+        if self.__file is None:
+            return
+        self.__batch.append((key, record))
+        if len(self.__batch) >= _BATCH_SIZE:
+            self._flush()
+
+    def commit(self) -> None:
+        if self.__file is None:
+            return
+        self._flush()
+        try:
+            stat = self.__source.stat()
+            md5 = bytes.fromhex(file_md5(self.__source))
+            self.__file.seek(0)
+            self.__file.write(
+                _HEADER.pack(
+                    _MAGIC,
+                    FSD_CACHE_VERSION,
+                    marshal.version,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    md5,
+                )
+            )
+            self.__file.close()
+            self.__file = None
+            os.replace(self.__tmp_path, self.__path)
+        except OSError as e:
+            self._fail(e)
+            return
+        LOGGER.debug(f"Cached FSD data from '{self.__source}' in '{self.__path}'.")
+
+    def abort(self) -> None:
+        """Discard the document, unless it was committed."""
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+        self.__tmp_path.unlink(missing_ok=True)
+
+    def _flush(self) -> None:
+        if not self.__batch:
+            return
+        data = marshal.dumps(self.__batch)
+        try:
+            self.__file.write(_BATCH_LENGTH.pack(len(data)))
+            self.__file.write(data)
+        except OSError as e:
+            self._fail(e)
+        self.__batch = []
+
+    def _fail(self, e: OSError) -> None:
+        LOGGER.warning(f"Unable to cache FSD data from '{self.__source}': {e}")
+        self.abort()
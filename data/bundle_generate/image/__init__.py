@@ -1,19 +1,29 @@
 from __future__ import annotations
 
+import functools
+
 from typing import TYPE_CHECKING
 
+from data.bundle_generate.consts import SKIN_ICONS_RES
+from data.bundle_generate.fingerprint import RESFILEINDEX_INPUT
 from data.bundle_generate.image import faction_icons
 from data.bundle_generate.image import graphics
 from data.bundle_generate.image import icons
 from data.bundle_generate.image import skin_material_icons
+from data.bundle_generate.image_service import ImageServiceClient
+from data.bundle_generate.paths import BUNDLE_IMAGE_SERVICE_CACHE
+from data.bundle_generate.pipeline import Collector
+from data.bundle_generate.pipeline import stage_keys
 
 
 if TYPE_CHECKING:
     from pathlib import Path
 
     from data.bundle_generate import Metadata
+    from data.bundle_generate.pipeline import CollectorRunner
     from data.bundle_generate.resources import Fsd
     from data.bundle_generate.resources import ResourceTree
+    from data.bundle_generate.sessions import SessionManager
 
 
 class ImageGenerator:
@@ -21,21 +31,86 @@ class ImageGenerator:
     __fsd: Fsd
     __index: ResourceTree
     __metadata: Metadata
+    __runner: CollectorRunner
+    __sessions: SessionManager
+    __images: ImageServiceClient
+
+    __collectors: list[Collector]
 
     def __init__(
-        self, bundle_root: Path, fsd: Fsd, index: ResourceTree, metadata: Metadata
+        self,
+        bundle_root: Path,
+        fsd: Fsd,
+        index: ResourceTree,
+        metadata: Metadata,
+        runner: CollectorRunner,
+        sessions: SessionManager,
     ) -> None:
         self.__root = bundle_root / "images"
         self.__fsd = fsd
         self.__index = index
         self.__metadata = metadata
+        self.__runner = runner
+        self.__sessions = sessions
+        self.__images = ImageServiceClient(BUNDLE_IMAGE_SERVICE_CACHE, self.__sessions)
 
         self.__root.mkdir(parents=True, exist_ok=True)
 
+        self.__collectors = [
+            Collector(
+                name="image.graphics",
+                func=graphics.collect_graphics,
+                args=(self.__root, self.__fsd, self.__index),
+                inputs=frozenset({"fsd:graphicids", RESFILEINDEX_INPUT}),
+                outputs=frozenset({"images/graphics"}),
+                resources=functools.partial(
+                    graphics.plan_graphics, self.__root, self.__fsd, self.__index
+                ),
+            ),
+            Collector(
+                name="image.icons",
+                func=icons.collect_icons,
+                args=(self.__root, self.__fsd, self.__index),
+                inputs=frozenset({"fsd:iconids", RESFILEINDEX_INPUT}),
+                outputs=frozenset({"images/icons"}),
+                resources=functools.partial(
+                    icons.plan_icons, self.__root, self.__fsd, self.__index
+                ),
+            ),
+            Collector(
+                name="image.skin_material_icons",
+                func=skin_material_icons.collect_skin_material_icons,
+                args=(self.__root, self.__fsd, self.__index),
+                inputs=frozenset({SKIN_ICONS_RES}),
+                outputs=frozenset({"images/skins/materials"}),
+            ),
+            # Faction icons come from the image service, whose content we cannot fingerprint.
+            Collector(
+                name="image.faction_icons",
+                func=faction_icons.collect_faction_icons,
+                args=(self.__root, self.__fsd, self.__index, self.__metadata, self.__images),
+                inputs=frozenset({"fsd:factions", RESFILEINDEX_INPUT, "image-service"}),
+                outputs=frozenset({"images/factions"}),
+                incremental=False,
+                resources=functools.partial(
+                    faction_icons.plan_faction_icons, self.__root, self.__fsd, self.__index
+                ),
+            ),
+        ]
+
+    @property
+    def collectors(self) -> list[Collector]:
+        return self.__collectors
+
+    @property
+    def inputs(self) -> frozenset[str]:
+        return stage_keys(self.__collectors)[0]
+
+    @property
+    def outputs(self) -> frozenset[str]:
+        return stage_keys(self.__collectors)[1]
+
     async def load(self):
-        await graphics.collect_graphics(self.__root, self.__fsd, self.__index)
-        await icons.collect_icons(self.__root, self.__fsd, self.__index)
-        await skin_material_icons.collect_skin_material_icons(self.__root, self.__fsd, self.__index)
-        await faction_icons.collect_faction_icons(
-            self.__root, self.__fsd, self.__index, self.__metadata
-        )
+        for collector in self.__collectors:
+            await self.__runner.run(collector)
+        self.__images.report_missing()
@@ -7,19 +7,73 @@ from typing import TYPE_CHECKING
 from data.bundle_generate import Metadata
 from data.bundle_generate.consts import FACTION_FLAT_LOGO_RES_PAT
 from data.bundle_generate.image.utils import download_and_copy_icon
-from data.bundle_generate.image.utils import download_and_copy_image
 from data.bundle_generate.log import LOGGER
 
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Iterator
     from pathlib import Path
 
+    from data.bundle_generate.image_service import ImageServiceClient
     from data.bundle_generate.resources import Fsd
+    from data.bundle_generate.resources import ResourcePath
     from data.bundle_generate.resources import ResourceTree
 
 
+def _flat_logos(
+    faction_ids: dict, index: ResourceTree, warn: Callable[[str], None]
+) -> Iterator[tuple[int, str, str, ResourceTree._FileNode]]:
+    """The flat logos of every faction to bundle, with their faction ID, description and name."""
+    for faction_id, faction_data in faction_ids.items():
+        faction_id = int(faction_id)
+
+        if not isinstance(faction_data, dict):
+            warn(f"Invalid faction data for ID {faction_id}: {faction_data}")
+            continue
+
+        for key, description in (
+            ("flatLogo", "flat logo"),
+            ("flatLogoWithName", "flat logo with name"),
+        ):
+            flat_logo = faction_data.get(key)
+            if not flat_logo:
+                warn(f"No {description} for faction ID {faction_id}")
+                continue
+
+            flat_logo_res = FACTION_FLAT_LOGO_RES_PAT.format(flat_logo=flat_logo)
+            icon = index.get_resource(flat_logo_res)
+            if icon is None:
+                warn(
+                    f"Faction {description} resource '{flat_logo_res}' not found for faction ID {faction_id}"
+                )
+                continue
+
+            yield faction_id, description, flat_logo, icon
+
+
+def plan_faction_icons(
+    bundle_image_path: Path, fsd: Fsd, index: ResourceTree
+) -> list[ResourcePath]:
+    """The resources `collect_faction_icons` downloads from the resource index."""
+    faction_ids = fsd.get_fsd("factions")
+    if not faction_ids:
+        return []
+
+    bundle_faction_logos = bundle_image_path / "factions" / "logos"
+    return [
+        icon.res_id
+        for _, _, flat_logo, icon in _flat_logos(faction_ids, index, LOGGER.debug)
+        if not (bundle_faction_logos / f"{flat_logo}.png").exists()
+    ]
+
+
 async def collect_faction_icons(
-    bundle_image_path: Path, fsd: Fsd, index: ResourceTree, metadata: Metadata
+    bundle_image_path: Path,
+    fsd: Fsd,
+    index: ResourceTree,
+    metadata: Metadata,
+    images: ImageServiceClient,
 ):
     """Collect faction icon resources into the bundle image directory."""
 
@@ -39,57 +93,23 @@ async def collect_faction_icons(
 
     download_tasks = []
 
-    for faction_id, faction_data in faction_ids.items():
-        faction_id = int(faction_id)
+    for faction_id, description, flat_logo, icon in _flat_logos(faction_ids, index, LOGGER.warning):
+        target_path = bundle_faction_logos / f"{flat_logo}.png"
+        task = download_and_copy_icon(
+            index, icon.res_id, target_path, f"Faction {faction_id} {description} {flat_logo}"
+        )
+        download_tasks.append(task)
 
+    for faction_id, faction_data in faction_ids.items():
         if not isinstance(faction_data, dict):
-            LOGGER.warning(f"Invalid faction data for ID {faction_id}: {faction_data}")
             continue
 
-        flat_logo = faction_data.get("flatLogo")
-        if flat_logo:
-            flat_logo_res = FACTION_FLAT_LOGO_RES_PAT.format(flat_logo=flat_logo)
-            icon = index.get_resource(flat_logo_res)
-            if icon is None:
-                LOGGER.warning(
-                    f"Faction flat logo resource '{flat_logo_res}' not found for faction ID {faction_id}"
-                )
-            else:
-                target_path = bundle_faction_logos / f"{flat_logo}.png"
-                task = download_and_copy_icon(
-                    index, icon.res_id, target_path, f"Faction {faction_id} flat logo {flat_logo}"
-                )
-                download_tasks.append(task)
-        else:
-            LOGGER.warning(f"No flat logo for faction ID {faction_id}")
-
-        flat_logo_with_name = faction_data.get("flatLogoWithName")
-        if flat_logo_with_name:
-            flat_logo_with_name_res = FACTION_FLAT_LOGO_RES_PAT.format(
-                flat_logo=flat_logo_with_name
-            )
-            icon = index.get_resource(flat_logo_with_name_res)
-            if icon is None:
-                LOGGER.warning(
-                    f"Faction flat logo with name resource '{flat_logo_with_name_res}' not found for faction ID {faction_id}"
-                )
-            else:
-                target_path = bundle_faction_logos / f"{flat_logo_with_name}.png"
-                task = download_and_copy_icon(
-                    index,
-                    icon.res_id,
-                    target_path,
-                    f"Faction {faction_id} flat logo with name {flat_logo_with_name}",
-                )
-                download_tasks.append(task)
-        else:
-            LOGGER.warning(f"No flat logo with name for faction ID {faction_id}")
-
+        faction_id = int(faction_id)
         image_url = metadata.get_image_service(Metadata.ImageServiceType.NPC_FACTION).format(
             factionId=faction_id
         )
         target_path = bundle_faction_icons / f"{faction_id}.png"
-        task = download_and_copy_image(image_url, target_path, f"Faction {faction_id} icon")
+        task = images.fetch(image_url, target_path, f"Faction {faction_id} icon")
         download_tasks.append(task)
 
     if download_tasks:
@@ -9,41 +9,34 @@ from data.bundle_generate.log import LOGGER
 
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Iterator
     from pathlib import Path
 
     from data.bundle_generate.resources import Fsd
+    from data.bundle_generate.resources import ResourcePath
     from data.bundle_generate.resources import ResourceTree
 
 
-async def collect_graphics(bundle_image_path: Path, fsd: Fsd, index: ResourceTree):
-    """Collect graphics resources into the bundle image directory."""
-
-    LOGGER.info("Collecting graphics resources...")
-
-    bundle_graphics = bundle_image_path / "graphics"
-    bundle_graphics.mkdir(parents=True, exist_ok=True)
-
-    graphic_ids = fsd.get_fsd("graphicids")
-    if not graphic_ids:
-        return
-
-    download_tasks = []
-
+def _graphics(
+    graphic_ids: dict, index: ResourceTree, warn: Callable[[str], None]
+) -> Iterator[tuple[int, str, ResourceTree._FileNode]]:
+    """The graphic icons to bundle, with their graphic ID and variant ("", "bp" or "bpc")."""
     for graphic_id, graphic_data in graphic_ids.items():
         graphic_id = int(graphic_id)
 
         if not isinstance(graphic_data, dict):
-            LOGGER.warning(f"Invalid graphic data for ID {graphic_id}: {graphic_data}")
+            warn(f"Invalid graphic data for ID {graphic_id}: {graphic_data}")
             continue
 
         icon_folder = graphic_data.get("iconInfo", {}).get("folder")
         if not icon_folder:
-            LOGGER.warning(f"No icon folder for graphic ID {graphic_id}")
+            warn(f"No icon folder for graphic ID {graphic_id}")
             continue
 
         icons = index.get_resources(icon_folder)
         if icons is None:
-            LOGGER.warning(f"No icons found for graphic ID {graphic_id} in folder '{icon_folder}'")
+            warn(f"No icons found for graphic ID {graphic_id} in folder '{icon_folder}'")
             continue
         found = False
         for icon in icons:
@@ -57,32 +50,55 @@ async def collect_graphics(bundle_image_path: Path, fsd: Fsd, index: ResourceTre
             found = True
 
             if "bpc" in icon.file_name:
-                task = download_and_copy_icon(
-                    index,
-                    icon.res_id,
-                    bundle_graphics / f"{graphic_id}_bpc.png",
-                    f"Graphic {graphic_id} BPC",
-                )
+                yield graphic_id, "bpc", icon
             elif "bp" in icon.file_name:
-                task = download_and_copy_icon(
-                    index,
-                    icon.res_id,
-                    bundle_graphics / f"{graphic_id}_bp.png",
-                    f"Graphic {graphic_id} BP",
-                )
+                yield graphic_id, "bp", icon
             else:
-                task = download_and_copy_icon(
-                    index,
-                    icon.res_id,
-                    bundle_graphics / f"{graphic_id}.png",
-                    f"Graphic {graphic_id}",
-                )
-            download_tasks.append(task)
+                yield graphic_id, "", icon
 
         if not found:
-            LOGGER.warning(
-                f"No suitable icon found for graphic ID {graphic_id} in folder '{icon_folder}'"
-            )
+            warn(f"No suitable icon found for graphic ID {graphic_id} in folder '{icon_folder}'")
+
+
+def _target_name(graphic_id: int, variant: str) -> str:
+    return f"{graphic_id}_{variant}.png" if variant else f"{graphic_id}.png"
+
+
+def plan_graphics(bundle_image_path: Path, fsd: Fsd, index: ResourceTree) -> list[ResourcePath]:
+    """The resources `collect_graphics` downloads."""
+    graphic_ids = fsd.get_fsd("graphicids")
+    if not graphic_ids:
+        return []
+
+    bundle_graphics = bundle_image_path / "graphics"
+    return [
+        icon.res_id
+        for graphic_id, variant, icon in _graphics(graphic_ids, index, LOGGER.debug)
+        if not (bundle_graphics / _target_name(graphic_id, variant)).exists()
+    ]
+
+
+async def collect_graphics(bundle_image_path: Path, fsd: Fsd, index: ResourceTree):
+    """Collect graphics resources into the bundle image directory."""
+
+    LOGGER.info("Collecting graphics resources...")
+
+    bundle_graphics = bundle_image_path / "graphics"
+    bundle_graphics.mkdir(parents=True, exist_ok=True)
+
+    graphic_ids = fsd.get_fsd("graphicids")
+    if not graphic_ids:
+        return
+
+    download_tasks = [
+        download_and_copy_icon(
+            index,
+            icon.res_id,
+            bundle_graphics / _target_name(graphic_id, variant),
+            f"Graphic {graphic_id} {variant.upper()}".rstrip(),
+        )
+        for graphic_id, variant, icon in _graphics(graphic_ids, index, LOGGER.warning)
+    ]
 
     if download_tasks:
         await asyncio.gather(*download_tasks)
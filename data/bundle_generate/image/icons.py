@@ -9,12 +9,50 @@ from data.bundle_generate.log import LOGGER
 
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Iterator
     from pathlib import Path
 
     from data.bundle_generate.resources import Fsd
+    from data.bundle_generate.resources import ResourcePath
     from data.bundle_generate.resources import ResourceTree
 
 
+def _icons(
+    bundle_icons: Path, icon_ids: dict, index: ResourceTree, warn: Callable[[str], None]
+) -> Iterator[tuple[int, Path, ResourceTree._FileNode]]:
+    """The icons to bundle, with their icon ID and target path."""
+    for icon_id, icon_data in icon_ids.items():
+        icon_id = int(icon_id)
+        if not isinstance(icon_data, dict):
+            warn(f"Invalid icon data for ID {icon_id}: {icon_data}")
+            continue
+        icon_file = icon_data.get("iconFile", "").lower()
+        if not icon_file:
+            warn(f"No icon file for icon ID {icon_id}")
+            continue
+        icon = index.get_resource(icon_file)
+        if icon is None:
+            warn(f"Icon file '{icon_file}' not found for icon ID {icon_id}")
+            continue
+        yield icon_id, bundle_icons / f"{icon_id}.png", icon
+
+
+def plan_icons(bundle_image_path: Path, fsd: Fsd, index: ResourceTree) -> list[ResourcePath]:
+    """The resources `collect_icons` downloads."""
+    icon_ids = fsd.get_fsd("iconids")
+    if not icon_ids:
+        return []
+
+    return [
+        icon.res_id
+        for _, target_path, icon in _icons(
+            bundle_image_path / "icons", icon_ids, index, LOGGER.debug
+        )
+        if not target_path.exists()
+    ]
+
+
 async def collect_icons(bundle_image_path: Path, fsd: Fsd, index: ResourceTree):
     """Collect icon resources into the bundle image directory."""
 
@@ -27,25 +65,10 @@ async def collect_icons(bundle_image_path: Path, fsd: Fsd, index: ResourceTree):
     if not icon_ids:
         return
 
-    download_tasks = []
-
-    for icon_id, icon_data in icon_ids.items():
-        icon_id = int(icon_id)
-        if not isinstance(icon_data, dict):
-            LOGGER.warning(f"Invalid icon data for ID {icon_id}: {icon_data}")
-            continue
-        icon_file = icon_data.get("iconFile", "").lower()
-        if not icon_file:
-            LOGGER.warning(f"No icon file for icon ID {icon_id}")
-            continue
-        icon = index.get_resource(icon_file)
-        if icon is None:
-            LOGGER.warning(f"Icon file '{icon_file}' not found for icon ID {icon_id}")
-            continue
-        target_path = bundle_icons / f"{icon_id}.png"
-        download_tasks.append(
-            download_and_copy_icon(index, icon.res_id, target_path, f"Icon {icon_id}")
-        )
+    download_tasks = [
+        download_and_copy_icon(index, icon.res_id, target_path, f"Icon {icon_id}")
+        for icon_id, target_path, icon in _icons(bundle_icons, icon_ids, index, LOGGER.warning)
+    ]
 
     if download_tasks:
         await asyncio.gather(*download_tasks)
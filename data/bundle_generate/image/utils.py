@@ -1,13 +1,12 @@
 from __future__ import annotations
 
-import shutil
+import asyncio
 
 from typing import TYPE_CHECKING
 
-import aiohttp
-
-from data.bundle_generate.async_config import SEMAPHORE
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.object_store import link_or_copy
+from data.bundle_generate.profiling import add_bytes_written
 
 
 if TYPE_CHECKING:
@@ -25,22 +24,7 @@ async def download_and_copy_icon(
         return
 
     downloaded_file = await index.download_resource(res_id)
-    shutil.copyfile(downloaded_file.file_path, target_path)
-    LOGGER.info(f"Copied {description} icon to: {target_path}")
-
-
-async def download_and_copy_image(image_url: str, target_path: Path, description: str):
-    if target_path.exists():
-        LOGGER.debug(f"Image already exists: {target_path}")
-        return
-
-    async with SEMAPHORE, aiohttp.ClientSession() as session, session.get(image_url) as response:
-        if response.status != 200:
-            LOGGER.error(
-                f"Failed to download {description} from {image_url}: HTTP {response.status}"
-            )
-            return
-
-        with open(target_path, "wb") as f:
-            async for chunk in response.content.iter_chunked(8192):
-                f.write(chunk)
+    # Icons are never modified in place, so they can share their data with the cached resource.
+    if await asyncio.to_thread(link_or_copy, downloaded_file.file_path, target_path, True):
+        add_bytes_written(target_path.stat().st_size)
+    LOGGER.info(f"Placed {description} icon at: {target_path}")
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+import typing
+import uuid
+
+from typing import TYPE_CHECKING
+
+import aiohttp
+
+from tenacity import after_log
+from tenacity import retry
+from tenacity import retry_if_exception_type
+from tenacity import stop_after_attempt
+from tenacity import wait_exponential
+
+from data.bundle_generate.concurrency import THROTTLE_STATUSES
+from data.bundle_generate.log import LOGGER
+from data.bundle_generate.object_store import link_or_copy
+from data.bundle_generate.profiling import add_bytes_written
+from data.bundle_generate.transfer import ChunkWriter
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    from data.bundle_generate.sessions import SessionManager
+
+
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=60, sock_connect=15)
+
+
+class ImageServiceError(Exception):
+    """The image service failed to answer a request, which is worth retrying."""
+
+
+class ImageServiceClient:
+    """Fetch images from the image service, cached across builds and workspaces.
+
+    Every response is stored in `cache_dir` with its ETag and Last-Modified
+    headers, and revalidated with a conditional request when it is fetched
+    again, so unchanged images only cost a 304 round-trip. Failed requests are
+    retried with backoff, and a cached image is kept if the service stays
+    unavailable. Images that could not be fetched at all are collected and
+    logged by `report_missing`.
+    """
+
+    __cache_dir: Path
+    __sessions: SessionManager
+    __missing: list[tuple[str, str]]
+
+    def __init__(self, cache_dir: Path, sessions: SessionManager) -> None:
+        self.__cache_dir = cache_dir
+        self.__sessions = sessions
+        self.__missing = []
+
+    @property
+    def missing(self) -> list[tuple[str, str]]:
+        """The description and URL of every image that could not be fetched."""
+        return list(self.__missing)
+
+    async def fetch(self, url: str, target_path: Path, description: str) -> bool:
+        """Place the image at `url` at `target_path`, returning whether it is available."""
+
+        @retry(
+            stop=stop_after_attempt(4),
+            wait=wait_exponential(min=1, max=30),
+            retry=retry_if_exception_type((aiohttp.ClientError, TimeoutError, ImageServiceError)),
+            after=after_log(LOGGER, logging.WARNING),
+            before_sleep=self.__sessions.monitor.retried,
+            reraise=True,
+        )
+        async def revalidate() -> Path | None:
+            return await self._revalidate(url)
+
+        try:
+            with self.__sessions.monitor.transfer():
+                body_path = await revalidate()
+        except (aiohttp.ClientError, TimeoutError, ImageServiceError) as e:
+            body_path, _ = await self._io(self._cached, url)
+            if body_path is None:
+                LOGGER.error(f"Failed to download {description} from {url}: {e}")
+            else:
+                LOGGER.warning(f"Failed to revalidate {description} from {url}, keeping it: {e}")
+
+        if body_path is None:
+            self.__missing.append((description, url))
+            return False
+
+        if await asyncio.to_thread(link_or_copy, body_path, target_path, True):
+            add_bytes_written(target_path.stat().st_size)
+        LOGGER.debug(f"Placed {description} at: {target_path}")
+        return True
+
+    def report_missing(self) -> None:
+        if not self.__missing:
+            return
+
+        LOGGER.warning(f"{len(self.__missing)} images could not be fetched from the image service:")
+        for description, url in self.__missing:
+            LOGGER.warning(f"  {description}: {url}")
+
+    async def _io[T](self, func: Callable[..., T], *args: typing.Any) -> T:
+        """Run a blocking file operation on the I/O thread pool of the sessions."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__sessions.io, func, *args)
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        body_path = self.__cache_dir / key[:2] / key
+        return body_path, body_path.with_suffix(".json")
+
+    def _cached(self, url: str) -> tuple[Path | None, dict | None]:
+        """The cached body of `url` and its validators, if both are intact."""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("url") != url or body_path.stat().st_size != meta.get("size"):
+                return None, None
+        except (OSError, ValueError):
+            return None, None
+        return body_path, meta
+
+    async def _revalidate(self, url: str) -> Path | None:
+        """The cached body of `url`, downloaded again if it changed, or None if it is missing."""
+        body_path, meta = await self._io(self._cached, url)
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        async with self.__sessions.get(url, headers=headers, timeout=REQUEST_TIMEOUT) as resp:
+            if resp.status == 304 and body_path is not None:
+                LOGGER.debug(f"Image '{url}' is unchanged.")
+                return body_path
+            if resp.status in THROTTLE_STATUSES or resp.status >= 500:
+                raise ImageServiceError(f"HTTP {resp.status}")
+            if resp.status != 200:
+                LOGGER.error(f"Image service responded HTTP {resp.status} for '{url}'.")
+                return None
+
+            return await self._store(url, resp)
+
+    async def _store(self, url: str, resp: aiohttp.ClientResponse) -> Path:
+        body_path, meta_path = self._paths(url)
+        await self._io(functools.partial(body_path.parent.mkdir, parents=True, exist_ok=True))
+
+        tmp_path = body_path.with_name(f"{body_path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            async with ChunkWriter(self.__sessions.io, tmp_path) as writer:
+                async for chunk in resp.content.iter_chunked(self.__sessions.limits.chunk_size):
+                    await writer.write(chunk)
+                    self.__sessions.received(url, len(chunk))
+            size = writer.written
+            add_bytes_written(size)
+
+            meta = {
+                "url": url,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "size": size,
+            }
+            await self._io(self._commit, tmp_path, body_path, meta_path, meta)
+        except BaseException:
+            await asyncio.shield(self._io(functools.partial(tmp_path.unlink, missing_ok=True)))
+            raise
+
+        LOGGER.info(f"Downloaded image '{url}' to '{body_path}'")
+        return body_path
+
+    @staticmethod
+    def _commit(tmp_path: Path, body_path: Path, meta_path: Path, meta: dict) -> None:
+        """Move the downloaded body in place, then write its validators next to it."""
+        os.replace(tmp_path, body_path)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
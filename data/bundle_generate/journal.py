@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import threading
+
+from typing import TYPE_CHECKING
+from typing import Literal
+
+from data.bundle_generate.log import LOGGER
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+JOURNAL_VERSION = 1
+
+type BuildStatus = Literal["running", "complete"]
+
+
+class BuildJournal:
+    """Persistent record of the collectors completed by the current build.
+
+    The journal is rewritten atomically after every collector. When a build is
+    interrupted, the next build started with `resume` skips the collectors the
+    interrupted build already completed, as long as their outputs still exist.
+    """
+
+    __path: Path
+
+    __started: str
+    __status: BuildStatus
+    __completed: dict[str, str]
+    __resumed: frozenset[str]
+    __lock: threading.Lock
+
+    def __init__(self, path: Path, resume: bool = False) -> None:
+        self.__path = path
+        self.__lock = threading.Lock()
+
+        self.__started = datetime.datetime.now(datetime.UTC).isoformat()
+        self.__status = "running"
+        self.__completed = {}
+        self.__resumed = frozenset()
+
+        if resume:
+            previous = self._load()
+            if previous is None or previous.get("status") != "running":
+                LOGGER.info("No interrupted build to resume, starting a new build.")
+            else:
+                self.__started = previous["started"]
+                self.__completed = previous["completed"]
+                self.__resumed = frozenset(self.__completed)
+                LOGGER.info(
+                    f"Resuming build started at {self.__started}, "
+                    f"{len(self.__completed)} collectors already completed."
+                )
+
+        with self.__lock:
+            self._save()
+
+    def is_resumed(self, name: str) -> bool:
+        """Whether the collector was completed by the build being resumed."""
+        return name in self.__resumed
+
+    def complete(self, name: str) -> None:
+        with self.__lock:
+            self.__completed[name] = datetime.datetime.now(datetime.UTC).isoformat()
+            self._save()
+
+    def finish(self) -> None:
+        with self.__lock:
+            self.__status = "complete"
+            self._save()
+
+    def _load(self) -> dict | None:
+        if not self.__path.exists():
+            return None
+
+        try:
+            with open(self.__path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            LOGGER.warning(f"Ignoring unreadable build journal '{self.__path}': {e}")
+            return None
+
+        if not isinstance(data, dict) or data.get("version") != JOURNAL_VERSION:
+            return None
+        return data
+
+    def _save(self) -> None:
+        tmp_path = self.__path.with_name(f"{self.__path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": JOURNAL_VERSION,
+                    "started": self.__started,
+                    "status": self.__status,
+                    "completed": self.__completed,
+                },
+                f,
+                indent=2,
+            )
+        os.replace(tmp_path, self.__path)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+import re
+
+from typing import TYPE_CHECKING
+from typing import Any
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from typing import TextIO
+
+
+_CHUNK_SIZE = 1024 * 1024
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+def iter_object(f: TextIO) -> Iterator[tuple[str, Any]]:
+    """Yield the members of the JSON object in `f`, parsing one member at a time.
+
+    Only the member being parsed is held in memory, not the whole document.
+    Raises `json.JSONDecodeError` once the document turns out to be malformed,
+    or is not an object.
+    """
+    buf = ""
+    pos = 0
+    eof = False
+
+    def read_more() -> None:
+        nonlocal buf, pos, eof
+        # Grow the buffer geometrically, so a large member is not parsed over and over.
+        chunk = f.read(max(_CHUNK_SIZE, len(buf) - pos))
+        eof = not chunk
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def peek() -> str:
+        """The next character that is not whitespace, or "" at the end of the document."""
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos < len(buf) or eof:
+                return buf[pos : pos + 1]
+            read_more()
+
+    def expect(chars: str) -> str:
+        nonlocal pos
+        char = peek()
+        if not char or char not in chars:
+            expected = " or ".join(repr(c) for c in chars)
+            raise json.JSONDecodeError(f"Expecting {expected}", buf, pos)
+        pos += 1
+        return char
+
+    def value(follow: str) -> Any:
+        """Parse the next value, which is complete once a character of `follow` is buffered."""
+        nonlocal pos
+        peek()
+        while True:
+            try:
+                result, end = _DECODER.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                read_more()
+                continue
+            if not eof and (end == len(buf) or buf[end] not in follow):
+                # A number may go on in the next chunk.
+                read_more()
+                continue
+            pos = end
+            return result
+
+    def end() -> None:
+        """Check that nothing but whitespace follows the object."""
+        if peek():
+            raise json.JSONDecodeError("Extra data", buf, pos)
+
+    expect("{")
+    if peek() == "}":
+        pos += 1
+        end()
+        return
+
+    while True:
+        if peek() != '"':
+            raise json.JSONDecodeError(
+                "Expecting property name enclosed in double quotes", buf, pos
+            )
+        key = value(" \t\n\r:")
+        expect(":")
+        yield key, value(" \t\n\r,}")
+        if expect(",}") == "}":
+            end()
+            return
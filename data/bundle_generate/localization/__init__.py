@@ -2,17 +2,24 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from data.bundle_generate.localization import fsd
+from data.bundle_generate.consts import LOC_EN_RES
+from data.bundle_generate.consts import LOC_MAIN_RES
+from data.bundle_generate.consts import LOC_ZH_RES
+from data.bundle_generate.localization import fsd as fsd_localization
 from data.bundle_generate.localization import meta_ui
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.pipeline import Collector
+from data.bundle_generate.pipeline import stage_keys
 
 
 if TYPE_CHECKING:
     from pathlib import Path
 
     from data.bundle_generate import Metadata
+    from data.bundle_generate.pipeline import CollectorRunner
     from data.bundle_generate.resources import Fsd
     from data.bundle_generate.resources import ResourceTree
+    from data.bundle_generate.sessions import SessionManager
 
 
 class LocalizationGenerator:
@@ -20,21 +27,62 @@ class LocalizationGenerator:
     __fsd: Fsd
     __index: ResourceTree
     __metadata: Metadata
+    __runner: CollectorRunner
+    __sessions: SessionManager
+
+    __collectors: list[Collector]
 
     def __init__(
-        self, bundle_root: Path, fsd: Fsd, index: ResourceTree, metadata: Metadata
+        self,
+        bundle_root: Path,
+        fsd: Fsd,
+        index: ResourceTree,
+        metadata: Metadata,
+        runner: CollectorRunner,
+        sessions: SessionManager,
     ) -> None:
         self.__root = bundle_root / "localizations"
         self.__fsd = fsd
         self.__index = index
         self.__metadata = metadata
+        self.__runner = runner
+        self.__sessions = sessions
 
         self.__root.mkdir(parents=True, exist_ok=True)
 
+        self.__collectors = [
+            Collector(
+                name="localization.fsd",
+                func=fsd_localization.load_localization,
+                args=(self.__index, self.__root),
+                inputs=frozenset({LOC_EN_RES, LOC_ZH_RES}),
+                outputs=frozenset({"localizations/localizations.pb"}),
+            ),
+            Collector(
+                name="localization.meta_ui",
+                func=meta_ui.load_localization,
+                args=(self.__index, self.__root),
+                inputs=frozenset({LOC_MAIN_RES}),
+                outputs=frozenset({"localizations/meta_ui_localizations.pb"}),
+            ),
+        ]
+
+    @property
+    def collectors(self) -> list[Collector]:
+        return self.__collectors
+
+    @property
+    def inputs(self) -> frozenset[str]:
+        return stage_keys(self.__collectors)[0]
+
+    @property
+    def outputs(self) -> frozenset[str]:
+        return stage_keys(self.__collectors)[1]
+
     async def load(self):
         LOGGER.info("Generating localization files...")
 
-        await fsd.load_localization(self.__index, self.__root)
-        await meta_ui.load_localization(self.__index, self.__root)
+        for collector in self.__collectors:
+            await self.__runner.run(collector)
 
         LOGGER.info("Generated localization.")
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import pickle
 
 from typing import TYPE_CHECKING
@@ -8,6 +9,7 @@ from data import schema_pb2
 from data.bundle_generate.consts import LOC_EN_RES
 from data.bundle_generate.consts import LOC_ZH_RES
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import write_output
 
 
 if TYPE_CHECKING:
@@ -29,15 +31,19 @@ async def load_localization(index: ResourceTree, localization_root: Path):
         LOGGER.warning(f"Localization resource '{LOC_ZH_RES}' not found.")
         return
 
+    await asyncio.to_thread(_write_localization, en.file_path, zh.file_path, localization_root)
+
+
+def _write_localization(en_path: Path, zh_path: Path, localization_root: Path):
     try:
-        with open(en.file_path, "rb") as f:
+        with open(en_path, "rb") as f:
             _, en_data = pickle.load(f)
     except Exception as e:
         LOGGER.error(f"Failed to load English localization data: {e}")
         return
 
     try:
-        with open(zh.file_path, "rb") as f:
+        with open(zh_path, "rb") as f:
             _, zh_data = pickle.load(f)
     except Exception as e:
         LOGGER.error(f"Failed to load Chinese localization data: {e}")
@@ -56,9 +62,7 @@ async def load_localization(index: ResourceTree, localization_root: Path):
     bundle_loc_pb = localization_root / "localizations.pb"
     if bundle_loc_pb.exists():
         LOGGER.warning(f"Localization pb file '{bundle_loc_pb}' already exists, overwriting.")
-        bundle_loc_pb.unlink()
 
-    with open(bundle_loc_pb, "wb+") as f:
-        f.write(localization_collection.SerializeToString())
+    write_output(bundle_loc_pb, localization_collection.SerializeToString())
 
     LOGGER.info("Created fsd localization protobuf file.")
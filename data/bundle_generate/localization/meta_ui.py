@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import pickle
 
 from typing import TYPE_CHECKING
@@ -7,6 +8,7 @@ from typing import TYPE_CHECKING
 from data import schema_pb2
 from data.bundle_generate.consts import LOC_MAIN_RES
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import write_output
 
 
 if TYPE_CHECKING:
@@ -23,8 +25,12 @@ async def load_localization(index: ResourceTree, localization_root: Path):
         LOGGER.warning(f"Localization resource '{LOC_MAIN_RES}' not found.")
         return
 
+    await asyncio.to_thread(_write_meta_ui_localization, main.file_path, localization_root)
+
+
+def _write_meta_ui_localization(main_path: Path, localization_root: Path):
     try:
-        with open(main.file_path, "rb") as f:
+        with open(main_path, "rb") as f:
             main_data = pickle.load(f)
     except Exception as e:
         LOGGER.error(f"Failed to load main localization data: {e}")
@@ -41,9 +47,7 @@ async def load_localization(index: ResourceTree, localization_root: Path):
         LOGGER.warning(
             f"Meta UI localization pb file '{bundle_meta_loc_pb}' already exists, overwriting."
         )
-        bundle_meta_loc_pb.unlink()
 
-    with open(bundle_meta_loc_pb, "wb+") as f:
-        f.write(meta_loc.SerializeToString())
+    write_output(bundle_meta_loc_pb, meta_loc.SerializeToString())
 
     LOGGER.info("Main localization files loaded.")
@@ -2,11 +2,29 @@ from __future__ import annotations
 
 import logging
 
+from typing import TYPE_CHECKING
+
 from data.bundle_generate import paths
 
 
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
 LOGGER = None
 
+FILE_FORMAT = "[%(asctime)s] [%(levelname)s] [%(pathname)s]: %(message)s"
+CONSOLE_FORMAT = "[%(levelname)s]: %(message)s"
+
+
+def _create_file_handler(log_file: Path) -> logging.FileHandler:
+    # The file is opened on first write only, so worker processes that switch to
+    # their own log file never truncate the shared one.
+    file_handler = logging.FileHandler(log_file, mode="w", encoding="utf-8", delay=True)
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(logging.Formatter(FILE_FORMAT))
+    return file_handler
+
 
 def init_logger():
     global LOGGER
@@ -16,20 +34,46 @@ def init_logger():
     LOGGER = logging.getLogger("bundle_generate")
     LOGGER.setLevel(logging.DEBUG)
 
-    file_handler = logging.FileHandler(paths.BUNDLE_LOG_FILE, mode="w", encoding="utf-8")
-    file_handler.setLevel(logging.DEBUG)
+    file_handler = _create_file_handler(paths.BUNDLE_LOG_FILE)
 
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
 
-    file_formatter = logging.Formatter("[%(asctime)s] [%(levelname)s] [%(pathname)s]: %(message)s")
-    file_handler.setFormatter(file_formatter)
-
-    console_formatter = logging.Formatter("[%(levelname)s]: %(message)s")
+    console_formatter = logging.Formatter(CONSOLE_FORMAT)
     console_handler.setFormatter(console_formatter)
 
     LOGGER.addHandler(file_handler)
     LOGGER.addHandler(console_handler)
 
 
+def use_log_file(log_file: Path, tag: str | None = None):
+    """Redirect the file log to `log_file`.
+
+    Used by parallel builds to give each workspace its own log. If `tag` is
+    given, console messages are prefixed with it.
+    """
+
+    for handler in list(LOGGER.handlers):
+        if isinstance(handler, logging.FileHandler):
+            LOGGER.removeHandler(handler)
+            handler.close()
+        elif tag is not None:
+            handler.setFormatter(logging.Formatter(f"[%(levelname)s] [{tag}]: %(message)s"))
+
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    LOGGER.addHandler(_create_file_handler(log_file))
+
+
+def disable_file_log():
+    """Stop logging to a file, in helper processes that must not truncate their parent's log.
+
+    Console messages are still shown.
+    """
+
+    for handler in list(LOGGER.handlers):
+        if isinstance(handler, logging.FileHandler):
+            LOGGER.removeHandler(handler)
+            handler.close()
+
+
 init_logger()
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import collections
+import hashlib
+import os
+import shutil
+import sys
+import time
+import uuid
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from data.bundle_generate.log import LOGGER
+
+
+if sys.platform == "linux":
+    import fcntl
+
+    # ioctl cloning a whole file, from linux/fs.h
+    _FICLONE = 0x40049409
+else:
+    fcntl = None
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+
+def file_md5(path: Path | str) -> str:
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    """Make `dst` a copy-on-write clone of `src`, if the platform and filesystem support it."""
+    if fcntl is None:
+        return False
+
+    try:
+        with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+            fcntl.ioctl(dst_file.fileno(), _FICLONE, src_file.fileno())
+    except OSError:
+        dst.unlink(missing_ok=True)
+        return False
+    return True
+
+
+def link_or_copy(src: Path, dst: Path, reflink: bool = False) -> bool:
+    """Make `dst` a hard link to `src`, copying it where hard links are not supported.
+
+    With `reflink`, a copy-on-write clone is preferred over a hard link, so
+    `dst` stays independent of `src`. An existing `dst` is replaced atomically.
+    Returns whether the content of `src` had to be copied.
+    """
+    if dst.exists() and os.path.samefile(src, dst):
+        return False
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dst.with_name(f"{dst.name}.{uuid.uuid4().hex}.tmp")
+    copied = False
+    try:
+        if not (reflink and _reflink(src, tmp_path)):
+            try:
+                os.link(src, tmp_path)
+            except OSError:
+                LOGGER.debug(f"Unable to hard link '{dst}' to '{src}', copying instead.")
+                shutil.copyfile(src, tmp_path)
+                copied = True
+        os.replace(tmp_path, dst)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return copied
+
+
+def clone_or_copy(src: Path, dst: Path) -> bool:
+    """Make `dst` a copy of `src` independent of later changes to it.
+
+    A copy-on-write clone is made where the platform and filesystem support it.
+    An existing `dst` is replaced atomically. Returns whether the content of `src`
+    had to be copied.
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dst.with_name(f"{dst.name}.{uuid.uuid4().hex}.tmp")
+    copied = False
+    try:
+        if not _reflink(src, tmp_path):
+            shutil.copyfile(src, tmp_path)
+            copied = True
+        os.replace(tmp_path, dst)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return copied
+
+
+@dataclass
+class PruneResult:
+    """What `ObjectStore.prune` evicted, and the objects it could not evict."""
+
+    removed: int = 0
+    freed: int = 0
+    pinned: int = 0
+    pinned_bytes: int = 0
+
+
+class ObjectStore:
+    """Content-addressed store of downloaded resources, shared by every workspace.
+
+    Objects are keyed by their resfileindex checksum and stored as
+    `<root>/<checksum[:2]>/<checksum>`. Workspaces see them through hard links
+    at their resource cache paths, so a resource shared by several servers is
+    downloaded once, and a resource whose checksum changes is fetched again
+    even if its path is unchanged.
+
+    The access time of an object is bumped whenever it is used, `prune` evicts
+    the least recently used objects first. Its mtime is left alone, so cache
+    verification can tell unchanged objects apart.
+    """
+
+    __root: Path
+
+    def __init__(self, root: Path) -> None:
+        self.__root = root
+
+    @property
+    def root(self) -> Path:
+        return self.__root
+
+    def object_path(self, checksum: str) -> Path:
+        return self.__root / checksum[:2] / checksum
+
+    def tmp_path(self, checksum: str) -> Path:
+        """A unique path to download an object to before adding it."""
+        path = self.object_path(checksum)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path.with_name(f"{checksum}.{uuid.uuid4().hex}.tmp")
+
+    def part_path(self, checksum: str) -> Path:
+        """Where an interrupted download of an object is kept until it is resumed."""
+        path = self.object_path(checksum)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path.with_name(f"{checksum}.part")
+
+    def get(self, checksum: str) -> Path | None:
+        path = self.object_path(checksum)
+        try:
+            os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+        except FileNotFoundError:
+            return None
+        return path
+
+    def add(self, checksum: str, src: Path) -> Path:
+        """Move a verified file into the store."""
+        path = self.object_path(checksum)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(src, path)
+        return path
+
+    def adopt(self, checksum: str, src: Path, copy: bool = False) -> Path | None:
+        """Add an existing file to the store if its content matches `checksum`.
+
+        This picks up resources cached by workspaces before they shared the store.
+        The file is linked into the store, unless `copy` is set for a file owned by
+        another program, e.g. the client cache, which may rewrite it in place.
+        The copy is what is checked, so a file changing meanwhile is not adopted.
+        """
+        if not src.is_file():
+            return None
+
+        tmp_path = self.tmp_path(checksum)
+        try:
+            if copy:
+                clone_or_copy(src, tmp_path)
+            else:
+                link_or_copy(src, tmp_path)
+            if file_md5(tmp_path) != checksum:
+                tmp_path.unlink()
+                return None
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return self.add(checksum, tmp_path)
+
+    def prune(self, max_size: int, view_roots: Iterable[Path]) -> PruneResult:
+        """Evict least recently used objects until the store fits in `max_size` bytes.
+
+        Workspace views under `view_roots` linking to an evicted object are
+        removed too, otherwise they would keep its data on disk. Objects also
+        linked from elsewhere, e.g. a bundle's icons, would not free their data
+        if evicted, so they are kept, but still count towards `max_size`.
+        """
+        views: collections.defaultdict[tuple[int, int], list[Path]] = collections.defaultdict(list)
+        for root in view_roots:
+            for path in root.rglob("*"):
+                if path.is_file():
+                    stat = path.stat()
+                    views[(stat.st_dev, stat.st_ino)].append(path)
+
+        result = PruneResult()
+        objects = []
+        total = 0
+        for path in self.__root.glob("*/*"):
+            if not path.is_file() or path.suffix == ".tmp":
+                continue
+            stat = path.stat()
+            total += stat.st_size
+            if stat.st_nlink - len(views.get((stat.st_dev, stat.st_ino), ())) > 1:
+                result.pinned += 1
+                result.pinned_bytes += stat.st_size
+            else:
+                objects.append((stat, path))
+
+        if result.pinned:
+            LOGGER.info(
+                f"{result.pinned} objects ({result.pinned_bytes} bytes) in '{self.__root}' "
+                f"are linked outside the store and cannot be evicted, budget {max_size} bytes."
+            )
+        if result.pinned_bytes > max_size:
+            LOGGER.warning(
+                f"Objects linked outside the store alone take {result.pinned_bytes} bytes, "
+                f"more than the {max_size} bytes budget of '{self.__root}'."
+            )
+        if total <= max_size:
+            return result
+
+        for stat, path in sorted(objects, key=lambda item: item[0].st_atime_ns):
+            if total <= max_size:
+                break
+
+            for view in views.get((stat.st_dev, stat.st_ino), ()):
+                view.unlink(missing_ok=True)
+            path.unlink(missing_ok=True)
+
+            total -= stat.st_size
+            result.removed += 1
+            result.freed += stat.st_size
+
+        LOGGER.info(
+            f"Evicted {result.removed} objects ({result.freed} bytes) from '{self.__root}'."
+        )
+        return result
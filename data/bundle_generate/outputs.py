@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import contextlib
+import os
+import sqlite3
+
+from typing import TYPE_CHECKING
+
+from data.bundle_generate.profiling import add_bytes_written
+from data.bundle_generate.profiling import add_rows_written
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.tmp")
+
+
+def write_output(path: Path, data: bytes) -> None:
+    """Write a bundle output file.
+
+    The data is written to a temporary file first, so an interrupted build
+    never leaves a truncated output behind.
+    """
+    tmp_path = _tmp_path(path)
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    add_bytes_written(len(data))
+
+
+@contextlib.contextmanager
+def connect_output(path: Path, shared: bool = False) -> Iterator[sqlite3.Connection]:
+    """Open a bundle output database.
+
+    Like `sqlite3.connect` used as a context manager, the transaction is
+    committed on success and rolled back on error. The connection is closed
+    afterwards.
+
+    The database is built from scratch in a temporary file and moved into
+    place on success. `shared` databases receive tables from several
+    collectors and are updated in place instead; their collectors recreate
+    their own tables, so rerunning one after a crash is safe.
+    """
+
+    target = path if shared else _tmp_path(path)
+    if not shared:
+        target.unlink(missing_ok=True)
+
+    try:
+        conn = sqlite3.connect(target)
+        try:
+            with conn:
+                yield conn
+            add_rows_written(conn.total_changes)
+        finally:
+            conn.close()
+
+        if not shared:
+            os.replace(target, path)
+    except BaseException:
+        if not shared:
+            target.unlink(missing_ok=True)
+        raise
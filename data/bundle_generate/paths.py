@@ -9,9 +9,12 @@ DATA_ROOT = PROJECT_ROOT / "data"
 
 BUNDLE_WS_ROOT = DATA_ROOT / "bundle-ws"
 BUNDLE_CACHE_ROOT = DATA_ROOT / "bundle-cache"
+BUNDLE_OBJECT_STORE = BUNDLE_CACHE_ROOT / "objects"
+BUNDLE_IMAGE_SERVICE_CACHE = BUNDLE_CACHE_ROOT / "image-service"
 BUNDLE_OUTPUT_ROOT = DATA_ROOT / "bundle"
 
 BUNDLE_LOG_FILE = DATA_ROOT / "bundle.log"
+BUNDLE_LOG_DIR = DATA_ROOT / "bundle-logs"
 
 BUNDLE_ESI_KEY_LIST = DATA_ROOT / "esi_keys.list.json"
 BUNDLE_LINKS_LIST = DATA_ROOT / "links.list.json"
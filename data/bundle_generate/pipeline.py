@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import threading
+import time
+import typing
+
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING
+
+from data.bundle_generate.log import LOGGER
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+    from collections.abc import Callable
+    from collections.abc import Iterable
+    from pathlib import Path
+
+    from data.bundle_generate.fingerprint import FingerprintStore
+    from data.bundle_generate.journal import BuildJournal
+    from data.bundle_generate.profiling import BuildProfiler
+    from data.bundle_generate.profiling import ProfileRecord
+    from data.bundle_generate.resources import Fsd
+    from data.bundle_generate.resources import ResourcePath
+
+
+type CollectorFunc = Callable[..., Awaitable[None] | None]
+
+
+@dataclass(frozen=True)
+class Collector:
+    """A single `collect_*` step of a generator.
+
+    `inputs` uses the same keys as `scheduler.Stage`; `outputs` are paths
+    relative to the bundle root. Synchronous collectors are run in a worker
+    thread so they do not block other stages.
+
+    `resources` lists the resources the collector downloads besides its
+    `res:` inputs, for the download planner, see `planner.DownloadPlanner`.
+    """
+
+    name: str
+    func: CollectorFunc
+    args: tuple[typing.Any, ...] = ()
+    inputs: frozenset[str] = field(default_factory=frozenset)
+    outputs: frozenset[str] = field(default_factory=frozenset)
+    incremental: bool = True
+    resources: Callable[[], Iterable[ResourcePath]] | None = None
+
+
+def stage_keys(collectors: Iterable[Collector]) -> tuple[frozenset, frozenset]:
+    """Merge the inputs and outputs of a generator's collectors."""
+    inputs: set[str] = set()
+    outputs: set[str] = set()
+    for collector in collectors:
+        inputs |= collector.inputs
+        outputs |= collector.outputs
+    return frozenset(inputs), frozenset(outputs)
+
+
+class CollectorRunner:
+    """Run collectors, skipping those whose inputs have not changed since the last build.
+
+    Collectors completed by a resumed, interrupted build are skipped as well,
+    see `journal.BuildJournal`. Once a collector is done, run or skipped, its
+    FSD inputs are released from `fsd`, see `Fsd.retain`.
+    """
+
+    __bundle_root: Path
+    __fingerprints: FingerprintStore
+    __journal: BuildJournal | None
+    __profiler: BuildProfiler
+    __rebuild: bool
+    __fsd: Fsd | None
+
+    __computed: dict[str, str]
+    __lock: threading.Lock
+
+    def __init__(
+        self,
+        bundle_root: Path,
+        fingerprints: FingerprintStore,
+        journal: BuildJournal | None,
+        profiler: BuildProfiler,
+        rebuild: bool = False,
+        fsd: Fsd | None = None,
+    ):
+        """`journal` may only be `None` for a runner that only answers `is_current`."""
+        self.__bundle_root = bundle_root
+        self.__fingerprints = fingerprints
+        self.__journal = journal
+        self.__profiler = profiler
+        self.__rebuild = rebuild
+        self.__fsd = fsd
+        self.__computed = {}
+        self.__lock = threading.Lock()
+
+    def is_current(self, collector: Collector) -> bool:
+        """Whether `run` would skip the collector. This may compute its fingerprint."""
+        if not self._outputs_exist(collector):
+            return False
+        if self.__journal is not None and self.__journal.is_resumed(collector.name):
+            return True
+        return (
+            collector.incremental
+            and not self.__rebuild
+            and self.__fingerprints.matches(collector.name, self._fingerprint(collector))
+        )
+
+    async def run(self, collector: Collector) -> None:
+        try:
+            await self._run(collector)
+        finally:
+            if self.__fsd is not None:
+                self.__fsd.release(collector.inputs)
+
+    async def _run(self, collector: Collector) -> None:
+        with self.__profiler.span(collector.name, "collector", collector.outputs) as record:
+            if self.__journal.is_resumed(collector.name) and self._outputs_exist(collector):
+                LOGGER.info(
+                    f"Skipping collector '{collector.name}': completed before interruption."
+                )
+                record.skipped = True
+                return
+
+            fingerprint = None
+            if collector.incremental:
+                fingerprint = await asyncio.to_thread(self._fingerprint, collector)
+                if (
+                    not self.__rebuild
+                    and self._outputs_exist(collector)
+                    and self.__fingerprints.matches(collector.name, fingerprint)
+                ):
+                    LOGGER.info(f"Skipping collector '{collector.name}': inputs unchanged.")
+                    record.skipped = True
+                    self.__journal.complete(collector.name)
+                    return
+
+            # Outputs are about to be rewritten, a crash from here on must not leave a stale record.
+            self.__fingerprints.forget(collector.name)
+
+            if inspect.iscoroutinefunction(collector.func):
+                await collector.func(*collector.args)
+            else:
+                await asyncio.to_thread(self._run_blocking, collector, record)
+
+            if fingerprint is not None:
+                self.__fingerprints.record(collector.name, fingerprint)
+            self.__journal.complete(collector.name)
+
+    def _fingerprint(self, collector: Collector) -> str:
+        """The fingerprint of a collector, computed once per build."""
+        with self.__lock:
+            fingerprint = self.__computed.get(collector.name)
+        if fingerprint is None:
+            fingerprint = self.__fingerprints.compute(collector)
+            with self.__lock:
+                self.__computed[collector.name] = fingerprint
+        return fingerprint
+
+    @staticmethod
+    def _run_blocking(collector: Collector, record: ProfileRecord) -> None:
+        record.cpu_time_scope = "thread"
+        start = time.thread_time()
+        try:
+            collector.func(*collector.args)
+        finally:
+            record.cpu_time = time.thread_time() - start
+
+    def _outputs_exist(self, collector: Collector) -> bool:
+        return all((self.__bundle_root / output).exists() for output in collector.outputs)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING
+
+from data.bundle_generate.log import LOGGER
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from data.bundle_generate.pipeline import Collector
+    from data.bundle_generate.pipeline import CollectorRunner
+    from data.bundle_generate.resources import ResourcePath
+    from data.bundle_generate.resources import ResourceTree
+
+
+@dataclass
+class DownloadPlan:
+    """The resources a build downloads, largest first.
+
+    `local` counts the downloads that are copied from the client cache instead.
+    `groups` maps each download to the generator of the first collector needing it.
+    `fsd` lists the FSD documents read by the collectors that run, in the order
+    of the collectors, for `Fsd.preload`. `resources` lists every resource they
+    need, cached or not.
+    """
+
+    resources: list[ResourceTree._FileNode] = field(default_factory=list)
+    downloads: list[ResourceTree._FileNode] = field(default_factory=list)
+    groups: dict[ResourcePath, str] = field(default_factory=dict)
+    cached: int = 0
+    cached_bytes: int = 0
+    local: int = 0
+    local_bytes: int = 0
+    missing: list[ResourcePath] = field(default_factory=list)
+    fsd: list[str] = field(default_factory=list)
+
+    @property
+    def download_bytes(self) -> int:
+        return sum(el.size for el in self.downloads)
+
+    @property
+    def compressed_bytes(self) -> int:
+        return sum(el.compressed_size for el in self.downloads)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.downloads)} resources to download "
+            f"({self.download_bytes / 1024**2:.1f} MiB, "
+            f"{self.compressed_bytes / 1024**2:.1f} MiB compressed, "
+            f"{self.local} from the client cache), "
+            f"{self.cached} already cached ({self.cached_bytes / 1024**2:.1f} MiB), "
+            f"{len(self.missing)} not in the index"
+        )
+
+    def report(self) -> dict:
+        return {
+            "downloads": len(self.downloads),
+            "download_bytes": self.download_bytes,
+            "compressed_bytes": self.compressed_bytes,
+            "cached": self.cached,
+            "cached_bytes": self.cached_bytes,
+            "local": self.local,
+            "local_bytes": self.local_bytes,
+            "missing": self.missing,
+        }
+
+
+class DownloadPlanner:
+    """Collect the resources a build downloads before any collector runs.
+
+    A collector needs its `res:` inputs and its declared `resources`. Collectors
+    that will be skipped are left out. Resources needed by several collectors
+    are downloaded once, cached resources are not downloaded at all, nor are
+    the inputs of schema resources already decoded into the schema cache, and
+    the rest is queued for download largest first, so large files do not end
+    up as the tail of the build.
+    """
+
+    __index: ResourceTree
+    __runner: CollectorRunner
+
+    def __init__(self, index: ResourceTree, runner: CollectorRunner) -> None:
+        self.__index = index
+        self.__runner = runner
+
+    def plan(self, collectors: Iterable[Collector]) -> DownloadPlan:
+        plan = self.collect(collectors)
+        self.schedule(plan)
+        return plan
+
+    def collect(self, collectors: Iterable[Collector]) -> DownloadPlan:
+        """Collect the resources the collectors need, without deciding what to download yet.
+
+        The collected resources can be verified before `schedule` completes the plan.
+        """
+        plan = DownloadPlan()
+
+        resources: dict[str, ResourceTree._FileNode] = {}
+        for collector in collectors:
+            if self.__runner.is_current(collector):
+                continue
+
+            for key in sorted(collector.inputs):
+                if key.startswith("fsd:") and key.removeprefix("fsd:") not in plan.fsd:
+                    plan.fsd.append(key.removeprefix("fsd:"))
+
+            decoded = self._decoded_inputs(collector)
+            paths = [
+                key
+                for key in sorted(collector.inputs)
+                if key.startswith("res:") and key not in decoded
+            ]
+            if collector.resources is not None:
+                paths.extend(collector.resources())
+
+            # Collectors are named after their generator, e.g. "image.icons".
+            group = collector.name.partition(".")[0]
+            for res in paths:
+                nodes = self.__index.get_resources(res)
+                if nodes is None:
+                    plan.missing.append(res)
+                    continue
+                for el in nodes:
+                    resources.setdefault(el.res_id, el)
+                    plan.groups.setdefault(el.res_id, group)
+
+        plan.resources = list(resources.values())
+        return plan
+
+    def schedule(self, plan: DownloadPlan) -> None:
+        """Split the collected resources into cached ones and downloads, largest first."""
+        for el in plan.resources:
+            if self.__index.is_cached(el):
+                plan.cached += 1
+                plan.cached_bytes += el.size
+            else:
+                plan.downloads.append(el)
+                if self.__index.in_client_cache(el) is not None:
+                    plan.local += 1
+                    plan.local_bytes += el.size
+        plan.downloads.sort(key=lambda el: el.size, reverse=True)
+
+        LOGGER.info(f"Download plan: {plan.summary()}.")
+
+    def _decoded_inputs(self, collector: Collector) -> set[ResourcePath]:
+        """The schema and binary data inputs of the collector whose decoded resource is cached.
+
+        `get_schema_resource` reads those from the schema cache without downloading them.
+        An input pair is a `.schema` resource and the `.static` resource of the same name.
+        """
+        cache = self.__index.schema_cache
+        if cache is None:
+            return set()
+
+        decoded: set[ResourcePath] = set()
+        for schema_res in collector.inputs:
+            if not schema_res.startswith("res:") or not schema_res.endswith(".schema"):
+                continue
+            bin_res = f"{schema_res.removesuffix('.schema')}.static"
+            if bin_res not in collector.inputs:
+                continue
+
+            schema = self.__index.get_resource(schema_res)
+            bin_data = self.__index.get_resource(bin_res)
+            if schema is not None and bin_data is not None and cache.contains(schema, bin_data):
+                decoded.update((schema_res, bin_res))
+        return decoded
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import datetime
+import json
+import sys
+import threading
+import time
+import tracemalloc
+
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING
+from typing import Literal
+
+from data.bundle_generate.log import LOGGER
+
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from pathlib import Path
+
+
+type RecordKind = Literal["stage", "collector"]
+
+_CURRENT_RECORD: contextvars.ContextVar[ProfileRecord | None] = contextvars.ContextVar(
+    "profile_record", default=None
+)
+_RECORD_LOCK = threading.Lock()
+
+
+def _peak_rss() -> int | None:
+    """Peak resident set size of the process in bytes, if the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class ProfileRecord:
+    """Measurements of a single stage or collector run.
+
+    `cpu_time` is the CPU time of the worker thread for collectors that run in
+    their own thread (`cpu_time_scope == "thread"`), and the CPU time of the
+    whole process otherwise. The latter includes concurrently running stages.
+    """
+
+    name: str
+    kind: RecordKind
+    parent: ProfileRecord | None = field(default=None, repr=False)
+    skipped: bool = False
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    cpu_time_scope: Literal["process", "thread"] = "process"
+    peak_traced_memory: int | None = None
+    peak_rss: int | None = None
+    rows_written: int = 0
+    bytes_written: int = 0
+    output_sizes: dict[str, int] = field(default_factory=dict)
+    children: list[ProfileRecord] = field(default_factory=list, repr=False)
+
+    def to_dict(self) -> dict:
+        result = {
+            "name": self.name,
+            "kind": self.kind,
+            "skipped": self.skipped,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "cpu_time_scope": self.cpu_time_scope,
+            "peak_traced_memory": self.peak_traced_memory,
+            "peak_rss": self.peak_rss,
+            "rows_written": self.rows_written,
+            "bytes_written": self.bytes_written,
+            "output_sizes": self.output_sizes,
+        }
+        if self.children:
+            result["collectors"] = [child.to_dict() for child in self.children]
+        return result
+
+
+def add_rows_written(rows: int) -> None:
+    """Account rows written to the current stage and collector, if any."""
+    with _RECORD_LOCK:
+        record = _CURRENT_RECORD.get()
+        while record is not None:
+            record.rows_written += rows
+            record = record.parent
+
+
+def add_bytes_written(size: int) -> None:
+    """Account bytes written to the current stage and collector, if any."""
+    with _RECORD_LOCK:
+        record = _CURRENT_RECORD.get()
+        while record is not None:
+            record.bytes_written += size
+            record = record.parent
+
+
+class BuildProfiler:
+    """Collect per-stage and per-collector measurements of a build.
+
+    Python allocations are traced with `tracemalloc` when `trace_memory` is set.
+    Since stages overlap, the traced peak of a record is the highest traced
+    memory observed while it was running, not memory it allocated itself.
+    """
+
+    __bundle_root: Path
+    __trace_memory: bool
+
+    __started: datetime.datetime
+    __start: float
+    __records: list[ProfileRecord]
+    __open_records: dict[int, ProfileRecord]
+    __lock: threading.Lock
+
+    def __init__(self, bundle_root: Path, trace_memory: bool = False):
+        self.__bundle_root = bundle_root
+        self.__trace_memory = trace_memory
+        self.__started = datetime.datetime.now(datetime.UTC)
+        self.__start = time.perf_counter()
+        self.__records = []
+        self.__open_records = {}
+        self.__lock = threading.Lock()
+
+        if self.__trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @property
+    def records(self) -> list[ProfileRecord]:
+        return self.__records
+
+    @contextlib.contextmanager
+    def span(
+        self, name: str, kind: RecordKind, outputs: Iterable[str] = ()
+    ) -> Iterator[ProfileRecord]:
+        """Measure the enclosed block.
+
+        Spans nest through the context: a collector span opened inside a stage
+        span is recorded as one of the stage's children.
+        """
+
+        parent = _CURRENT_RECORD.get()
+        record = ProfileRecord(name=name, kind=kind, parent=parent)
+        if parent is None:
+            self.__records.append(record)
+        else:
+            parent.children.append(record)
+
+        self._flush_traced_peak()
+        with self.__lock:
+            self.__open_records[id(record)] = record
+
+        token = _CURRENT_RECORD.set(record)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            _CURRENT_RECORD.reset(token)
+            record.wall_time = time.perf_counter() - wall_start
+            if record.cpu_time_scope == "process":
+                record.cpu_time = time.process_time() - cpu_start
+
+            self._flush_traced_peak()
+            with self.__lock:
+                del self.__open_records[id(record)]
+
+            record.peak_rss = _peak_rss()
+            for output in outputs:
+                output_path = self.__bundle_root / output
+                if output_path.is_file():
+                    record.output_sizes[output] = output_path.stat().st_size
+
+    def _flush_traced_peak(self) -> None:
+        """Attribute the traced peak since the last event to every running record."""
+        if not self.__trace_memory:
+            return
+
+        with self.__lock:
+            _, peak = tracemalloc.get_traced_memory()
+            for record in self.__open_records.values():
+                record.peak_traced_memory = max(record.peak_traced_memory or 0, peak)
+            tracemalloc.reset_peak()
+
+    def report(self, **metadata) -> dict:
+        return {
+            **metadata,
+            "started": self.__started.isoformat(),
+            "wall_time": time.perf_counter() - self.__start,
+            "trace_memory": self.__trace_memory,
+            "peak_rss": _peak_rss(),
+            "stages": [record.to_dict() for record in self.__records],
+        }
+
+    def write_report(self, path: Path, **metadata) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(**metadata), f, indent=4)
+        LOGGER.info(f"Wrote build profile to '{path}'.")
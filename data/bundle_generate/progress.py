@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import time
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from data.bundle_generate.log import LOGGER
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from tenacity import RetryCallState
+
+
+# Transfers started outside of any group, e.g. before the first stage.
+OTHER_GROUP = "other"
+
+_CURRENT_GROUP: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "transfer_group", default=OTHER_GROUP
+)
+
+
+@contextlib.contextmanager
+def transfer_group(name: str) -> Iterator[None]:
+    """Attribute the transfers started in the enclosed block, and in tasks it creates, to `name`."""
+    token = _CURRENT_GROUP.set(name)
+    try:
+        yield
+    finally:
+        _CURRENT_GROUP.reset(token)
+
+
+def _format_eta(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02}m" if hours else f"{minutes}m{seconds:02}s"
+
+
+@dataclass
+class GroupProgress:
+    """Transfers of one group, usually a generator, against its planned downloads."""
+
+    planned_files: int = 0
+    planned_bytes: int = 0
+    files: int = 0
+    bytes: int = 0
+    failed: int = 0
+    in_flight: int = 0
+    retries: int = 0
+
+    # The bytes and time of the previous progress line, the rate is measured since.
+    last_bytes: int = 0
+    last_time: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "planned_files": self.planned_files,
+            "planned_bytes": self.planned_bytes,
+            "files": self.files,
+            "bytes": self.bytes,
+            "failed": self.failed,
+            "retries": self.retries,
+        }
+
+
+class TransferMonitor:
+    """Progress of the transfers of a build, by group.
+
+    A transfer is a resource or image being fetched, from the network, the
+    client cache or the object store. It belongs to the group of the context
+    it was started in, see `transfer_group`. `run` logs the files and bytes
+    done out of the planned ones, the current rate, the transfers in flight,
+    the retries and an estimated time left for every active group.
+    Per-host throughput is accounted by the `HostLimiter` of each host.
+    """
+
+    __groups: dict[str, GroupProgress]
+
+    def __init__(self) -> None:
+        self.__groups = {}
+
+    def _group(self, name: str | None = None) -> GroupProgress:
+        if name is None:
+            name = _CURRENT_GROUP.get()
+        group = self.__groups.get(name)
+        if group is None:
+            group = self.__groups[name] = GroupProgress(last_time=time.perf_counter())
+        return group
+
+    def plan(self, name: str, size: int) -> None:
+        """Add a planned download of `size` bytes to the group `name`."""
+        group = self._group(name)
+        group.planned_files += 1
+        group.planned_bytes += size
+
+    @contextlib.contextmanager
+    def transfer(self) -> Iterator[None]:
+        """Count the enclosed block as a transfer of the current group."""
+        group = self._group()
+        group.in_flight += 1
+        try:
+            yield
+        except BaseException:
+            group.failed += 1
+            raise
+        else:
+            group.files += 1
+        finally:
+            group.in_flight -= 1
+
+    def received(self, size: int) -> None:
+        self._group().bytes += size
+
+    def retried(self, retry_state: RetryCallState | None = None) -> None:
+        """Count a retried attempt, usable as the `before_sleep` callback of `tenacity.retry`."""
+        self._group().retries += 1
+
+    async def run(self, interval: float = 5.0) -> None:
+        """Log the progress of every active group each `interval` seconds, until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            self.log_progress()
+
+    def log_progress(self) -> None:
+        now = time.perf_counter()
+        for name, group in self.__groups.items():
+            elapsed = now - group.last_time
+            done = group.bytes - group.last_bytes
+            group.last_bytes, group.last_time = group.bytes, now
+            if not group.in_flight and not done:
+                continue
+
+            rate = done / elapsed if elapsed > 0 else 0.0
+            left = group.planned_bytes - group.bytes
+            eta = _format_eta(left / rate) if rate > 0 and left > 0 else "-"
+            LOGGER.info(
+                f"Downloads [{name}]: {group.files}/{group.planned_files} files, "
+                f"{group.bytes / 1024**2:.1f}/{group.planned_bytes / 1024**2:.1f} MiB, "
+                f"{rate / 1024**2:.2f} MiB/s, {group.in_flight} in flight, "
+                f"{group.retries} retries, ETA {eta}"
+            )
+
+    def report(self) -> dict:
+        return {name: group.to_dict() for name, group in self.__groups.items()}
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import array
+import csv
+import mmap
+import os
+import struct
+import threading
+
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+from data.bundle_generate.log import LOGGER
+from data.bundle_generate.object_store import file_md5
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+
+# Bump this whenever the snapshot layout changes.
+SNAPSHOT_VERSION = 1
+
+_MAGIC = b"RFIX"
+# magic, version, source size, source mtime (ns), source md5, entry count
+_HEADER = struct.Struct("<4sIQQ32sQ")
+# Each entry stores its lookup key, res_id, url and checksum as NUL terminated strings.
+_FIELDS = 4
+
+
+class IndexEntry(NamedTuple):
+    res_id: str
+    url: str
+    checksum: str
+    size: int
+    compressed_size: int
+
+
+def resource_key(res: str) -> str:
+    """Normalize a resource path for lookups.
+
+    The leading `res:` segment and empty segments are dropped, so
+    `res:/ui/texture/icons` and `res://ui/texture/icons/` map to `ui/texture/icons`.
+    """
+    nodes = [x for x in res.split("/") if len(x) > 0]
+    return "/".join(node for node in nodes[1:] if ":" not in node)
+
+
+def _size(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+class ResourceIndex:
+    """Read-only view of a `resfileindex.txt`, backed by a compiled snapshot.
+
+    The CSV index is parsed once into a binary snapshot next to the resource
+    cache, keyed by the md5 of the index file. Later runs memory-map the
+    snapshot instead of parsing the CSV again. Nothing is read until the index
+    is first accessed.
+
+    Entries are sorted by `resource_key`, so all resources below a folder form
+    a contiguous range.
+    """
+
+    __source: Path
+    __snapshot: Path
+
+    __lock: threading.Lock
+    __mmap: mmap.mmap | None
+    __count: int
+    __offsets: memoryview
+    __sizes: memoryview
+    __strings_start: int
+
+    def __init__(self, source: Path, snapshot: Path) -> None:
+        self.__source = source
+        self.__snapshot = snapshot
+        self.__lock = threading.Lock()
+        self.__mmap = None
+        self.__count = 0
+
+    @property
+    def source(self) -> Path:
+        return self.__source
+
+    def __len__(self) -> int:
+        self._open()
+        return self.__count
+
+    def __getitem__(self, i: int) -> IndexEntry:
+        self._open()
+        if not 0 <= i < self.__count:
+            raise IndexError(i)
+
+        base = i * _FIELDS
+        return IndexEntry(
+            res_id=self._string(base + 1),
+            url=self._string(base + 2),
+            checksum=self._string(base + 3),
+            size=self.__sizes[2 * i],
+            compressed_size=self.__sizes[2 * i + 1],
+        )
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        strings = self._strings()
+        sizes = self.__sizes.tolist()
+        for i in range(self.__count):
+            base = i * _FIELDS
+            yield IndexEntry(
+                strings[base + 1],
+                strings[base + 2],
+                strings[base + 3],
+                sizes[2 * i],
+                sizes[2 * i + 1],
+            )
+
+    def key(self, i: int) -> str:
+        self._open()
+        return self._string(i * _FIELDS)
+
+    def keys(self) -> list[str]:
+        """The lookup keys of all entries, in order."""
+        return self._strings()[: self.__count * _FIELDS : _FIELDS]
+
+    def _strings(self) -> list[str]:
+        self._open()
+        # Decoding the whole string table at once is much faster than entry by entry.
+        return self.__mmap[self.__strings_start :].decode("utf-8").split("\0")
+
+    def _string(self, field: int) -> str:
+        start = self.__strings_start + self.__offsets[field]
+        end = self.__strings_start + self.__offsets[field + 1] - 1
+        return self.__mmap[start:end].decode("utf-8")
+
+    def _open(self) -> None:
+        if self.__mmap is not None:
+            return
+
+        with self.__lock:
+            if self.__mmap is not None:
+                return
+
+            stat = os.stat(self.__source)
+            header = self._read_header()
+            if header is None or (header[2], header[3]) != (stat.st_size, stat.st_mtime_ns):
+                checksum = file_md5(self.__source)
+                if header is None or header[4].decode("ascii") != checksum:
+                    self._compile(stat, checksum)
+                else:
+                    # Touched but unchanged, remember the new stat to skip hashing next time.
+                    self._write_header(stat, checksum, header[5])
+
+            with open(self.__snapshot, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            count = _HEADER.unpack_from(mm)[5]
+            offsets_start = _HEADER.size
+            sizes_start = offsets_start + 4 * (count * _FIELDS + 1)
+            strings_start = sizes_start + 8 * 2 * count
+
+            view = memoryview(mm)
+            self.__offsets = view[offsets_start:sizes_start].cast("I")
+            self.__sizes = view[sizes_start:strings_start].cast("Q")
+            self.__strings_start = strings_start
+            self.__count = count
+            self.__mmap = mm
+
+    def _read_header(self) -> tuple | None:
+        try:
+            with open(self.__snapshot, "rb") as f:
+                header = _HEADER.unpack(f.read(_HEADER.size))
+        except (OSError, struct.error):
+            return None
+
+        if header[0] != _MAGIC or header[1] != SNAPSHOT_VERSION:
+            return None
+        return header
+
+    def _write_header(self, stat: os.stat_result, checksum: str, count: int) -> None:
+        with open(self.__snapshot, "r+b") as f:
+            f.write(
+                _HEADER.pack(
+                    _MAGIC,
+                    SNAPSHOT_VERSION,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    checksum.encode("ascii"),
+                    count,
+                )
+            )
+
+    def _compile(self, stat: os.stat_result, checksum: str) -> None:
+        LOGGER.info(f"Compiling resource index snapshot for '{self.__source}'...")
+
+        rows = []
+        with open(self.__source, "r", encoding="utf-8", newline="") as f:
+            for row in csv.reader(f):
+                if len(row) < 3:
+                    continue
+                res_id, url, entry_checksum, *sizes = row
+                sizes += ["", ""]
+                rows.append(
+                    (
+                        resource_key(res_id),
+                        res_id,
+                        url,
+                        entry_checksum,
+                        _size(sizes[0]),
+                        _size(sizes[1]),
+                    )
+                )
+        # Stable, so the last of duplicate entries still wins in lookups.
+        rows.sort(key=lambda row: row[0])
+
+        offsets = array.array("I", [0])
+        sizes = array.array("Q")
+        strings = bytearray()
+        for row in rows:
+            for value in row[:_FIELDS]:
+                strings += value.encode("utf-8")
+                strings += b"\0"
+                offsets.append(len(strings))
+            sizes.append(row[4])
+            sizes.append(row[5])
+
+        self.__snapshot.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.__snapshot.with_name(f"{self.__snapshot.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(
+                _HEADER.pack(
+                    _MAGIC,
+                    SNAPSHOT_VERSION,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    checksum.encode("ascii"),
+                    len(rows),
+                )
+            )
+            f.write(offsets.tobytes())
+            f.write(sizes.tobytes())
+            f.write(strings)
+        os.replace(tmp_path, self.__snapshot)
+
+        LOGGER.info(f"Compiled {len(rows)} resources into '{self.__snapshot}'.")
@@ -1,235 +1,574 @@
 from __future__ import annotations
 
 import asyncio
+import bisect
 import collections
-import hashlib
 import json
 import logging
+import multiprocessing
+import os
+import threading
 import typing
 
-from dataclasses import dataclass
-
-import aiohttp
-import yaml
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
 
 from tenacity import after_log
 from tenacity import retry
 from tenacity import stop_after_attempt
 from tenacity import wait_exponential
 
-from data import schema_loader
-from data.bundle_generate.async_config import SEMAPHORE
+from data.bundle_generate import json_stream
+from data.bundle_generate import transfer
+from data.bundle_generate.fsd_cache import FsdCache
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.log import disable_file_log
+from data.bundle_generate.object_store import clone_or_copy
+from data.bundle_generate.object_store import link_or_copy
+from data.bundle_generate.progress import transfer_group
+from data.bundle_generate.resource_index import resource_key
+from data.bundle_generate.schema_resource import get_schema_resource
 
 
 if typing.TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from collections.abc import Mapping
     from pathlib import Path
 
+    from data.bundle_generate.object_store import ObjectStore
+    from data.bundle_generate.resource_index import IndexEntry
+    from data.bundle_generate.resource_index import ResourceIndex
+    from data.bundle_generate.schema_resource import SchemaResourceCache
+    from data.bundle_generate.sessions import SessionManager
+
 
 type FormatterFunc = collections.abc.Callable[[str], str]
 type ResourcePath = str
 type ResourcePathPattern = str
 type UrlEndpoint = str
 type Checksum = str
-type ResFileIndex = list[tuple[ResourcePath, UrlEndpoint, Checksum, str, str]]
+
+
+def _has_size(path: Path, size: int) -> bool:
+    """Whether `path` is a file of `size` bytes."""
+    try:
+        return os.stat(path).st_size == size
+    except FileNotFoundError:
+        return False
 
 
 class ResourceTree:
-    @dataclass
+    """Read-only lookup of the resources in the client index.
+
+    Resources are kept in the memory-mapped `ResourceIndex`. The tree only
+    holds its sorted lookup keys and a key to position map, and builds a
+    `_FileNode` whenever a resource is looked up. Since the keys are sorted,
+    the contents of a folder are the range of keys starting with its path.
+    """
+
     class _FileNode:
-        file_name: str
-        file_path: Path
+        __slots__ = ("__cache_dir", "__key", "checksum", "compressed_size", "res_id", "size", "url")
+
         res_id: str
         url: str
         checksum: str
-
-    type _Node = dict[str, ResourceTree._Node] | _FileNode
-
-    __tree: dict[str, _Node]
+        size: int
+        compressed_size: int
+
+        def __init__(self, cache_dir: Path, key: str, entry: IndexEntry) -> None:
+            self.__cache_dir = cache_dir
+            self.__key = key
+            self.res_id = entry.res_id
+            self.url = entry.url
+            self.checksum = entry.checksum
+            self.size = entry.size
+            self.compressed_size = entry.compressed_size
+
+        @property
+        def file_name(self) -> str:
+            return self.__key.rpartition("/")[2]
+
+        @property
+        def file_path(self) -> Path:
+            return self.__cache_dir / self.__key
+
+        def __repr__(self) -> str:
+            return f"_FileNode(res_id={self.res_id!r}, checksum={self.checksum!r})"
+
+    __index: ResourceIndex
+    __cache_dir: Path
+    __keys: list[str] | None
+    __positions: dict[str, int] | None
+    __lookup_lock: threading.Lock
     __url_formatter: FormatterFunc
-
-    def __init__(self, url_formatter: FormatterFunc, cache_dir: Path, index: ResFileIndex) -> None:
-        self.__tree = {}
+    __store: ObjectStore
+    __sessions: SessionManager
+    __client_cache: Path | None
+    __schema_cache: SchemaResourceCache | None
+    __in_flight: dict[str, asyncio.Task[_FileNode]]
+
+    def __init__(
+        self,
+        url_formatter: FormatterFunc,
+        cache_dir: Path,
+        index: ResourceIndex,
+        store: ObjectStore,
+        sessions: SessionManager,
+        client_cache: Path | None = None,
+        schema_cache: SchemaResourceCache | None = None,
+    ) -> None:
+        """`client_cache` is the shared cache of a local client installation.
+
+        Resources found in its `ResFiles` folder are used instead of downloading them.
+        `schema_cache` keeps decoded schema resources, see `get_schema_decoded_resource`.
+        """
+        self.__index = index
+        self.__cache_dir = cache_dir
+        self.__keys = None
+        self.__positions = None
+        self.__lookup_lock = threading.Lock()
         self.__url_formatter = url_formatter
-
-        for res_id, url, checksum, *_ in index:
-            prev = self.__tree
-            prev_d = cache_dir
-            nodes = list(res_id.split("/"))
-
-            for i in range(1, len(nodes) - 1):
-                if ":" in nodes[i]:  # i.e. "res:" segment
-                    continue
-                prev = prev.setdefault(nodes[i], {})
-                prev_d = prev_d / nodes[i]
-
-            prev[nodes[-1]] = ResourceTree._FileNode(
-                file_name=nodes[-1],
-                file_path=prev_d / nodes[-1],
-                res_id=res_id,
-                url=url,
-                checksum=checksum,
-            )
-
-    def _get_element(self, res: ResourcePath) -> _Node | None:
-        prev = self.__tree
-        nodes = [x for x in res.split("/") if len(x) > 0]
-
-        for i in range(1, len(nodes) - 1):
-            if ":" in nodes[i]:  # i.e. "res:" segment
-                continue
-            prev = prev.setdefault(nodes[i], {})
-
-        if nodes[-1] in prev:
-            return prev[nodes[-1]]
-        return None
+        self.__store = store
+        self.__sessions = sessions
+        self.__client_cache = None
+        if client_cache is not None:
+            res_files = client_cache / "ResFiles"
+            self.__client_cache = res_files if res_files.is_dir() else client_cache
+        self.__schema_cache = schema_cache
+        self.__in_flight = {}
+
+    @property
+    def schema_cache(self) -> SchemaResourceCache | None:
+        return self.__schema_cache
+
+    def _lookup(self) -> tuple[list[str], dict[str, int]]:
+        """Load the lookup keys on first use, so that creating a `ResourceTree` is cheap."""
+        with self.__lookup_lock:
+            if self.__keys is None:
+                keys = self.__index.keys()
+                # Duplicate keys are adjacent, the last one wins like it does in the index.
+                self.__positions = {key: i for i, key in enumerate(keys)}
+                self.__keys = keys
+            return self.__keys, self.__positions
+
+    def _node(self, i: int) -> _FileNode:
+        keys, _ = self._lookup()
+        return ResourceTree._FileNode(self.__cache_dir, keys[i], self.__index[i])
+
+    def _find(self, res: ResourcePath) -> int | None:
+        _, positions = self._lookup()
+        return positions.get(resource_key(res))
+
+    def _list(self, res: ResourcePath) -> list[int]:
+        """Positions of every file below the folder `res`."""
+        keys, positions = self._lookup()
+        key = resource_key(res)
+        if not key:
+            start, end = 0, len(keys)
+        else:
+            # "0" is the character following "/", so this spans every key below the folder.
+            start = bisect.bisect_left(keys, f"{key}/")
+            end = bisect.bisect_left(keys, f"{key}0", lo=start)
+        return [i for i in range(start, end) if positions[keys[i]] == i]
+
+    def cached_resources(self) -> Iterator[_FileNode]:
+        """Every resource of the index that has a file in the cache directory."""
+        if not self.__cache_dir.is_dir():
+            return
+        _, positions = self._lookup()
+        for path in self.__cache_dir.rglob("*"):
+            i = positions.get(path.relative_to(self.__cache_dir).as_posix())
+            if i is not None and path.is_file():
+                yield self._node(i)
 
     async def _download_element(self, res: ResourcePath) -> _FileNode | None:
-        el = self._get_element(res)
-        if el is None:
-            LOGGER.error(f"Resource '{res}' not found in resource tree.")
-            return None
-        if not isinstance(el, ResourceTree._FileNode):
-            LOGGER.error(f"Resource '{res}' is not a file node.")
+        i = self._find(res)
+        if i is None:
+            if self._list(res):
+                LOGGER.error(f"Resource '{res}' is not a file node.")
+            else:
+                LOGGER.error(f"Resource '{res}' not found in resource tree.")
             return None
-        if el.file_path.exists():
+        return await self._download_node(self._node(i))
+
+    async def _download_node(self, el: _FileNode) -> _FileNode:
+        # Concurrent requests for the same resource share a single transfer.
+        task = self.__in_flight.get(el.res_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch_element(el))
+            self.__in_flight[el.res_id] = task
+            task.add_done_callback(lambda _: self.__in_flight.pop(el.res_id, None))
+        # A cancelled caller must not cancel the transfer other callers are waiting for.
+        return await asyncio.shield(task)
+
+    async def _fetch_element(self, el: _FileNode) -> _FileNode:
+        if el.checksum:
+            if await asyncio.to_thread(self._link_stored, el):
+                return el
+        elif _has_size(el.file_path, el.size):
             return el
 
+        with self.__sessions.monitor.transfer():
+            return await self._transfer_element(el)
+
+    async def _transfer_element(self, el: _FileNode) -> _FileNode:
+        res = el.res_id
+        if self.__client_cache is not None and await asyncio.to_thread(self._link_client, el):
+            self.__sessions.monitor.received(el.size)
+            return el
+
+        if el.checksum:
+            part_path = self.__store.part_path(el.checksum)
+        else:
+            el.file_path.parent.mkdir(parents=True, exist_ok=True)
+            part_path = el.file_path.with_name(f"{el.file_name}.part")
+        # Retries resume from the data downloaded so far, failed downloads leave it behind.
+        tmp_path = transfer.claim_part(part_path)
+
         @retry(
             stop=stop_after_attempt(3),
             wait=wait_exponential(),
             after=after_log(LOGGER, logging.WARNING),
+            before_sleep=self.__sessions.monitor.retried,
             reraise=True,
         )
-        async def download() -> ResourceTree._FileNode:
-            async with (
-                SEMAPHORE,
-                aiohttp.ClientSession() as session,
-                session.get(self.__url_formatter(el.url)) as resp,
-            ):
-                resp.raise_for_status()
+        async def download() -> None:
+            digest = await transfer.download(
+                self.__sessions,
+                self.__url_formatter(el.url),
+                tmp_path,
+                size=el.size,
+                segments=self.__sessions.limits.segments,
+            )
+            if el.checksum and digest != el.checksum:
+                tmp_path.unlink(missing_ok=True)
+                raise RuntimeError(
+                    f"Checksum mismatch for resource '{res}': expected {el.checksum}, got {digest}"
+                )
 
-                el.file_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            await download()
+        except BaseException:
+            transfer.release_part(tmp_path, part_path)
+            raise
 
-                with open(el.file_path, "wb") as f:
-                    async for chunk in resp.content.iter_chunked(8192):
-                        f.write(chunk)
-                LOGGER.info(f"Downloaded resource '{res}' to '{el.file_path}'")
+        if el.checksum:
+            await asyncio.to_thread(self._store_download, el, tmp_path)
+        else:
+            os.replace(tmp_path, el.file_path)
 
-                if el.checksum:
-                    md5 = hashlib.md5()
-                    with open(el.file_path, "rb") as f:
-                        md5.update(f.read())
-                    if md5.hexdigest() != el.checksum:
-                        raise RuntimeError(
-                            f"Checksum mismatch for resource '{res}': expected {el.checksum}, got {md5.hexdigest()}"
-                        )
+        LOGGER.info(f"Downloaded resource '{res}' to '{el.file_path}'")
+        return el
 
-                return el
+    def _store_download(self, el: _FileNode, tmp_path: Path) -> None:
+        link_or_copy(self.__store.add(el.checksum, tmp_path), el.file_path)
 
-        return await download()
+    def _link_stored(self, el: _FileNode) -> bool:
+        """Point the cache path of a resource at its stored object, if it was downloaded before."""
+        stored = self.__store.get(el.checksum)
+        if stored is None or not _has_size(stored, el.size):
+            stored = self.__store.adopt(el.checksum, el.file_path)
+            if stored is None:
+                return False
+
+        link_or_copy(stored, el.file_path)
+        return True
 
     def get_resource(self, res: ResourcePath) -> _FileNode | None:
-        el = self._get_element(res)
-        return el
+        i = self._find(res)
+        return None if i is None else self._node(i)
 
     async def download_resource(self, res: ResourcePath) -> _FileNode | None:
         el = await self._download_element(res)
         return el
 
     def get_resources(self, res: ResourcePath) -> list[_FileNode] | None:
-        el = self._get_element(res)
-        if el is None:
-            return None
-        if isinstance(el, ResourceTree._FileNode):
-            return [el]
-
-        resources = []
-        for key, value in el.items():
-            if isinstance(value, ResourceTree._FileNode):
-                resources.append(value)
+        """The resource `res`, or every resource below the folder `res`."""
+        i = self._find(res)
+        if i is not None:
+            return [self._node(i)]
 
-            else:
-                sub_resources = self.get_resources(f"{res}/{key}")
-                if sub_resources:
-                    resources.extend(sub_resources)
-
-        return resources
+        positions = self._list(res)
+        if not positions:
+            return None
+        return [self._node(i) for i in positions]
 
     async def download_resources(self, res: ResourcePath) -> list[_FileNode] | None:
-        el = self._get_element(res)
-        if el is None:
+        resources = self.get_resources(res)
+        if resources is None:
             return None
-        if isinstance(el, ResourceTree._FileNode):
-            downloaded = await self._download_element(res)
-            return [downloaded] if downloaded else []
-
-        tasks = []
-        for key, value in el.items():
-            if isinstance(value, ResourceTree._FileNode):
-                tasks.append(self._download_element(value.res_id))
-            else:
-                tasks.append(self.download_resources(f"{res}/{key}"))
+        return list(await asyncio.gather(*(self._download_node(el) for el in resources)))
+
+    def _link_client(self, el: _FileNode) -> bool:
+        """Point the cache path of a resource at its file in the client cache, if it is there."""
+        src = self.in_client_cache(el)
+        if src is None:
+            return False
+
+        # The client rewrites its cache files in place, so they are never linked to.
+        if el.checksum:
+            stored = self.__store.adopt(el.checksum, src, copy=True)
+            if stored is None:
+                LOGGER.warning(f"Client cache file '{src}' of '{el.res_id}' has a wrong checksum.")
+                return False
+            link_or_copy(stored, el.file_path)
+        else:
+            clone_or_copy(src, el.file_path)
+
+        LOGGER.debug(f"Placed resource '{el.res_id}' from the client cache.")
+        return True
+
+    def in_client_cache(self, el: _FileNode) -> Path | None:
+        """The file of the resource in the client cache, if there is one."""
+        if self.__client_cache is None or not el.url:
+            return None
+        src = self.__client_cache / el.url
+        return src if src.is_file() else None
 
-        return await asyncio.gather(*tasks)
+    def is_cached(self, el: _FileNode) -> bool:
+        """Whether the resource can be placed without downloading it.
+
+        A cached file whose size differs from the index, e.g. one left truncated
+        or from an older version of the resource, has to be downloaded again.
+        """
+        if _has_size(el.file_path, el.size):
+            return True
+        return bool(el.checksum) and _has_size(self.__store.object_path(el.checksum), el.size)
+
+    async def download_all(
+        self, resources: list[_FileNode], groups: Mapping[ResourcePath, str] | None = None
+    ) -> int:
+        """Download resources in the given order, returns the number of failed downloads.
+
+        Transfers are started in order and a host grants its download slots
+        in the order they are requested, see `HostLimiter`, so the order is kept
+        up to the object store and client cache lookups done before each transfer,
+        which finish in any order. Requests for a resource still being downloaded
+        share its transfer. Each transfer is attributed to its group in `groups`,
+        see `progress.transfer_group`.
+        """
+        results = await asyncio.gather(
+            *(self._download_planned(el, groups) for el in resources), return_exceptions=True
+        )
+
+        failed = 0
+        for el, result in zip(resources, results, strict=True):
+            if isinstance(result, BaseException):
+                LOGGER.warning(f"Planned download of '{el.res_id}' failed: {result!r}")
+                failed += 1
+        return failed
+
+    async def _download_planned(
+        self, el: _FileNode, groups: Mapping[ResourcePath, str] | None
+    ) -> _FileNode:
+        if groups is None or el.res_id not in groups:
+            return await self._download_node(el)
+        with transfer_group(groups[el.res_id]):
+            return await self._download_node(el)
 
     async def get_schema_decoded_resource[T](
         self, schema_res: ResourcePath, bin_res: ResourcePath
     ) -> T | None:
         """Get and decode a resource using its schema and binary data resources.
 
-        See `schema_loader` module for details on decoding.
-
-        Note: This function returns a `T`, and the caller is responsible for ensuring
-        that the decoded type matches the expected type `T`.
+        See `schema_resource.get_schema_resource`.
         """
+        return await get_schema_resource(self, schema_res, bin_res)
 
-        schema_el = await self._download_element(schema_res)
-        bin_el = await self._download_element(bin_res)
-
-        if schema_el is None or bin_el is None:
-            LOGGER.error(
-                f"Failed to get schema or binary resource for '{schema_res}' and '{bin_res}'"
-            )
-            return None
-
-        with open(schema_el.file_path, "r", encoding="utf-8") as schema_file:
-            schema = yaml.load(schema_file, yaml.CFullLoader)
-        with open(bin_el.file_path, "rb") as bin_file:
-            bin_data = bin_file.read()
 
-        out = schema_loader.binaryLoader.LoadFromString(schema, bin_data)
-        result = schema_loader.convert.convert_to_serializable(out)
+class Fsd:
+    """The FSD documents of a workspace, parsed from their JSON exports.
 
-        return result
+    With a `cache_dir`, parsed documents are also kept there in a binary
+    format that loads much faster than JSON, see `FsdCache`.
 
+    Documents loaded by `get_fsd` are kept in memory. A document whose
+    consumers were announced by `retain` is released once the last of them
+    called `release`, any other document is kept for the lifetime of the `Fsd`.
+    """
 
-class Fsd:
     __fsd_dir: Path
+    __disk_cache: FsdCache | None
     __cache: dict[str, typing.Any]
+    __consumers: dict[str, int]
+    __preloads: dict[str, Future[None]]
+    __locks: collections.defaultdict[str, threading.Lock]
+    __locks_guard: threading.Lock
 
-    def __init__(self, fsd_dir: Path):
+    def __init__(self, fsd_dir: Path, cache_dir: Path | None = None):
         self.__fsd_dir = fsd_dir
         if not self.__fsd_dir.exists() or not self.__fsd_dir.is_dir():
             LOGGER.error(f"FSD directory '{fsd_dir}' does not exist or is not a directory.")
             raise RuntimeError(f"FSD directory '{fsd_dir}' does not exist or is not a directory.")
         LOGGER.info(f"Initialized FSD with directory '{fsd_dir}'")
+        self.__disk_cache = None if cache_dir is None else FsdCache(cache_dir)
         self.__cache = {}
+        self.__consumers = {}
+        self.__preloads = {}
+        self.__locks = collections.defaultdict(threading.Lock)
+        self.__locks_guard = threading.Lock()
+
+    def clear_cache(self) -> None:
+        """Remove the binary cache of parsed documents."""
+        if self.__disk_cache is not None:
+            self.__disk_cache.clear()
+
+    def preload(self, fsd_names: Iterable[str]) -> None:
+        """Parse FSD documents into the binary cache in worker processes, in the given order.
+
+        This returns at once. `get_fsd` and `iter_fsd` wait for a document being
+        preloaded, and then read it from the binary cache instead of the JSON file.
+        Documents already loaded or cached are left out. Without a binary cache,
+        or a CPU to spare, nothing is preloaded.
+        """
+        if self.__disk_cache is None:
+            return
+
+        pending = []
+        for fsd_name in dict.fromkeys(fsd_names):
+            fsd_path = self.get_fsd_path(fsd_name)
+            if (
+                fsd_name in self.__cache
+                or fsd_name in self.__preloads
+                or not fsd_path.is_file()
+                or self.__disk_cache.is_current(fsd_name, fsd_path)
+            ):
+                continue
+            pending.append((fsd_name, fsd_path))
+        # Leave a CPU to the build itself, it would only compete with the workers otherwise.
+        workers = min(len(pending), (os.cpu_count() or 1) - 1)
+        if workers < 1:
+            return
+
+        LOGGER.info(f"Preloading {len(pending)} FSD documents in {workers} worker processes")
+        # Always spawn: forking a process that runs an event loop and worker threads is unsafe.
+        # Workers import this package, and with it a file log that would truncate the build's.
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=disable_file_log,
+        )
+        for fsd_name, fsd_path in pending:
+            self.__preloads[fsd_name] = executor.submit(self.__disk_cache.build, fsd_name, fsd_path)
+        # The workers exit once every submitted document is parsed.
+        executor.shutdown(wait=False)
+
+    def _wait_preload(self, fsd_name: str) -> None:
+        future = self.__preloads.get(fsd_name)
+        if future is None:
+            return
+        try:
+            future.result()
+        except Exception as e:
+            LOGGER.warning(f"Unable to preload FSD data '{fsd_name}': {e!r}")
+
+    def retain(self, inputs: Iterable[str]) -> None:
+        """Count a consumer of every document among the `fsd:` keys of `inputs`."""
+        with self.__locks_guard:
+            for fsd_name in self._documents(inputs):
+                self.__consumers[fsd_name] = self.__consumers.get(fsd_name, 0) + 1
+
+    def release(self, inputs: Iterable[str]) -> None:
+        """Finish a consumer counted by `retain`, dropping the documents it was the last one of."""
+        with self.__locks_guard:
+            for fsd_name in self._documents(inputs):
+                consumers = self.__consumers.get(fsd_name, 0)
+                if not consumers:
+                    continue
+                self.__consumers[fsd_name] = consumers - 1
+                if consumers == 1 and self.__cache.pop(fsd_name, None) is not None:
+                    LOGGER.info(f"Released FSD data '{fsd_name}'")
+
+    @staticmethod
+    def _documents(inputs: Iterable[str]) -> set[str]:
+        return {key.removeprefix("fsd:") for key in inputs if key.startswith("fsd:")}
+
+    def _keep(self, fsd_name: str, fsd_data: typing.Any) -> None:
+        with self.__locks_guard:
+            # Every announced consumer is done, a late caller must not pin the document.
+            if self.__consumers.get(fsd_name, 1):
+                self.__cache[fsd_name] = fsd_data
+
+    def get_fsd_path(self, fsd_name: str) -> Path:
+        return self.__fsd_dir / f"{fsd_name}.json"
+
+    def iter_fsd(self, fsd_name: str) -> Iterator[tuple[str, typing.Any]] | None:
+        """The `(key, record)` pairs of an FSD document, or None if it does not exist.
+
+        Unless the document was already loaded by `get_fsd`, records are parsed
+        from the file one at a time as they are consumed, and are not cached.
+        Use it for collectors reading a document once, front to back.
+        A malformed document is logged and its error is raised once it is reached,
+        so the collector reading it fails instead of writing partial outputs.
+        """
+        fsd_data = self.__cache.get(fsd_name)
+        if fsd_data is not None:
+            return iter(fsd_data.items())
+
+        fsd_path = self.get_fsd_path(fsd_name)
+        if not fsd_path.is_file():
+            LOGGER.error(f"FSD file '{fsd_path}' does not exist or is not a file.")
+            return None
+
+        self._wait_preload(fsd_name)
+        if self.__disk_cache is not None:
+            records = self.__disk_cache.records(fsd_name, fsd_path)
+            if records is not None:
+                LOGGER.info(f"Streaming cached FSD data of '{fsd_path}'")
+                return records
+        return self._stream_fsd(fsd_name, fsd_path)
+
+    def _stream_fsd(self, fsd_name: str, fsd_path: Path) -> Iterator[tuple[str, typing.Any]]:
+        LOGGER.info(f"Streaming FSD data from '{fsd_path}'")
+        writer = None if self.__disk_cache is None else self.__disk_cache.writer(fsd_name, fsd_path)
+        try:
+            with open(fsd_path, "r", encoding="utf-8") as f:
+                for key, record in json_stream.iter_object(f):
+                    if writer is not None:
+                        writer.add(key, record)
+                    yield key, record
+            if writer is not None:
+                writer.commit()
+        except (OSError, ValueError) as e:
+            LOGGER.error(f"Unable to load FSD data from '{fsd_path}': {e}")
+            raise
+        finally:
+            if writer is not None:
+                writer.abort()
 
     def get_fsd[T = dict](self, fsd_name: str) -> T | None:
-        if fsd_name in self.__cache:
-            return self.__cache[fsd_name]
+        # Stages may run in worker threads, make sure each document is parsed only once.
+        with self.__locks_guard:
+            lock = self.__locks[fsd_name]
+        with lock:
+            return self._load_fsd(fsd_name)
+
+    def _load_fsd[T = dict](self, fsd_name: str) -> T | None:
+        fsd_data = self.__cache.get(fsd_name)
+        if fsd_data is not None:
+            return fsd_data
 
-        fsd_path = self.__fsd_dir / f"{fsd_name}.json"
+        fsd_path = self.get_fsd_path(fsd_name)
         if not fsd_path.exists() or not fsd_path.is_file():
             LOGGER.error(f"FSD file '{fsd_path}' does not exist or is not a file.")
             return None
 
+        self._wait_preload(fsd_name)
+        if self.__disk_cache is not None:
+            fsd_data = self.__disk_cache.load(fsd_name, fsd_path)
+            if fsd_data is not None:
+                LOGGER.info(f"Loaded cached FSD data of '{fsd_path}'")
+                self._keep(fsd_name, fsd_data)
+                return fsd_data
+
         try:
             with open(fsd_path, "r", encoding="utf-8") as f:
                 fsd_data = json.load(f)
             LOGGER.info(f"Loaded FSD data from '{fsd_path}'")
-            self.__cache[fsd_name] = fsd_data
+            if self.__disk_cache is not None and isinstance(fsd_data, dict):
+                self.__disk_cache.store(fsd_name, fsd_path, fsd_data.items())
+            self._keep(fsd_name, fsd_data)
             return fsd_data
         except Exception as e:
             LOGGER.error(f"Unable to load FSD data from '{fsd_path}': {e}")
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING
+
+from data.bundle_generate.log import LOGGER
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+    from collections.abc import Callable
+
+
+type StageRunner = Callable[[], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class Stage:
+    """A unit of bundle generation work.
+
+    `inputs` and `outputs` are opaque keys. Outputs are paths relative to the
+    bundle root (e.g. `static/types.pb` or a whole folder such as `images`),
+    inputs are either such paths or external keys like `fsd:types` and
+    `res:/staticdata/regions.static`. A stage depends on every stage that
+    produces one of its inputs.
+    """
+
+    name: str
+    run: StageRunner
+    inputs: frozenset[str] = field(default_factory=frozenset)
+    outputs: frozenset[str] = field(default_factory=frozenset)
+
+
+def _overlaps(a: str, b: str) -> bool:
+    """Check whether two stage keys refer to the same file or folder."""
+    a = a.rstrip("/")
+    b = b.rstrip("/")
+    return a == b or a.startswith(f"{b}/") or b.startswith(f"{a}/")
+
+
+class StageScheduler:
+    """Run stages concurrently, honoring the dependencies between them."""
+
+    __stages: dict[str, Stage]
+
+    def __init__(self) -> None:
+        self.__stages = {}
+
+    def add(self, stage: Stage) -> None:
+        if stage.name in self.__stages:
+            raise ValueError(f"Stage '{stage.name}' is already scheduled.")
+
+        for other in self.__stages.values():
+            for output in stage.outputs:
+                if any(_overlaps(output, o) for o in other.outputs):
+                    raise ValueError(
+                        f"Stage '{stage.name}' output '{output}' conflicts with stage '{other.name}'."
+                    )
+
+        self.__stages[stage.name] = stage
+
+    def dependencies(self, stage: Stage) -> set[str]:
+        return {
+            other.name
+            for other in self.__stages.values()
+            if other.name != stage.name
+            and any(_overlaps(i, o) for i in stage.inputs for o in other.outputs)
+        }
+
+    def _check_acyclic(self) -> None:
+        deps = {name: self.dependencies(stage) for name, stage in self.__stages.items()}
+        visited: set[str] = set()
+        visiting: set[str] = set()
+
+        def visit(name: str) -> None:
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage dependency cycle detected at '{name}'.")
+            visiting.add(name)
+            for dep in deps[name]:
+                visit(dep)
+            visiting.remove(name)
+            visited.add(name)
+
+        for name in deps:
+            visit(name)
+
+    async def run(self) -> None:
+        """Run all scheduled stages.
+
+        Independent stages run concurrently. If any stage fails, the remaining
+        stages are cancelled and the error is propagated.
+        """
+
+        self._check_acyclic()
+
+        done = {name: asyncio.Event() for name in self.__stages}
+
+        async def run_stage(stage: Stage) -> None:
+            deps = self.dependencies(stage)
+            if deps:
+                LOGGER.info(f"Stage '{stage.name}' waiting for: {', '.join(sorted(deps))}")
+                for dep in deps:
+                    await done[dep].wait()
+
+            LOGGER.info(f"Stage '{stage.name}' started.")
+            start = time.perf_counter()
+            await stage.run()
+            LOGGER.info(
+                f"Stage '{stage.name}' finished in {time.perf_counter() - start:.2f} seconds."
+            )
+            done[stage.name].set()
+
+        async with asyncio.TaskGroup() as tg:
+            for stage in self.__stages.values():
+                tg.create_task(run_stage(stage), name=f"stage-{stage.name}")
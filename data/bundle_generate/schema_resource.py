@@ -1,21 +1,116 @@
 from __future__ import annotations
 
+import asyncio
+import os
+import pickle
+import shutil
+import typing
+import uuid
+
 from typing import TYPE_CHECKING
 
 import yaml
 
 from data import schema_loader
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.resource_index import resource_key
 
 
 if TYPE_CHECKING:
+    from pathlib import Path
+
     from data.bundle_generate.resources import ResourcePath
     from data.bundle_generate.resources import ResourceTree
 
 
+# Bump this to invalidate every decoded resource, e.g. when `schema_loader` changes its output.
+SCHEMA_CACHE_VERSION = 1
+
+
+class SchemaResourceCache:
+    """Decoded schema resources, stored in `cache_dir`.
+
+    A decoded resource is keyed by the `resfileindex.txt` checksums of its
+    schema and its binary data, so it is never decoded twice from the same
+    inputs. Only the latest decoded version of each binary resource is kept.
+    """
+
+    __cache_dir: Path
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.__cache_dir = cache_dir
+
+    def clear(self) -> None:
+        if self.__cache_dir.exists():
+            shutil.rmtree(self.__cache_dir)
+            LOGGER.info(f"Removed decoded resource cache directory '{self.__cache_dir}'.")
+
+    def contains(self, schema: ResourceTree._FileNode, bin_data: ResourceTree._FileNode) -> bool:
+        """Whether the resource decoded from these inputs is cached."""
+        path = self._path(schema, bin_data)
+        return path is not None and path.is_file()
+
+    def load(self, schema: ResourceTree._FileNode, bin_data: ResourceTree._FileNode) -> typing.Any:
+        """The decoded resource, or None if it is not cached."""
+        path = self._path(schema, bin_data)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            LOGGER.warning(f"Unable to read decoded resource '{path}': {e!r}")
+            return None
+
+    def store(
+        self, schema: ResourceTree._FileNode, bin_data: ResourceTree._FileNode, data: typing.Any
+    ) -> None:
+        path = self._path(schema, bin_data)
+        if path is None:
+            return
+
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError, TypeError) as e:
+            tmp_path.unlink(missing_ok=True)
+            LOGGER.warning(f"Unable to cache decoded resource '{bin_data.res_id}': {e!r}")
+            return
+
+        # Versions decoded from older inputs are never read again.
+        for stale in path.parent.glob("*.pickle"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+    def _path(
+        self, schema: ResourceTree._FileNode, bin_data: ResourceTree._FileNode
+    ) -> Path | None:
+        if not schema.checksum or not bin_data.checksum:
+            return None
+        return (
+            self.__cache_dir
+            / resource_key(bin_data.res_id)
+            / f"v{SCHEMA_CACHE_VERSION}-{schema.checksum}-{bin_data.checksum}.pickle"
+        )
+
+
 async def get_schema_resource[T = dict](
     index: ResourceTree, schema_res: ResourcePath, bin_res: ResourcePath
 ) -> T | None:
+    """Decode the binary resource `bin_res` with the schema resource `schema_res`.
+
+    See `schema_loader` module for details on decoding. With a schema cache,
+    see `ResourceTree.schema_cache`, a resource decoded by an earlier build is
+    read from the cache, without downloading its inputs.
+
+    Note: This function returns a `T`, and the caller is responsible for ensuring
+    that the decoded type matches the expected type `T`.
+    """
     schema = index.get_resource(schema_res)
     if schema is None:
         LOGGER.error(f"Schema resource '{schema_res}' not found in index.")
@@ -26,16 +121,30 @@ async def get_schema_resource[T = dict](
         LOGGER.error(f"Binary resource '{bin_res}' not found in index.")
         return None
 
+    cache = index.schema_cache
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.load, schema, bin_data)
+        if cached is not None:
+            LOGGER.info(f"Loaded decoded resource '{bin_res}' from the cache.")
+            return cached
+
     await index.download_resource(schema_res)
     await index.download_resource(bin_res)
 
-    with open(schema.file_path, "r", encoding="utf-8") as f:
+    result: T = await asyncio.to_thread(
+        _decode_schema_resource, schema.file_path, bin_data.file_path
+    )
+    if cache is not None:
+        await asyncio.to_thread(cache.store, schema, bin_data, result)
+    return result
+
+
+def _decode_schema_resource(schema_path: Path, bin_path: Path) -> typing.Any:
+    with open(schema_path, "r", encoding="utf-8") as f:
         schema_dict = yaml.load(f, yaml.CFullLoader)
 
-    with open(bin_data.file_path, "rb") as f:
+    with open(bin_path, "rb") as f:
         bin_bytes = f.read()
 
     out_loader = schema_loader.binaryLoader.LoadFromString(bin_bytes, schema_dict)
-    result: T = schema_loader.convert.convert_to_serializable(out_loader)
-
-    return result
+    return schema_loader.convert.convert_to_serializable(out_loader)
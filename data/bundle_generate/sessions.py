@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import contextlib
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+from typing import Self
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from data.bundle_generate.concurrency import ConcurrencyLimits
+from data.bundle_generate.concurrency import HostLimiter
+from data.bundle_generate.log import LOGGER
+from data.bundle_generate.progress import TransferMonitor
+
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+    from types import TracebackType
+
+
+class SessionManager:
+    """HTTP session shared by every download of a build.
+
+    Connections are pooled and kept alive per host and DNS lookups are cached,
+    so downloading thousands of small files does not pay for a TCP and TLS
+    handshake each. Concurrent requests are limited per host by an adaptive
+    `HostLimiter`, and the progress of the downloads is tracked by `monitor`.
+    Downloads are written to disk on the `io` thread pool. The
+    session and the pool are opened by entering the manager and closed when
+    leaving it.
+    """
+
+    __limits: ConcurrencyLimits
+    __limit: int
+    __keepalive_timeout: float
+    __dns_cache_ttl: int
+
+    __session: aiohttp.ClientSession | None
+    __io: ThreadPoolExecutor | None
+    __limiters: dict[str, HostLimiter]
+    __monitor: TransferMonitor
+
+    def __init__(
+        self,
+        limits: ConcurrencyLimits | None = None,
+        limit: int = 100,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+    ) -> None:
+        self.__limits = limits or ConcurrencyLimits()
+        self.__limit = limit
+        self.__keepalive_timeout = keepalive_timeout
+        self.__dns_cache_ttl = dns_cache_ttl
+        self.__session = None
+        self.__io = None
+        self.__limiters = {}
+        self.__monitor = TransferMonitor()
+
+    @property
+    def limits(self) -> ConcurrencyLimits:
+        return self.__limits
+
+    @property
+    def monitor(self) -> TransferMonitor:
+        return self.__monitor
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self.__session is None or self.__session.closed:
+            raise RuntimeError("HTTP session is not open.")
+        return self.__session
+
+    @property
+    def io(self) -> ThreadPoolExecutor:
+        """The thread pool downloads are written to disk on."""
+        if self.__io is None:
+            raise RuntimeError("HTTP session is not open.")
+        return self.__io
+
+    def limiter(self, url: str) -> HostLimiter:
+        host = urlsplit(url).netloc
+        limiter = self.__limiters.get(host)
+        if limiter is None:
+            limiter = self.__limiters[host] = HostLimiter(host, self.__limits)
+        return limiter
+
+    @contextlib.asynccontextmanager
+    async def get(
+        self,
+        url: str,
+        headers: dict[str, str] | None = None,
+        timeout: aiohttp.ClientTimeout | None = None,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """GET `url` within the concurrency limit of its host."""
+        limiter = self.limiter(url)
+        async with (
+            limiter.request() as request,
+            self.session.get(
+                url, headers=headers, timeout=timeout or self.session.timeout
+            ) as response,
+        ):
+            limiter.observe(request, response)
+            yield response
+
+    def received(self, url: str, size: int) -> None:
+        """Account `size` bytes of content received from `url`."""
+        self.limiter(url).received(size)
+        self.__monitor.received(size)
+
+    def report(self) -> list[dict]:
+        return [limiter.report() for limiter in self.__limiters.values()]
+
+    async def __aenter__(self) -> Self:
+        connector = aiohttp.TCPConnector(
+            limit=self.__limit,
+            limit_per_host=self.__limits.maximum,
+            keepalive_timeout=self.__keepalive_timeout,
+            ttl_dns_cache=self.__dns_cache_ttl,
+        )
+        self.__session = aiohttp.ClientSession(connector=connector)
+        self.__io = ThreadPoolExecutor(
+            max_workers=self.__limits.io_threads, thread_name_prefix="download-io"
+        )
+        LOGGER.debug(
+            f"Opened HTTP session ({self.__limits.initial} to {self.__limits.maximum} "
+            "concurrent requests per host)."
+        )
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+            LOGGER.debug("Closed HTTP session.")
+        if self.__io is not None:
+            self.__io.shutdown()
+            self.__io = None
+
+        for report in self.report():
+            LOGGER.info(
+                f"Download concurrency for '{report['host']}' settled at {report['concurrency']} "
+                f"(peak {report['peak_in_flight']}, {report['requests']} requests, "
+                f"{report['throttled']} throttled, {report['errors']} errors)."
+            )
+            LOGGER.info(
+                f"Downloaded {report['bytes'] / 1024**2:.1f} MiB from '{report['host']}' "
+                f"in {report['busy_time']:.1f}s ({report['throughput'] / 1024**2:.2f} MiB/s)."
+            )
@@ -2,7 +2,12 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from data.bundle_generate.consts import SKIN_LICENSES_STATIC_RES
+from data.bundle_generate.consts import SKIN_MATERIALS_STATIC_RES
+from data.bundle_generate.consts import SKINS_STATIC_RES
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.pipeline import Collector
+from data.bundle_generate.pipeline import stage_keys
 from data.bundle_generate.static import categories
 from data.bundle_generate.static import factions
 from data.bundle_generate.static import groups
@@ -20,8 +25,10 @@ if TYPE_CHECKING:
     from pathlib import Path
 
     from data.bundle_generate import Metadata
+    from data.bundle_generate.pipeline import CollectorRunner
     from data.bundle_generate.resources import Fsd
     from data.bundle_generate.resources import ResourceTree
+    from data.bundle_generate.sessions import SessionManager
 
 
 class StaticDataGenerator:
@@ -30,30 +37,140 @@ class StaticDataGenerator:
     __fsd: Fsd
     __index: ResourceTree
     __metadata: Metadata
+    __runner: CollectorRunner
+    __sessions: SessionManager
 
-    def __init__(self, bundle_root: Path, fsd: Fsd, index: ResourceTree, metadata: Metadata):
+    __collectors: list[Collector]
+
+    def __init__(
+        self,
+        bundle_root: Path,
+        fsd: Fsd,
+        index: ResourceTree,
+        metadata: Metadata,
+        runner: CollectorRunner,
+        sessions: SessionManager,
+    ):
         self.__root = bundle_root / "static"
         self.__loc_root = bundle_root / "localizations"
         self.__fsd = fsd
         self.__index = index
         self.__metadata = metadata
+        self.__runner = runner
+        self.__sessions = sessions
 
         self.__root.mkdir(parents=True, exist_ok=True)
 
+        # The synchronous collectors below are CPU-bound, the runner moves them off
+        # the event loop so that other stages keep making progress meanwhile.
+        self.__collectors = [
+            Collector(
+                name="static.type_definitions",
+                func=type_definitions.collect_type_definitions,
+                args=(self.__fsd, self.__root, self.__loc_root),
+                inputs=frozenset({"fsd:types"}),
+                outputs=frozenset({"static/types.pb", "localizations/type_localization_lookup.pb"}),
+            ),
+            Collector(
+                name="static.type_dogma",
+                func=type_dogma.collect_type_dogma,
+                args=(self.__fsd, self.__root),
+                inputs=frozenset({"fsd:typeDogma"}),
+                outputs=frozenset({"static/type_dogma.db"}),
+            ),
+            Collector(
+                name="static.type_materials",
+                func=type_materials.collect_type_materials,
+                args=(self.__fsd, self.__root),
+                inputs=frozenset({"fsd:typematerials"}),
+                outputs=frozenset({"static/type_materials.db"}),
+            ),
+            Collector(
+                name="static.categories",
+                func=categories.collect_categories,
+                args=(self.__fsd, self.__root),
+                inputs=frozenset({"fsd:categories"}),
+                outputs=frozenset({"static/categories.pb"}),
+            ),
+            Collector(
+                name="static.groups",
+                func=groups.collect_groups,
+                args=(self.__fsd, self.__root),
+                inputs=frozenset({"fsd:groups"}),
+                outputs=frozenset({"static/groups.pb"}),
+            ),
+            Collector(
+                name="static.meta_groups",
+                func=meta_groups.collect_meta_groups,
+                args=(self.__fsd, self.__root),
+                inputs=frozenset({"fsd:metagroups"}),
+                outputs=frozenset({"static/meta_groups.pb"}),
+            ),
+            Collector(
+                name="static.factions",
+                func=factions.collect_factions,
+                args=(self.__fsd, self.__root),
+                inputs=frozenset({"fsd:factions"}),
+                outputs=frozenset({"static/factions.pb"}),
+            ),
+            Collector(
+                name="static.market_groups",
+                func=market_groups.collect_market_groups,
+                args=(self.__fsd, self.__root),
+                inputs=frozenset({"fsd:marketgroups", "fsd:types"}),
+                outputs=frozenset({"static/market_groups.pb"}),
+            ),
+            Collector(
+                name="static.npc_corporations",
+                func=npc_corporations.collect_npc_corporations,
+                args=(self.__fsd, self.__root, self.__loc_root),
+                inputs=frozenset({"fsd:npccorporations"}),
+                outputs=frozenset(
+                    {
+                        "static/npc_corporations.db",
+                        "localizations/npc_corporation_localization_lookup.pb",
+                    }
+                ),
+            ),
+            Collector(
+                name="static.station_operations",
+                func=station_operations.collect_station_operation,
+                args=(self.__fsd, self.__root, self.__loc_root),
+                inputs=frozenset({"fsd:stationoperations"}),
+                outputs=frozenset(
+                    {
+                        "static/station_operations.db",
+                        "localizations/station_operation_localization_lookup.pb",
+                    }
+                ),
+            ),
+            Collector(
+                name="static.skin_infos",
+                func=skin_infos.collect_skin_infos,
+                args=(self.__fsd, self.__index, self.__root),
+                inputs=frozenset(
+                    {SKINS_STATIC_RES, SKIN_MATERIALS_STATIC_RES, SKIN_LICENSES_STATIC_RES}
+                ),
+                outputs=frozenset({"static/skins.db"}),
+            ),
+        ]
+
+    @property
+    def collectors(self) -> list[Collector]:
+        return self.__collectors
+
+    @property
+    def inputs(self) -> frozenset[str]:
+        return stage_keys(self.__collectors)[0]
+
+    @property
+    def outputs(self) -> frozenset[str]:
+        return stage_keys(self.__collectors)[1]
+
     async def load(self):
         LOGGER.info("Loading static data...")
 
-        type_definitions.collect_type_definitions(self.__fsd, self.__root, self.__loc_root)
-        type_dogma.collect_type_dogma(self.__fsd, self.__root)
-        type_materials.collect_type_materials(self.__fsd, self.__root)
-        categories.collect_categories(self.__fsd, self.__root)
-        groups.collect_groups(self.__fsd, self.__root)
-        meta_groups.collect_meta_groups(self.__fsd, self.__root)
-        factions.collect_factions(self.__fsd, self.__root)
-        market_groups.collect_market_groups(self.__fsd, self.__root)
-        npc_corporations.collect_npc_corporations(self.__fsd, self.__root, self.__loc_root)
-        station_operations.collect_station_operation(self.__fsd, self.__root, self.__loc_root)
-
-        await skin_infos.collect_skin_infos(self.__fsd, self.__index, self.__root)
+        for collector in self.__collectors:
+            await self.__runner.run(collector)
 
         LOGGER.info("Static data loaded successfully.")
@@ -8,6 +8,7 @@ from pydantic import ValidationError
 
 from data import schema_pb2
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import write_output
 from data.bundle_generate.types import BoolInt  # noqa: TC001
 
 
@@ -58,10 +59,8 @@ def collect_categories(fsd: Fsd, bundle_static: Path):
     bundle_static_categories = bundle_static / "categories.pb"
     if bundle_static_categories.exists():
         LOGGER.warning(f"Categories file '{bundle_static_categories}' already exists. Overwriting.")
-        bundle_static_categories.unlink()
 
-    with open(bundle_static_categories, "wb") as f:
-        f.write(category_collection.SerializeToString())
+    write_output(bundle_static_categories, category_collection.SerializeToString())
 
     LOGGER.info(
         f"Wrote {len(category_collection.categories)} categories to '{bundle_static_categories}'"
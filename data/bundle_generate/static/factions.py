@@ -8,6 +8,7 @@ from pydantic import ValidationError
 
 from data import schema_pb2
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import write_output
 from data.bundle_generate.types import BoolInt  # noqa: TC001
 
 
@@ -74,7 +75,5 @@ def collect_factions(fsd: Fsd, bundle_static: Path):
     bundle_static_factions = bundle_static / "factions.pb"
     if bundle_static_factions.exists():
         LOGGER.warning(f"Factions file '{bundle_static_factions}' already exists. Overwriting.")
-        bundle_static_factions.unlink()
 
-    with open(bundle_static_factions, "wb") as f:
-        f.write(faction_collection.SerializeToString())
+    write_output(bundle_static_factions, faction_collection.SerializeToString())
@@ -8,6 +8,7 @@ from pydantic import ValidationError
 
 from data import schema_pb2
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import write_output
 from data.bundle_generate.types import BoolInt  # noqa: TC001
 
 
@@ -68,9 +69,7 @@ def collect_groups(fsd: Fsd, bundle_static: Path):
     bundle_static_groups = bundle_static / "groups.pb"
     if bundle_static_groups.exists():
         LOGGER.warning(f"Groups file '{bundle_static_groups}' already exists. Overwriting.")
-        bundle_static_groups.unlink()
 
-    with open(bundle_static_groups, "wb") as f:
-        f.write(group_collection.SerializeToString())
+    write_output(bundle_static_groups, group_collection.SerializeToString())
 
     LOGGER.info(f"Collected {len(group_collection.groups)} groups into '{bundle_static_groups}'.")
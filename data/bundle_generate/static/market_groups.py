@@ -10,6 +10,7 @@ from pydantic import ValidationError
 
 from data import schema_pb2
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import write_output
 from data.bundle_generate.types import BoolInt  # noqa: TC001
 
 
@@ -29,7 +30,8 @@ class _MarketGroup(BaseModel):
 
 def collect_market_groups(fsd: Fsd, bundle_static: Path):
     market_groups = fsd.get_fsd("marketgroups")
-    if market_groups is None:
+    types = fsd.iter_fsd("types")
+    if market_groups is None or types is None:
         return
 
     market_group_collection = schema_pb2.MarketGroupCollection()
@@ -48,7 +50,7 @@ def collect_market_groups(fsd: Fsd, bundle_static: Path):
         if validated.parentGroupID is not None:
             to_export[validated.parentGroupID].setdefault("groups", []).append(int(market_group_id))
 
-    for type_id, type_def in fsd.get_fsd("types").items():
+    for type_id, type_def in types:
         if "marketGroupID" in type_def and type_def["marketGroupID"] is not None:
             to_export[type_def["marketGroupID"]].setdefault("types", []).append(int(type_id))
 
@@ -73,9 +75,7 @@ def collect_market_groups(fsd: Fsd, bundle_static: Path):
     bundle_static_market_groups = bundle_static / "market_groups.pb"
     if bundle_static_market_groups.exists():
         LOGGER.warning(f"Overwriting existing file: {bundle_static_market_groups}")
-        bundle_static_market_groups.unlink()
 
-    with open(bundle_static_market_groups, "wb") as f:
-        f.write(market_group_collection.SerializeToString())
+    write_output(bundle_static_market_groups, market_group_collection.SerializeToString())
 
     LOGGER.info(f"Exported {len(market_group_collection.market_groups)} market groups.")
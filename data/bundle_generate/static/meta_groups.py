@@ -8,6 +8,7 @@ from pydantic import ValidationError
 
 from data import schema_pb2
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import write_output
 
 
 if TYPE_CHECKING:
@@ -51,7 +52,5 @@ def collect_meta_groups(fsd: Fsd, bundle_static: Path):
         LOGGER.warning(
             f"Meta groups file '{bundle_static_meta_groups}' already exists. Overwriting."
         )
-        bundle_static_meta_groups.unlink()
 
-    with open(bundle_static_meta_groups, "wb") as f:
-        f.write(meta_group_collection.SerializeToString())
+    write_output(bundle_static_meta_groups, meta_group_collection.SerializeToString())
@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import sqlite3
-
 from enum import StrEnum
 from enum import unique
 from typing import TYPE_CHECKING
@@ -12,6 +10,8 @@ from pydantic import ValidationError
 
 from data import schema_pb2
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import connect_output
+from data.bundle_generate.outputs import write_output
 from data.bundle_generate.types import BoolInt  # noqa: TC001
 
 
@@ -171,9 +171,8 @@ def collect_npc_corporations(fsd: Fsd, bundle_static: Path, loc_root: Path):
     npc_loc_lookup = schema_pb2.NpcCorporationLocalizationLookup()
     if npc_corporation_db.exists():
         LOGGER.warning(f"NPC corporations file '{npc_corporation_db}' already exists. Overwriting.")
-        npc_corporation_db.unlink()
 
-    with sqlite3.connect(npc_corporation_db) as conn:
+    with connect_output(npc_corporation_db) as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -226,7 +225,5 @@ def collect_npc_corporations(fsd: Fsd, bundle_static: Path, loc_root: Path):
         LOGGER.warning(
             f"NPC corporations localization lookup file '{bundle_npc_corp_look_up}' already exists. Overwriting."
         )
-        bundle_npc_corp_look_up.unlink()
 
-    with open(bundle_npc_corp_look_up, "wb") as f:
-        f.write(npc_loc_lookup.SerializeToString())
+    write_output(bundle_npc_corp_look_up, npc_loc_lookup.SerializeToString())
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import sqlite3
 
@@ -9,6 +10,7 @@ from data.bundle_generate.consts import SKIN_LICENSES_STATIC_RES
 from data.bundle_generate.consts import SKIN_MATERIALS_STATIC_RES
 from data.bundle_generate.consts import SKINS_STATIC_RES
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import connect_output
 
 
 if TYPE_CHECKING:
@@ -58,12 +60,27 @@ CREATE INDEX IF NOT EXISTS idx_skin_types_type_id ON skin_types(type_id);
 
 
 async def collect_skin_infos(fsd: Fsd, index: ResourceTree, bundle_static: Path):
+    skins_static = await index.download_resource(SKINS_STATIC_RES)
+    skin_materials_static = await index.download_resource(SKIN_MATERIALS_STATIC_RES)
+    skin_licenses_static = await index.download_resource(SKIN_LICENSES_STATIC_RES)
+
+    await asyncio.to_thread(
+        _write_skin_infos,
+        skins_static.file_path,
+        skin_materials_static.file_path,
+        skin_licenses_static.file_path,
+        bundle_static,
+    )
+
+
+def _write_skin_infos(
+    skins_static: Path, skin_materials_static: Path, skin_licenses_static: Path, bundle_static: Path
+):
     bundle_skins_db = bundle_static / "skins.db"
     if bundle_skins_db.exists():
         LOGGER.warning(f"Skins database '{bundle_skins_db}' already exists. Overwriting.")
-        bundle_skins_db.unlink()
 
-    with sqlite3.connect(bundle_skins_db) as conn:
+    with connect_output(bundle_skins_db) as conn:
         cursor = conn.cursor()
         cursor.execute(CREATE_SKINS_TABLE_SQL)
         cursor.execute(CREATE_SKIN_MATERIALS_TABLE_SQL)
@@ -73,15 +90,9 @@ async def collect_skin_infos(fsd: Fsd, index: ResourceTree, bundle_static: Path)
         conn.commit()
 
         with (
-            sqlite3.connect(
-                (await index.download_resource(SKINS_STATIC_RES)).file_path
-            ) as skins_static_db,
-            sqlite3.connect(
-                (await index.download_resource(SKIN_MATERIALS_STATIC_RES)).file_path
-            ) as skin_materials_static_db,
-            sqlite3.connect(
-                (await index.download_resource(SKIN_LICENSES_STATIC_RES)).file_path
-            ) as skin_licenses_static_db,
+            sqlite3.connect(skins_static) as skins_static_db,
+            sqlite3.connect(skin_materials_static) as skin_materials_static_db,
+            sqlite3.connect(skin_licenses_static) as skin_licenses_static_db,
         ):
             skins_static_cur = skins_static_db.cursor()
             skin_materials_static_cur = skin_materials_static_db.cursor()
@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import sqlite3
-
 from typing import TYPE_CHECKING
 
 from pydantic import BaseModel
@@ -10,6 +8,8 @@ from pydantic import ValidationError
 
 from data import schema_pb2
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import connect_output
+from data.bundle_generate.outputs import write_output
 
 
 if TYPE_CHECKING:
@@ -72,9 +72,8 @@ def collect_station_operation(
         LOGGER.warning(
             f"Station operations database '{station_operations_db}' already exists. Overwriting."
         )
-        station_operations_db.unlink()
 
-    with sqlite3.connect(station_operations_db) as conn:
+    with connect_output(station_operations_db) as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -127,7 +126,5 @@ def collect_station_operation(
         LOGGER.warning(
             f"Station operation localization lookup file '{bundle_station_op_lookup}' already exists. Overwriting."
         )
-        bundle_station_op_lookup.unlink()
 
-    with open(bundle_station_op_lookup, "wb") as f:
-        f.write(station_op_lookup.SerializeToString())
+    write_output(bundle_station_op_lookup, station_op_lookup.SerializeToString())
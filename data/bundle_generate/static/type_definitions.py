@@ -8,6 +8,7 @@ from pydantic import ValidationError
 
 from data import schema_pb2
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import write_output
 from data.bundle_generate.types import BoolInt  # noqa: TC001
 
 
@@ -107,13 +108,13 @@ def _pydantic_to_protobuf_type_id(pydantic_obj: TypeID, type_id: int) -> schema_
 
 
 def collect_type_definitions(fsd: Fsd, bundle_static: Path, loc_root: Path):
-    types = fsd.get_fsd("types")
+    types = fsd.iter_fsd("types")
     if types is None:
         return
     type_collection = schema_pb2.TypeCollection()
     type_loc_lookup = schema_pb2.TypeLocalizationLookup()
 
-    for type_id, type_def in types.items():
+    for type_id, type_def in types:
         try:
             validated = TypeID(**type_def)
         except ValidationError as e:
@@ -134,10 +135,8 @@ def collect_type_definitions(fsd: Fsd, bundle_static: Path, loc_root: Path):
         LOGGER.warning(
             f"Type definitions file '{bundle_static_types}' already exists, overwriting."
         )
-        bundle_static_types.unlink()
 
-    with open(bundle_static_types, "wb+") as f:
-        f.write(type_collection.SerializeToString())
+    write_output(bundle_static_types, type_collection.SerializeToString())
     LOGGER.info(f"Wrote {len(type_collection.types)} type definitions to '{bundle_static_types}'.")
 
     bundle_type_loc_lookup = loc_root / "type_localization_lookup.pb"
@@ -145,6 +144,4 @@ def collect_type_definitions(fsd: Fsd, bundle_static: Path, loc_root: Path):
         LOGGER.warning(
             f"Type localization lookup file '{bundle_type_loc_lookup}' already exists. Overwriting."
         )
-        bundle_type_loc_lookup.unlink()
-    with open(bundle_type_loc_lookup, "wb+") as f:
-        f.write(type_loc_lookup.SerializeToString())
+    write_output(bundle_type_loc_lookup, type_loc_lookup.SerializeToString())
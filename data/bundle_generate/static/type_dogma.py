@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import sqlite3
-
 from typing import TYPE_CHECKING
 
 from pydantic import BaseModel
@@ -10,6 +8,7 @@ from pydantic import ValidationError
 
 from data import schema_pb2
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import connect_output
 from data.bundle_generate.types import BoolInt  # noqa: TC001
 
 
@@ -60,16 +59,15 @@ def _pydantic_to_protobuf_type_dogma(pydantic_obj: _TypeDogma) -> schema_pb2.Typ
 
 
 def collect_type_dogma(fsd: Fsd, bundle_static: Path):
-    type_dogmas = fsd.get_fsd("typeDogma")
+    type_dogmas = fsd.iter_fsd("typeDogma")
     if type_dogmas is None:
         return
 
     bundle_dogma_db = bundle_static / "type_dogma.db"
     if bundle_dogma_db.exists():
         LOGGER.warning(f"Type dogma file '{bundle_dogma_db}' already exists. Overwriting.")
-        bundle_dogma_db.unlink()
 
-    with sqlite3.connect(bundle_dogma_db) as conn:
+    with connect_output(bundle_dogma_db) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS type_dogma (
@@ -78,7 +76,7 @@ def collect_type_dogma(fsd: Fsd, bundle_static: Path):
             ) 
         """)
 
-        for type_id, dogma_def in type_dogmas.items():
+        for type_id, dogma_def in type_dogmas:
             try:
                 validated = _TypeDogma(**dogma_def)
             except ValidationError as e:
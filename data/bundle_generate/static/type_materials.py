@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import sqlite3
-
 from typing import TYPE_CHECKING
 
 from pydantic import BaseModel
@@ -10,6 +8,7 @@ from pydantic import ValidationError
 
 from data import schema_pb2
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import connect_output
 
 
 if TYPE_CHECKING:
@@ -46,16 +45,15 @@ def _pydantic_to_protobuf_type_material(pydantic_obj: _TypeMaterial) -> schema_p
 
 
 def collect_type_materials(fsd: Fsd, bundle_static: Path) -> None:
-    type_materials = fsd.get_fsd("typematerials")
+    type_materials = fsd.iter_fsd("typematerials")
     if type_materials is None:
         return
 
     bundle_materials_db = bundle_static / "type_materials.db"
     if bundle_materials_db.exists():
         LOGGER.warning(f"Type materials file '{bundle_materials_db}' already exists. Overwriting.")
-        bundle_materials_db.unlink()
 
-    with sqlite3.connect(bundle_materials_db) as conn:
+    with connect_output(bundle_materials_db) as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -66,7 +64,7 @@ def collect_type_materials(fsd: Fsd, bundle_static: Path) -> None:
             """
         )
 
-        for type_id, material_def in type_materials.items():
+        for type_id, material_def in type_materials:
             try:
                 validated = _TypeMaterial(**material_def)
             except ValidationError as e:
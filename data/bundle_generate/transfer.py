@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import hashlib
+import os
+import re
+import uuid
+
+from typing import TYPE_CHECKING
+from typing import BinaryIO
+from typing import Self
+
+from data.bundle_generate.log import LOGGER
+from data.bundle_generate.object_store import file_md5
+
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from pathlib import Path
+    from types import TracebackType
+
+    import aiohttp
+
+    from data.bundle_generate.sessions import SessionManager
+
+
+# Files at least this large are split into ranged segments downloaded in parallel.
+SEGMENT_MIN_SIZE = 32 * 1024**2
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+class RangeNotSupportedError(Exception):
+    """The server does not answer ranged requests with the plain content of the file."""
+
+
+class ChunkWriter:
+    """Write a download to `path` on an I/O thread pool, while its next chunk is received.
+
+    Chunks are written in order, one at a time, and hashed into `md5` if given.
+    A disk stall only holds up the download waiting for it, not the event loop
+    and every other transfer with it. The file is opened with `mode` and
+    written from `offset` on, along with the first chunk.
+    """
+
+    __executor: Executor
+    __path: Path
+    __mode: str
+    __offset: int
+    __md5: hashlib._Hash | None
+
+    __file: BinaryIO | None
+    __pending: concurrent.futures.Future | None
+    __written: int
+
+    def __init__(
+        self,
+        executor: Executor,
+        path: Path,
+        mode: str = "wb",
+        offset: int = 0,
+        md5: hashlib._Hash | None = None,
+    ) -> None:
+        self.__executor = executor
+        self.__path = path
+        self.__mode = mode
+        self.__offset = offset
+        self.__md5 = md5
+        self.__file = None
+        self.__pending = None
+        self.__written = 0
+
+    @property
+    def written(self) -> int:
+        """The number of bytes written so far."""
+        return self.__written
+
+    async def write(self, chunk: bytes) -> None:
+        if self.__pending is not None:
+            await asyncio.wrap_future(self.__pending)
+        self.__pending = self.__executor.submit(self._write, chunk)
+
+    def _open(self) -> None:
+        self.__file = open(self.__path, self.__mode)  # noqa: SIM115
+        if self.__offset:
+            self.__file.seek(self.__offset)
+
+    def _write(self, chunk: bytes) -> None:
+        if self.__file is None:
+            self._open()
+        if self.__md5 is not None:
+            self.__md5.update(chunk)
+        self.__file.write(chunk)
+        self.__written += len(chunk)
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        try:
+            if exc_type is None and self.__pending is not None:
+                await asyncio.wrap_future(self.__pending)
+        finally:
+            closing = self.__executor.submit(self._close, self.__pending, exc_type is None)
+            # The file must be closed even if the caller is cancelled meanwhile.
+            await asyncio.shield(asyncio.wrap_future(closing))
+
+    def _close(self, pending: concurrent.futures.Future | None, create: bool) -> None:
+        if pending is not None:
+            # A write still in progress has to finish before the file is closed.
+            concurrent.futures.wait([pending])
+        if self.__file is None and create:
+            # Nothing was received, the file is still created or truncated.
+            self._open()
+        if self.__file is not None:
+            self.__file.close()
+
+
+def claim_part(part_path: Path) -> Path:
+    """A private path to download to, holding the data left at `part_path` by an earlier download.
+
+    The partial file is claimed by renaming it, so two processes never append to the same file.
+    """
+    tmp_path = part_path.with_name(f"{part_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        os.replace(part_path, tmp_path)
+        LOGGER.debug(f"Resuming partial download '{part_path}'.")
+    except FileNotFoundError:
+        pass
+    return tmp_path
+
+
+def release_part(tmp_path: Path, part_path: Path) -> None:
+    """Keep the data downloaded to `tmp_path` at `part_path`, for a later download to resume."""
+    try:
+        if tmp_path.stat().st_size > 0:
+            os.replace(tmp_path, part_path)
+        else:
+            tmp_path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _content_range(response: aiohttp.ClientResponse) -> tuple[int, int, int | None] | None:
+    """The range of a partial response, if it holds plain file content."""
+    if response.status != 206 or response.headers.get("Content-Encoding", "identity") != "identity":
+        return None
+
+    match = _CONTENT_RANGE.fullmatch(response.headers.get("Content-Range", ""))
+    if match is None:
+        return None
+    start, end, total = match.groups()
+    return int(start), int(end), None if total == "*" else int(total)
+
+
+async def download(
+    sessions: SessionManager, url: str, path: Path, size: int = 0, segments: int = 1
+) -> str:
+    """Download `url` to `path`, resuming after the data already in it, and return its md5.
+
+    A fresh download of a file of at least `SEGMENT_MIN_SIZE` bytes is split into
+    `segments` ranged requests, if the server supports them. `size` is the
+    expected size of the file, or 0 if it is unknown.
+    """
+    offset = path.stat().st_size if path.exists() else 0
+    if offset == 0 and segments > 1 and size >= SEGMENT_MIN_SIZE:
+        try:
+            await _download_segments(sessions, url, path, size, segments)
+            return await asyncio.get_running_loop().run_in_executor(sessions.io, file_md5, path)
+        except RangeNotSupportedError:
+            LOGGER.debug(f"Ranged requests are not supported for '{url}', downloading at once.")
+            offset = path.stat().st_size
+
+    return await _download_stream(sessions, url, path, offset)
+
+
+def _allocate(path: Path, size: int) -> None:
+    with open(path, "wb") as f:
+        f.truncate(size)
+
+
+def _hash_prefix(path: Path) -> hashlib._Hash:
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            md5.update(chunk)
+    return md5
+
+
+async def _download_stream(sessions: SessionManager, url: str, path: Path, offset: int) -> str:
+    md5 = hashlib.md5()
+    headers = None
+    if offset:
+        # The downloaded part was written by an earlier attempt, so it has to be hashed again.
+        md5 = await asyncio.get_running_loop().run_in_executor(sessions.io, _hash_prefix, path)
+        headers = {"Range": f"bytes={offset}-", "Accept-Encoding": "identity"}
+
+    async with sessions.get(url, headers=headers) as resp:
+        if offset and resp.status == 416:
+            path.unlink(missing_ok=True)
+            raise RuntimeError(f"Unable to resume download of '{url}' at byte {offset}.")
+        resp.raise_for_status()
+
+        content_range = _content_range(resp) if offset else None
+        if offset and (content_range is None or content_range[0] != offset):
+            LOGGER.info(f"Server did not resume download of '{url}', starting over.")
+            offset = 0
+            md5 = hashlib.md5()
+        elif offset:
+            LOGGER.info(f"Resuming download of '{url}' at byte {offset}.")
+
+        async with ChunkWriter(sessions.io, path, "ab" if offset else "wb", md5=md5) as writer:
+            async for chunk in resp.content.iter_chunked(sessions.limits.chunk_size):
+                await writer.write(chunk)
+                sessions.received(url, len(chunk))
+
+    return md5.hexdigest()
+
+
+async def _download_segments(
+    sessions: SessionManager, url: str, path: Path, size: int, segments: int
+) -> None:
+    bounds = [(size * i // segments, size * (i + 1) // segments) for i in range(segments)]
+    written = [0] * segments
+
+    async def fetch(i: int) -> None:
+        start, end = bounds[i]
+        headers = {"Range": f"bytes={start}-{end - 1}", "Accept-Encoding": "identity"}
+        writer = ChunkWriter(sessions.io, path, "r+b", offset=start)
+        try:
+            async with sessions.get(url, headers=headers) as resp:
+                resp.raise_for_status()
+                content_range = _content_range(resp)
+                if content_range is None or content_range[0] != start or content_range[2] != size:
+                    raise RangeNotSupportedError(url)
+
+                received = 0
+                async with writer:
+                    async for chunk in resp.content.iter_chunked(sessions.limits.chunk_size):
+                        received += len(chunk)
+                        if received > end - start:
+                            raise RangeNotSupportedError(url)
+                        await writer.write(chunk)
+                        sessions.received(url, len(chunk))
+        finally:
+            written[i] = writer.written
+
+        if written[i] != end - start:
+            raise RuntimeError(f"Segment {i} of '{url}' ended after {written[i]} bytes.")
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(sessions.io, _allocate, path, size)
+
+    LOGGER.debug(f"Downloading '{url}' in {segments} segments.")
+    try:
+        async with asyncio.TaskGroup() as group:
+            for i in range(segments):
+                group.create_task(fetch(i))
+    except BaseException as e:
+        # Only keep the contiguous downloaded prefix, a later attempt resumes after it.
+        prefix = 0
+        for (start, end), count in zip(bounds, written, strict=True):
+            prefix = start + count
+            if prefix < end:
+                break
+        # The truncation must finish even if the download is cancelled meanwhile.
+        await asyncio.shield(loop.run_in_executor(sessions.io, os.truncate, path, prefix))
+
+        if isinstance(e, BaseExceptionGroup):
+            if e.subgroup(RangeNotSupportedError) is not None:
+                raise RangeNotSupportedError(url) from e
+            raise e.exceptions[0] from e
+        raise
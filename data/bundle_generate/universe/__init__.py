@@ -2,6 +2,15 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from data.bundle_generate.consts import CONSTELLATIONS_BIN_DATA_RES
+from data.bundle_generate.consts import CONSTELLATIONS_SCHEMA_RES
+from data.bundle_generate.consts import REGIONS_BIN_DATA_RES
+from data.bundle_generate.consts import REGIONS_SCHEMA_RES
+from data.bundle_generate.consts import SOLAR_SYSTEM_CONTENT_RES
+from data.bundle_generate.consts import SYSTEMS_BIN_DATA_RES
+from data.bundle_generate.consts import SYSTEMS_SCHEMA_RES
+from data.bundle_generate.pipeline import Collector
+from data.bundle_generate.pipeline import stage_keys
 from data.bundle_generate.universe import constellations
 from data.bundle_generate.universe import regions
 from data.bundle_generate.universe import system_contents
@@ -12,8 +21,10 @@ if TYPE_CHECKING:
     from pathlib import Path
 
     from data.bundle_generate import Metadata
+    from data.bundle_generate.pipeline import CollectorRunner
     from data.bundle_generate.resources import Fsd
     from data.bundle_generate.resources import ResourceTree
+    from data.bundle_generate.sessions import SessionManager
 
 
 class UniverseGenerator:
@@ -22,18 +33,79 @@ class UniverseGenerator:
     __fsd: Fsd
     __index: ResourceTree
     __metadata: Metadata
+    __runner: CollectorRunner
+    __sessions: SessionManager
 
-    def __init__(self, bundle_root: Path, fsd: Fsd, index: ResourceTree, metadata: Metadata):
+    __collectors: list[Collector]
+
+    def __init__(
+        self,
+        bundle_root: Path,
+        fsd: Fsd,
+        index: ResourceTree,
+        metadata: Metadata,
+        runner: CollectorRunner,
+        sessions: SessionManager,
+    ):
         self.__root = bundle_root / "universe"
         self.__loc_root = bundle_root / "localizations"
         self.__fsd = fsd
         self.__index = index
         self.__metadata = metadata
+        self.__runner = runner
+        self.__sessions = sessions
 
         self.__root.mkdir(parents=True, exist_ok=True)
 
+        self.__collectors = [
+            Collector(
+                name="universe.regions",
+                func=regions.collect_regions,
+                args=(self.__index, self.__root, self.__loc_root),
+                inputs=frozenset({REGIONS_SCHEMA_RES, REGIONS_BIN_DATA_RES}),
+                outputs=frozenset(
+                    {"universe/universe.db", "localizations/region_localization_lookup.pb"}
+                ),
+            ),
+            Collector(
+                name="universe.constellations",
+                func=constellations.collect_constellations,
+                args=(self.__index, self.__root, self.__loc_root),
+                inputs=frozenset({CONSTELLATIONS_SCHEMA_RES, CONSTELLATIONS_BIN_DATA_RES}),
+                outputs=frozenset(
+                    {"universe/universe.db", "localizations/constellation_localization_lookup.pb"}
+                ),
+            ),
+            Collector(
+                name="universe.systems",
+                func=systems.collect_systems,
+                args=(self.__index, self.__root, self.__loc_root),
+                inputs=frozenset({SYSTEMS_SCHEMA_RES, SYSTEMS_BIN_DATA_RES}),
+                outputs=frozenset(
+                    {"universe/universe.db", "localizations/system_localization_lookup.pb"}
+                ),
+            ),
+            Collector(
+                name="universe.system_contents",
+                func=system_contents.collect_system_contents,
+                args=(self.__index, self.__root, self.__loc_root),
+                inputs=frozenset({SOLAR_SYSTEM_CONTENT_RES}),
+                outputs=frozenset({"universe/solar_system.db"}),
+            ),
+        ]
+
+    @property
+    def collectors(self) -> list[Collector]:
+        return self.__collectors
+
+    @property
+    def inputs(self) -> frozenset[str]:
+        return stage_keys(self.__collectors)[0]
+
+    @property
+    def outputs(self) -> frozenset[str]:
+        return stage_keys(self.__collectors)[1]
+
     async def load(self):
-        await regions.collect_regions(self.__index, self.__root, self.__loc_root)
-        await constellations.collect_constellations(self.__index, self.__root, self.__loc_root)
-        await systems.collect_systems(self.__index, self.__root, self.__loc_root)
-        await system_contents.collect_system_contents(self.__index, self.__root, self.__loc_root)
+        for collector in self.__collectors:
+            await self.__runner.run(collector)
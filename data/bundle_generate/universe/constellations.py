@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-import sqlite3
+import asyncio
 
 from typing import TYPE_CHECKING
 
@@ -12,6 +12,8 @@ from data import schema_pb2
 from data.bundle_generate.consts import CONSTELLATIONS_BIN_DATA_RES
 from data.bundle_generate.consts import CONSTELLATIONS_SCHEMA_RES
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import connect_output
+from data.bundle_generate.outputs import write_output
 from data.bundle_generate.schema_resource import get_schema_resource
 from data.bundle_generate.universe._type import UniversePoint  # noqa: TC001
 from data.bundle_generate.universe._type import WormholeClassID  # noqa: TC001
@@ -55,11 +57,14 @@ async def collect_constellations(index: ResourceTree, root: Path, loc_root: Path
     constellations = await get_schema_resource(
         index, CONSTELLATIONS_SCHEMA_RES, CONSTELLATIONS_BIN_DATA_RES
     )
+    await asyncio.to_thread(_write_constellations, constellations, root, loc_root)
 
+
+def _write_constellations(constellations: dict, root: Path, loc_root: Path):
     bundle_universe_db = root / "universe.db"
     constellation_lookup = schema_pb2.ConstellationLocalizationLookup()
 
-    with sqlite3.connect(bundle_universe_db) as conn:
+    with connect_output(bundle_universe_db, shared=True) as conn:
         cursor = conn.cursor()
 
         cursor.execute(
@@ -128,9 +133,7 @@ async def collect_constellations(index: ResourceTree, root: Path, loc_root: Path
         LOGGER.warning(
             f"Constellation localization lookup file '{bundle_constellation_loc_lookup}' already exists. Overwriting."
         )
-        bundle_constellation_loc_lookup.unlink()
-    with open(bundle_constellation_loc_lookup, "wb+") as f:
-        f.write(constellation_lookup.SerializeToString())
+    write_output(bundle_constellation_loc_lookup, constellation_lookup.SerializeToString())
     LOGGER.info(
         f"Wrote {len(constellation_lookup.constellation_entries)} constellation localization entries to '{bundle_constellation_loc_lookup}'."
     )
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-import sqlite3
+import asyncio
 
 from typing import TYPE_CHECKING
 
@@ -12,6 +12,8 @@ from data import schema_pb2
 from data.bundle_generate.consts import REGIONS_BIN_DATA_RES
 from data.bundle_generate.consts import REGIONS_SCHEMA_RES
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import connect_output
+from data.bundle_generate.outputs import write_output
 from data.bundle_generate.schema_resource import get_schema_resource
 from data.bundle_generate.universe._type import UniversePoint  # noqa: TC001
 from data.bundle_generate.universe._type import WormholeClassID  # noqa: TC001
@@ -59,11 +61,14 @@ def _pydantic_to_protobuf_region(pydantic_obj: _Region) -> schema_pb2.Region:
 
 async def collect_regions(index: ResourceTree, root: Path, loc_root: Path):
     regions = await get_schema_resource(index, REGIONS_SCHEMA_RES, REGIONS_BIN_DATA_RES)
+    await asyncio.to_thread(_write_regions, regions, root, loc_root)
 
+
+def _write_regions(regions: dict, root: Path, loc_root: Path):
     bundle_universe_db = root / "universe.db"
     region_lookup = schema_pb2.RegionLocalizationLookup()
 
-    with sqlite3.connect(bundle_universe_db) as conn:
+    with connect_output(bundle_universe_db, shared=True) as conn:
         cursor = conn.cursor()
 
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='regions'")
@@ -125,9 +130,7 @@ async def collect_regions(index: ResourceTree, root: Path, loc_root: Path):
         LOGGER.warning(
             f"Region localization lookup file '{bundle_region_loc_lookup}' already exists. Overwriting."
         )
-        bundle_region_loc_lookup.unlink()
-    with open(bundle_region_loc_lookup, "wb+") as f:
-        f.write(region_lookup.SerializeToString())
+    write_output(bundle_region_loc_lookup, region_lookup.SerializeToString())
     LOGGER.info(
         f"Wrote {len(region_lookup.region_entries)} region localization entries to '{bundle_region_loc_lookup}'"
     )
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-import sqlite3
+import asyncio
 
 from dataclasses import dataclass
 from typing import TYPE_CHECKING
@@ -12,6 +12,7 @@ from data import schema_loader
 from data import schema_pb2
 from data.bundle_generate.consts import SOLAR_SYSTEM_CONTENT_RES
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import connect_output
 from data.bundle_generate.universe._type import CelestialAttributes  # noqa: TC001
 from data.bundle_generate.universe._type import CelestialStatistics  # noqa: TC001
 from data.bundle_generate.universe._type import PointRotation  # noqa: TC001
@@ -21,6 +22,8 @@ from data.bundle_generate.universe._type import WormholeClassID  # noqa: TC001
 
 
 if TYPE_CHECKING:
+    import sqlite3
+
     from pathlib import Path
 
     from data.bundle_generate.resources import ResourceTree
@@ -209,7 +212,11 @@ type StarRegistry = dict[int, tuple[Star, int]]
 
 async def collect_system_contents(index: ResourceTree, root: Path, loc_root: Path):
     system_content_file = await index.download_resource(SOLAR_SYSTEM_CONTENT_RES)
-    system_contents = schema_loader.binaryLoader.LoadFSDDataInPython(system_content_file.file_path)
+    await asyncio.to_thread(_write_system_contents, system_content_file.file_path, root)
+
+
+def _write_system_contents(system_content_path: Path, root: Path):
+    system_contents = schema_loader.binaryLoader.LoadFSDDataInPython(system_content_path)
 
     systems: SystemRegistry = {}
     planets: PlanetRegistry = {}
@@ -284,7 +291,7 @@ async def collect_system_contents(index: ResourceTree, root: Path, loc_root: Pat
         )
 
     solar_system_db = root / "solar_system.db"
-    with sqlite3.connect(solar_system_db) as conn:
+    with connect_output(solar_system_db) as conn:
         _collect_solar_systems(solar_system_db, conn, systems)
         _collect_planets(solar_system_db, conn, planets)
         _collect_moons(solar_system_db, conn, moons)
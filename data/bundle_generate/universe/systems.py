@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-import sqlite3
+import asyncio
 
 from enum import IntEnum
 from enum import unique
@@ -13,6 +13,8 @@ from data import schema_pb2
 from data.bundle_generate.consts import SYSTEMS_BIN_DATA_RES
 from data.bundle_generate.consts import SYSTEMS_SCHEMA_RES
 from data.bundle_generate.log import LOGGER
+from data.bundle_generate.outputs import connect_output
+from data.bundle_generate.outputs import write_output
 from data.bundle_generate.schema_resource import get_schema_resource
 from data.bundle_generate.universe._type import UniversePoint  # noqa: TC001
 from data.bundle_generate.universe._type import WormholeClassID  # noqa: TC001
@@ -59,11 +61,14 @@ class _System(BaseModel):
 
 async def collect_systems(index: ResourceTree, root: Path, loc_root: Path):
     systems = await get_schema_resource(index, SYSTEMS_SCHEMA_RES, SYSTEMS_BIN_DATA_RES)
+    await asyncio.to_thread(_write_systems, systems, root, loc_root)
 
+
+def _write_systems(systems: dict, root: Path, loc_root: Path):
     bundle_universe_db = root / "universe.db"
     system_lookup = schema_pb2.SystemLocalizationLookup()
 
-    with sqlite3.connect(bundle_universe_db) as conn:
+    with connect_output(bundle_universe_db, shared=True) as conn:
         cursor = conn.cursor()
 
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='systems';")
@@ -131,9 +136,7 @@ async def collect_systems(index: ResourceTree, root: Path, loc_root: Path):
         LOGGER.warning(
             f"System localization lookup file '{bundle_system_loc_lookup}' already exists. Overwriting."
         )
-        bundle_system_loc_lookup.unlink()
-    with open(bundle_system_loc_lookup, "wb+") as f:
-        f.write(system_lookup.SerializeToString())
+    write_output(bundle_system_loc_lookup, system_lookup.SerializeToString())
     LOGGER.info(
         f"Wrote {len(system_lookup.system_entries)} system localization entries to '{bundle_system_loc_lookup}'"
     )
@@ -0,0 +1,104 @@
+"""Benchmark writing downloads on the I/O thread pool against writing them on the event loop.
+
+Many small files are downloaded from a local stand-in server, once the way
+downloads used to be written (8 KiB chunks written on the event loop) and once
+through `transfer.download`. `--stall-ms` adds a sleep to every disk write,
+standing in for a slow disk. Run from the project root, e.g.:
+
+    python -m data.tests.bench_download_io --files 2000 --size 64 --stall-ms 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+
+from pathlib import Path
+from unittest import mock
+
+from data.bundle_generate import transfer
+from data.bundle_generate.concurrency import ConcurrencyLimits
+from data.bundle_generate.sessions import SessionManager
+from data.tests.stand_in import StandInServer
+
+
+async def _download_on_loop(sessions: SessionManager, url: str, path: Path, stall: float) -> None:
+    async with sessions.get(url) as resp:
+        resp.raise_for_status()
+        with open(path, "wb") as f:  # noqa: ASYNC230
+            async for chunk in resp.content.iter_chunked(8192):
+                if stall:
+                    # The stall is meant to block the event loop, as a slow disk write would.
+                    time.sleep(stall)  # noqa: ASYNC251
+                f.write(chunk)
+
+
+async def _download_on_pool(sessions: SessionManager, url: str, path: Path, stall: float) -> None:
+    await transfer.download(sessions, url, path)
+
+
+async def _run(
+    mode: str, server: StandInServer, names: list[str], args: argparse.Namespace
+) -> float:
+    download = _download_on_loop if mode == "loop" else _download_on_pool
+    stall = args.stall_ms / 1000
+    limits = ConcurrencyLimits(
+        initial=args.concurrency,
+        maximum=args.concurrency,
+        chunk_size=args.chunk_size * 1024,
+        io_threads=args.io_threads,
+    )
+
+    write = transfer.ChunkWriter._write
+
+    def stalled_write(self: transfer.ChunkWriter, chunk: bytes) -> None:
+        time.sleep(stall)
+        write(self, chunk)
+
+    with (
+        tempfile.TemporaryDirectory() as tmp_dir,
+        mock.patch.object(transfer.ChunkWriter, "_write", stalled_write if stall else write),
+    ):
+        async with SessionManager(limits) as sessions:
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    download(sessions, server.url(name), Path(tmp_dir) / name, stall)
+                    for name in names
+                )
+            )
+            return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.partition("\n")[0])
+    parser.add_argument("--files", type=int, default=2000, help="Number of files")
+    parser.add_argument("--size", type=int, default=64, help="Size of every file in KiB")
+    parser.add_argument("--stall-ms", type=float, default=0.0, help="Sleep per disk write")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent downloads")
+    parser.add_argument(
+        "--chunk-size", type=int, default=ConcurrencyLimits.chunk_size // 1024, help="KiB"
+    )
+    parser.add_argument("--io-threads", type=int, default=ConcurrencyLimits.io_threads)
+    parser.add_argument("--rounds", type=int, default=3, help="Runs of each mode")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    files = {f"file-{i}": rng.randbytes(args.size * 1024) for i in range(args.files)}
+    names = list(files)
+
+    async with StandInServer(files) as server:
+        for mode in ("loop", "pool"):
+            times = [await _run(mode, server, names, args) for _ in range(args.rounds)]
+            total = args.files * args.size / 1024
+            print(
+                f"{mode}: {args.files} files of {args.size} KiB, stall {args.stall_ms} ms: "
+                + ", ".join(f"{t:.2f}s ({total / t:.1f} MiB/s)" for t in times)
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
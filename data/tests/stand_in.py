@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import re
+
+from typing import TYPE_CHECKING
+from typing import Self
+
+from aiohttp import web
+
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+
+_RANGE = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+class StandInServer:
+    """A local stand-in for the resource CDN, serving in-memory `files` over HTTP.
+
+    Single `Range` requests are answered with `206` unless `ranges` is false,
+    in which case the whole file is sent. `cut` makes a response stop after
+    a number of bytes and drops its connection, like a failed transfer.
+    Every request is recorded in `requests` as its file name and `Range` header.
+    """
+
+    __files: dict[str, bytes]
+    __ranges: bool
+    __cuts: dict[tuple[str, int], int]
+    __runner: web.AppRunner | None
+    __base_url: str
+
+    requests: list[tuple[str, str | None]]
+
+    def __init__(self, files: dict[str, bytes], ranges: bool = True) -> None:
+        self.__files = files
+        self.__ranges = ranges
+        self.__cuts = {}
+        self.__runner = None
+        self.__base_url = ""
+        self.requests = []
+
+    def url(self, name: str) -> str:
+        return f"{self.__base_url}/{name}"
+
+    def cut(self, name: str, after: int, start: int = 0) -> None:
+        """Drop the next response of `name` starting at byte `start` after `after` bytes."""
+        self.__cuts[name, start] = after
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        name = request.match_info["name"]
+        data = self.__files.get(name)
+        if data is None:
+            raise web.HTTPNotFound()
+
+        range_header = request.headers.get("Range")
+        self.requests.append((name, range_header))
+
+        start, end, status, headers = 0, len(data), 200, {}
+        match = _RANGE.fullmatch(range_header or "")
+        if match is not None and self.__ranges:
+            start = int(match[1])
+            if start >= len(data):
+                raise web.HTTPRequestRangeNotSatisfiable(
+                    headers={"Content-Range": f"bytes */{len(data)}"}
+                )
+            if match[2]:
+                end = min(int(match[2]) + 1, len(data))
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{len(data)}"
+
+        body = data[start:end]
+        response = web.StreamResponse(status=status, headers=headers)
+        response.content_length = len(body)
+        await response.prepare(request)
+
+        cut = self.__cuts.pop((name, start), None)
+        if cut is not None:
+            await response.write(body[:cut])
+            request.transport.close()
+            return response
+
+        await response.write(body)
+        await response.write_eof()
+        return response
+
+    async def __aenter__(self) -> Self:
+        app = web.Application()
+        app.router.add_get("/{name}", self._handle)
+        self.__runner = web.AppRunner(app, handle_signals=False)
+        await self.__runner.setup()
+        site = web.TCPSite(self.__runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self.__runner.addresses[0][:2]
+        self.__base_url = f"http://{host}:{port}"
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if self.__runner is not None:
+            await self.__runner.cleanup()
+            self.__runner = None
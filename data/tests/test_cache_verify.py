@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import unittest
+
+from dataclasses import dataclass
+from pathlib import Path
+
+from data.bundle_generate.cache_verify import CacheVerifier
+from data.bundle_generate.object_store import ObjectStore
+from data.bundle_generate.object_store import link_or_copy
+
+
+@dataclass
+class Node:
+    """The fields of `ResourceTree._FileNode` the verifier reads."""
+
+    file_path: Path
+    checksum: str
+
+
+class CacheVerifierTest(unittest.TestCase):
+    """Cached resources checked against their checksums, and the record kept of them."""
+
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+        self.store = ObjectStore(self.root / "objects")
+        self.sidecar = self.root / "index-cache" / "verified.json"
+
+        self.nodes = []
+        for i in range(3):
+            data = bytes([i]) * 4096
+            checksum = hashlib.md5(data).hexdigest()
+            stored = self.store.object_path(checksum)
+            stored.parent.mkdir(parents=True, exist_ok=True)
+            stored.write_bytes(data)
+            node = Node(self.root / "index-cache" / f"res{i}.bin", checksum)
+            link_or_copy(stored, node.file_path)
+            self.nodes.append(node)
+
+    def verify(self) -> tuple[int, int, int]:
+        result = CacheVerifier(self.sidecar, self.store, jobs=2).verify(self.nodes)
+        return result.checked, result.hashed, result.removed
+
+    def test_unchanged_files_are_not_hashed_again(self) -> None:
+        # Each resource is linked to its stored object, so the pair is hashed once.
+        self.assertEqual(self.verify(), (6, 3, 0))
+        self.assertEqual(self.verify(), (6, 0, 0))
+
+    def test_truncated_file_is_removed(self) -> None:
+        self.verify()
+        node = self.nodes[1]
+        os.truncate(node.file_path, 100)
+
+        self.assertEqual(self.verify(), (6, 1, 2))
+        self.assertFalse(node.file_path.exists())
+        self.assertFalse(self.store.object_path(node.checksum).exists())
+        self.assertEqual(self.verify(), (4, 0, 0))
+
+    def test_rewritten_file_of_same_size_is_hashed_again(self) -> None:
+        self.verify()
+        node = self.nodes[2]
+        node.file_path.unlink()
+        node.file_path.write_bytes(b"\xff" * 4096)
+
+        self.assertEqual(self.verify(), (6, 1, 1))
+        self.assertFalse(node.file_path.exists())
+        self.assertTrue(self.store.object_path(node.checksum).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
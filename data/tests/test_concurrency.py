@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+from data.bundle_generate.concurrency import ConcurrencyLimits
+from data.bundle_generate.concurrency import HostLimiter
+
+
+class HostLimiterTest(unittest.IsolatedAsyncioTestCase):
+    """Slots of a host are granted in the order they were requested."""
+
+    async def asyncSetUp(self) -> None:
+        self.limiter = HostLimiter("example.com", ConcurrencyLimits(initial=1, maximum=1))
+        self.order: list[int] = []
+        self.release = asyncio.Event()
+
+    async def hold(self, i: int) -> None:
+        async with self.limiter.request():
+            self.order.append(i)
+            await self.release.wait()
+
+    async def test_waiters_are_served_in_order(self) -> None:
+        tasks = [asyncio.create_task(self.hold(i)) for i in range(4)]
+        await asyncio.sleep(0)
+        self.assertEqual(self.order, [0])
+
+        self.release.set()
+        # A caller arriving as the first slot is freed queues behind the waiters.
+        tasks.append(asyncio.create_task(self.hold(4)))
+        await asyncio.gather(*tasks)
+        self.assertEqual(self.order, [0, 1, 2, 3, 4])
+
+    async def test_cancelled_waiter_passes_its_slot_on(self) -> None:
+        self.release.set()
+        await self.limiter._acquire()
+        second = asyncio.create_task(self.hold(1))
+        third = asyncio.create_task(self.hold(2))
+        await asyncio.sleep(0)
+
+        # The slot is handed to the second caller, which is cancelled before it runs.
+        self.limiter._release()
+        second.cancel()
+        await asyncio.wait_for(third, 1)
+        with self.assertRaises(asyncio.CancelledError):
+            await second
+        self.assertEqual(self.order, [2])
+        self.assertEqual(self.limiter.report()["requests"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
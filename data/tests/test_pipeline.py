@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from data.bundle_generate.fingerprint import FingerprintStore
+from data.bundle_generate.journal import BuildJournal
+from data.bundle_generate.outputs import connect_output
+from data.bundle_generate.pipeline import Collector
+from data.bundle_generate.pipeline import CollectorRunner
+from data.bundle_generate.profiling import BuildProfiler
+from data.bundle_generate.resources import Fsd
+
+
+DOGMA = {str(type_id): {"dogmaAttributes": [type_id]} for type_id in range(100)}
+
+
+def collect_dogma(fsd: Fsd, bundle_root: Path) -> None:
+    """A collector streaming an FSD document into a bundle database, like `type_dogma`."""
+    records = fsd.iter_fsd("typeDogma")
+    if records is None:
+        return
+
+    with connect_output(bundle_root / "type_dogma.db") as conn:
+        conn.execute("CREATE TABLE type_dogma (type_id INTEGER PRIMARY KEY, dogma_data TEXT)")
+        for type_id, dogma in records:
+            conn.execute("INSERT INTO type_dogma VALUES (?, ?)", (type_id, json.dumps(dogma)))
+
+
+class CollectorRunnerTest(unittest.IsolatedAsyncioTestCase):
+    """Collectors streaming FSD documents, and what a build records of them."""
+
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+        self.bundle_root = self.root / "bundle"
+        self.bundle_root.mkdir()
+        (self.root / "fsd").mkdir()
+        self.fsd_path = self.root / "fsd" / "typeDogma.json"
+
+    def build(self) -> CollectorRunner:
+        """Set up the runner of a new build, along with its `fingerprints` and `collector`."""
+        fsd = Fsd(self.root / "fsd", self.root / "fsd-cache")
+        self.fingerprints = FingerprintStore(
+            self.root / "fingerprints.json", fsd, None, self.root / "resfileindex.txt"
+        )
+        self.collector = Collector(
+            "static.type_dogma",
+            collect_dogma,
+            (fsd, self.bundle_root),
+            inputs=frozenset({"fsd:typeDogma"}),
+            outputs=frozenset({"type_dogma.db"}),
+        )
+        journal = BuildJournal(self.root / "journal.json")
+        return CollectorRunner(
+            self.bundle_root, self.fingerprints, journal, BuildProfiler(self.bundle_root), fsd=fsd
+        )
+
+    def is_recorded(self) -> bool:
+        return self.fingerprints.matches(
+            self.collector.name, self.fingerprints.compute(self.collector)
+        )
+
+    def completed(self) -> dict:
+        return json.loads((self.root / "journal.json").read_text(encoding="utf-8"))["completed"]
+
+    async def test_complete_document_is_recorded(self) -> None:
+        self.fsd_path.write_text(json.dumps(DOGMA), encoding="utf-8")
+        runner = self.build()
+
+        await runner.run(self.collector)
+        self.assertTrue((self.bundle_root / "type_dogma.db").exists())
+        self.assertTrue(self.is_recorded())
+        self.assertIn(self.collector.name, self.completed())
+
+    async def test_truncated_document_fails_the_collector(self) -> None:
+        self.fsd_path.write_text(json.dumps(DOGMA)[:-100], encoding="utf-8")
+        runner = self.build()
+
+        with self.assertRaises(json.JSONDecodeError):
+            await runner.run(self.collector)
+        self.assertEqual(list(self.bundle_root.iterdir()), [])
+        self.assertFalse(self.is_recorded())
+        self.assertNotIn(self.collector.name, self.completed())
+
+        # No partial document is cached either, the next build parses it again.
+        runner = self.build()
+        with self.assertRaises(json.JSONDecodeError):
+            await runner.run(self.collector)
+
+
+if __name__ == "__main__":
+    unittest.main()
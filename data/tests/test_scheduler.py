@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+from typing import TYPE_CHECKING
+
+from data.bundle_generate.scheduler import Stage
+from data.bundle_generate.scheduler import StageScheduler
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+class StageSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    """Stages run concurrently in the order their inputs and outputs require."""
+
+    def setUp(self) -> None:
+        self.scheduler = StageScheduler()
+        self.events: list[str] = []
+
+    def stage(self, name: str, inputs: Iterable[str] = (), outputs: Iterable[str] = ()) -> Stage:
+        async def run() -> None:
+            self.events.append(f"{name} started")
+            await asyncio.sleep(0.01)
+            self.events.append(f"{name} finished")
+
+        return Stage(name, run, frozenset(inputs), frozenset(outputs))
+
+    async def test_stage_runs_after_the_stages_producing_its_inputs(self) -> None:
+        self.scheduler.add(self.stage("localization", outputs={"localization"}))
+        self.scheduler.add(self.stage("static", {"localization/en.db"}, {"static/types.pb"}))
+        self.scheduler.add(self.stage("images", {"static"}, {"images"}))
+        self.scheduler.add(self.stage("universe", {"fsd:regions"}, {"universe"}))
+
+        await self.scheduler.run()
+        for before, after in (("localization", "static"), ("static", "images")):
+            self.assertLess(
+                self.events.index(f"{before} finished"), self.events.index(f"{after} started")
+            )
+        # Independent stages run concurrently.
+        self.assertLess(
+            self.events.index("universe started"), self.events.index("localization finished")
+        )
+
+    def test_overlapping_outputs_conflict(self) -> None:
+        self.scheduler.add(self.stage("images", outputs={"images"}))
+        with self.assertRaises(ValueError):
+            self.scheduler.add(self.stage("icons", outputs={"images/icons/"}))
+        with self.assertRaises(ValueError):
+            self.scheduler.add(self.stage("images", outputs={"other"}))
+
+        # A common name prefix is not an overlap.
+        self.scheduler.add(self.stage("image-service", outputs={"images-service"}))
+
+    async def test_dependency_cycle_is_detected(self) -> None:
+        self.scheduler.add(self.stage("a", {"c.db"}, {"a.db"}))
+        self.scheduler.add(self.stage("b", {"a.db"}, {"b.db"}))
+        self.scheduler.add(self.stage("c", {"b.db"}, {"c.db"}))
+
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            await self.scheduler.run()
+        self.assertEqual(self.events, [])
+
+    async def test_failed_stage_cancels_the_others(self) -> None:
+        async def fail() -> None:
+            raise RuntimeError("collector failed")
+
+        self.scheduler.add(Stage("static", fail, outputs=frozenset({"static"})))
+        self.scheduler.add(self.stage("images", {"static"}, {"images"}))
+
+        with self.assertRaises(ExceptionGroup) as caught:
+            await self.scheduler.run()
+        self.assertIsNotNone(caught.exception.subgroup(RuntimeError))
+        self.assertEqual(self.events, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
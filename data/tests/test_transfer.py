@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import tempfile
+import unittest
+
+from pathlib import Path
+from unittest import mock
+
+import aiohttp
+
+from data.bundle_generate import transfer
+from data.bundle_generate.concurrency import ConcurrencyLimits
+from data.bundle_generate.sessions import SessionManager
+from data.tests.stand_in import StandInServer
+
+
+SIZE = 1024**2
+SEGMENTS = 4
+
+
+class DownloadTest(unittest.IsolatedAsyncioTestCase):
+    """Interrupted downloads against a stand-in server, and how they resume."""
+
+    async def asyncSetUp(self) -> None:
+        self.data = random.Random(0).randbytes(SIZE)
+        self.md5 = hashlib.md5(self.data).hexdigest()
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.part_path = Path(tmp_dir.name) / "resource.part"
+
+        self.sessions = SessionManager(ConcurrencyLimits(segments=SEGMENTS, chunk_size=16 * 1024))
+        await self.sessions.__aenter__()
+        self.addAsyncCleanup(self.sessions.__aexit__, None, None, None)
+
+    async def serve(self, ranges: bool = True) -> StandInServer:
+        server = StandInServer({"resource": self.data}, ranges=ranges)
+        await server.__aenter__()
+        self.addAsyncCleanup(server.__aexit__, None, None, None)
+        return server
+
+    async def interrupt(self, server: StandInServer, segments: int = 1) -> int:
+        """Download into the `.part` file until the transfer fails, returning the bytes kept."""
+        tmp_path = transfer.claim_part(self.part_path)
+        with self.assertRaises(aiohttp.ClientPayloadError):
+            await transfer.download(self.sessions, server.url("resource"), tmp_path, SIZE, segments)
+        transfer.release_part(tmp_path, self.part_path)
+
+        size = self.part_path.stat().st_size if self.part_path.exists() else 0
+        self.assertEqual(self.part_path.read_bytes() if size else b"", self.data[:size])
+        return size
+
+    async def resume(self, server: StandInServer, segments: int = 1) -> None:
+        tmp_path = transfer.claim_part(self.part_path)
+        self.assertFalse(self.part_path.exists())
+        digest = await transfer.download(
+            self.sessions, server.url("resource"), tmp_path, SIZE, segments
+        )
+        self.assertEqual(digest, self.md5)
+        self.assertEqual(tmp_path.read_bytes(), self.data)
+
+    async def test_resume_after_interrupted_download(self) -> None:
+        server = await self.serve()
+        server.cut("resource", 300 * 1024)
+
+        prefix = await self.interrupt(server)
+        self.assertGreater(prefix, 0)
+
+        await self.resume(server)
+        self.assertEqual(server.requests[-1], ("resource", f"bytes={prefix}-"))
+
+    async def test_start_over_when_range_is_ignored(self) -> None:
+        server = await self.serve(ranges=False)
+        server.cut("resource", 300 * 1024)
+
+        self.assertGreater(await self.interrupt(server), 0)
+        await self.resume(server)
+
+    async def test_segmented_download_keeps_contiguous_prefix(self) -> None:
+        server = await self.serve()
+        # Fail the third segment, the ones after it may have been written already.
+        server.cut("resource", 10 * 1024, start=SIZE // 2)
+
+        with mock.patch.object(transfer, "SEGMENT_MIN_SIZE", 64 * 1024):
+            prefix = await self.interrupt(server, SEGMENTS)
+            self.assertLessEqual(prefix, SIZE // 2 + 10 * 1024)
+            self.assertEqual(
+                sorted(r for _, r in server.requests),
+                sorted(
+                    f"bytes={SIZE * i // SEGMENTS}-{SIZE * (i + 1) // SEGMENTS - 1}"
+                    for i in range(SEGMENTS)
+                ),
+            )
+
+            await self.resume(server, SEGMENTS)
+
+    async def test_segmented_download_without_range_support(self) -> None:
+        server = await self.serve(ranges=False)
+
+        with mock.patch.object(transfer, "SEGMENT_MIN_SIZE", 64 * 1024):
+            await self.resume(server, SEGMENTS)
+
+
+if __name__ == "__main__":
+    unittest.main()